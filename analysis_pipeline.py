@@ -0,0 +1,210 @@
+"""
+Contains a pipeline that remembers the results of each step of the leading
+digit analysis, so running the analysis again with the same data and
+parameters does not recompute anything.
+"""
+
+from collections import OrderedDict
+import pandas as pd
+
+from data_analysis import (
+    count_leading_digits,
+    data_to_percentage,
+    find_std_dev_range,
+    find_values_outside_range,
+)
+
+
+class AnalysisPipeline:
+    """
+    Runs the steps of the leading digit analysis (counting the leading digits,
+    turning the counts into percentages, finding the 1.96 standard deviation
+    range and finding the values outside of it), remembering the result of
+    every step.
+
+    Results are keyed by the identity of the dataframe and the parameters, so
+    each step is only computed once for each dataframe, column and threshold,
+    and later steps reuse the results of earlier steps. Up to max_size results
+    are kept, and the least recently used result is dropped when there are
+    more. The cache keeps a reference to each dataframe it has a result for,
+    and assumes the dataframe is not changed in place; call clear after
+    changing a dataframe.
+
+    The results are shared between calls, so copy them before changing them.
+
+    Attributes:
+        max_size: an integer representing the number of results to keep.
+        hits: an integer representing the number of steps that were found in
+        the cache.
+        misses: an integer representing the number of steps that had to be
+        computed.
+    """
+
+    def __init__(self, max_size: int = 128):
+        """
+        Creates a pipeline with an empty cache.
+
+        Args:
+            max_size: an integer representing the number of results to keep.
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._results = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def clear(self):
+        """
+        Removes every result from the cache and resets the hit and miss
+        counters.
+        """
+        self._results.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def count_leading_digits(
+        self, data: pd.DataFrame, column_name: str = None, threshold: int = 0
+    ) -> pd.DataFrame:
+        """
+        Counts the leading digits of each category like count_leading_digits.
+
+        Args:
+            data: (DataFrame) A dataframe with the data. Must have one column
+            with the name "votes" and, if column_name is given, column_name.
+            column_name: (str) the name of the column whose unique values are
+            the categories, or None to count the digits of the entire
+            dataframe.
+            threshold: integer representing the minimum number of discrete
+            numbers in the votes column for a category to be included.
+
+        Returns:
+            A pandas DataFrame with the digits 1-9 as the index and one column
+            of counts for each category.
+        """
+        return self._get_result(
+            "counts",
+            data,
+            (column_name, threshold),
+            lambda: count_leading_digits(data, column_name, threshold),
+        )
+
+    def percentages(
+        self, data: pd.DataFrame, column_name: str = None, threshold: int = 0
+    ) -> pd.DataFrame:
+        """
+        Finds the percentage of each leading digit in each category, the same
+        as data_to_percentage of find_all_leading_digits.
+
+        Args:
+            data: (DataFrame) the dataframe with the data.
+            column_name: (str) the name of the column with the categories, or
+            None to use the entire dataframe.
+            threshold: integer representing the minimum number of votes for a
+            category to be included.
+
+        Returns:
+            A pandas DataFrame with the digits 1-9 as the index and one column
+            of percentages for each category.
+        """
+        return self._get_result(
+            "percentages",
+            data,
+            (column_name, threshold),
+            lambda: data_to_percentage(
+                self.count_leading_digits(data, column_name, threshold),
+                from_counts=True,
+            ),
+        )
+
+    def std_dev_range(
+        self, data: pd.DataFrame, column_name: str = None, threshold: int = 0
+    ) -> (pd.Series, pd.Series, pd.Series, pd.Series):
+        """
+        Finds the mean, standard deviation and 1.96 standard deviation range of
+        the percentages of each digit like find_std_dev_range.
+
+        Args:
+            data: (DataFrame) the dataframe with the data.
+            column_name: (str) the name of the column with the categories, or
+            None to use the entire dataframe.
+            threshold: integer representing the minimum number of votes for a
+            category to be included.
+
+        Returns:
+            Four pandas Series containing the mean, standard deviation, maximum
+            values, and minimum values.
+        """
+        return self._get_result(
+            "std_dev_range",
+            data,
+            (column_name, threshold),
+            lambda: find_std_dev_range(
+                self.percentages(data, column_name, threshold)
+            ),
+        )
+
+    def values_outside_range(
+        self, data: pd.DataFrame, column_name: str = None, threshold: int = 0
+    ) -> list:
+        """
+        Finds the percentages that are more than 1.96 standard deviations from
+        the mean like find_values_outside_range.
+
+        Args:
+            data: (DataFrame) the dataframe with the data.
+            column_name: (str) the name of the column with the categories, or
+            None to use the entire dataframe.
+            threshold: integer representing the minimum number of votes for a
+            category to be included.
+
+        Returns:
+            A list of tuples with the format (category, digit, percentage) for
+            each percentage outside the range.
+        """
+
+        def find_values():
+            _, _, max_vals, min_vals = self.std_dev_range(
+                data, column_name, threshold
+            )
+            return find_values_outside_range(
+                self.percentages(data, column_name, threshold),
+                min_vals,
+                max_vals,
+            )
+
+        return self._get_result(
+            "values_outside_range",
+            data,
+            (column_name, threshold),
+            find_values,
+        )
+
+    def _get_result(self, step: str, data: pd.DataFrame, params, compute):
+        """
+        Finds the result of a step in the cache, or computes and caches it.
+
+        Args:
+            step: a string representing the name of the step.
+            data: the dataframe the step is run on.
+            params: a hashable tuple of the other parameters of the step.
+            compute: a function with no arguments that computes the result.
+
+        Returns:
+            The result of the step.
+        """
+        key = (step, id(data), params)
+        if key in self._results:
+            self.hits += 1
+            self._results.move_to_end(key)
+            return self._results[key][1]
+
+        self.misses += 1
+        result = compute()
+        # Keeping the dataframe alive keeps its id from being reused while its
+        # results are in the cache.
+        self._results[key] = (data, result)
+        while len(self._results) > self.max_size:
+            self._results.popitem(last=False)
+        return result
@@ -0,0 +1,102 @@
+"""
+Renders the subplots of plot_subplots_bar to image files without a display,
+reusing the same figure for every plot, for making many reports at once.
+"""
+
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from data_analysis import draw_subplots_bar
+
+
+class SubplotsBarRenderer:
+    """
+    Saves plots like plot_subplots_bar to image files with the Agg backend,
+    which does not need a display and does not use pyplot, so it works in
+    scripts and worker processes.
+
+    A figure and grid of axes is made the first time a number of digits is
+    plotted and reused for every later plot with the same number of digits,
+    so each plot only clears and redraws the axes.
+    """
+
+    def __init__(self, figsize: tuple = (20, 20), dpi: int = 100):
+        """
+        Creates a renderer without any figures.
+
+        Args:
+            figsize: a tuple with the width and height of the figures in
+            inches.
+            dpi: an integer representing the number of pixels per inch in the
+            image files.
+        """
+        self.figsize = figsize
+        self.dpi = dpi
+        self._figures = {}
+
+    def draw(
+        self,
+        mean_label: str,
+        values_outside_std_dev: list,
+        mean: pd.Series,
+        edge_value: tuple,
+        bar_colors: list,
+        digit_label: str = "Leading Digit",
+    ) -> Figure:
+        """
+        Draws the subplots of plot_subplots_bar on the renderer's figure for
+        the number of digits in mean.
+
+        Args:
+            mean_label, values_outside_std_dev, mean, edge_value, bar_colors,
+            digit_label: the same as for plot_subplots_bar.
+
+        Returns:
+            The matplotlib Figure that was drawn on. It is reused by the next
+            call with the same number of digits.
+        """
+        grid_size = int(np.ceil(np.sqrt(len(mean.index))))
+        if grid_size not in self._figures:
+            figure = Figure(figsize=self.figsize, dpi=self.dpi)
+            FigureCanvasAgg(figure)
+            figure.subplots(grid_size, grid_size)
+            figure.subplots_adjust(
+                left=0.1,
+                bottom=0.1,
+                right=0.9,
+                top=0.9,
+                wspace=0.4,
+                hspace=0.4,
+            )
+            self._figures[grid_size] = figure
+        figure = self._figures[grid_size]
+        for axes in figure.axes:
+            axes.clear()
+        draw_subplots_bar(
+            figure.axes,
+            mean_label,
+            values_outside_std_dev,
+            mean,
+            edge_value,
+            bar_colors,
+            digit_label,
+        )
+        return figure
+
+    def save(self, path: str, *args, **kwargs) -> str:
+        """
+        Draws the subplots like draw and saves them to an image file, such as
+        a PNG file.
+
+        Args:
+            path: a string representing the path to the image file. The format
+            is found from the extension.
+            *args, **kwargs: the arguments of draw.
+
+        Returns:
+            A string representing the path to the image file.
+        """
+        self.draw(*args, **kwargs).savefig(path)
+        return path
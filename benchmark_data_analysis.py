@@ -0,0 +1,290 @@
+"""
+Times the hot paths in data_analysis.py on synthetic Benford-distributed vote
+data.
+
+Run it as a script to time every function at each size and add the results to
+benchmarks/results.csv along with the current commit, so slowdowns show up when
+the results of different commits are compared with compare_results.
+"""
+
+import argparse
+from datetime import datetime, timezone
+import os
+import subprocess
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+from data_analysis import (
+    get_leading_digits,
+    _string_leading_digits,
+    find_all_leading_digits,
+    get_vote_by_category,
+    count_leading_digits,
+    data_to_percentage,
+    find_std_dev_range,
+    find_values_outside_range,
+)
+
+RESULTS_PATH = "benchmarks/results.csv"
+
+
+def generate_votes(num_rows: int, seed: int = 0) -> np.ndarray:
+    """
+    Generates vote counts whose leading digits follow Benford's law.
+
+    Args:
+        num_rows: an integer representing the number of vote counts to make.
+        seed: an integer used to seed the random number generator.
+
+    Returns:
+        A numpy array of integers with num_rows vote counts.
+    """
+    rng = np.random.default_rng(seed)
+    return np.floor(10 ** rng.uniform(0, 6, num_rows)).astype(np.int64)
+
+
+def time_function(function, *args, repeat: int = 3) -> float:
+    """
+    Runs a function several times and returns the fastest run in seconds.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def benchmark_leading_digits(num_rows: int = 1_000_000) -> pd.Series:
+    """
+    Compares finding leading digits with strings against the vectorized
+    get_leading_digits and checks that both give the same digits.
+
+    Args:
+        num_rows: an integer representing the number of vote counts to use.
+
+    Returns:
+        A pandas Series with the time in seconds for each method and the
+        speedup of the vectorized method.
+    """
+    votes = pd.Series(generate_votes(num_rows))
+    if not np.array_equal(
+        get_leading_digits(votes), _string_leading_digits(votes.to_numpy())
+    ):
+        raise AssertionError("Vectorized leading digits do not match.")
+    string_time = time_function(_string_leading_digits, votes.to_numpy())
+    vectorized_time = time_function(get_leading_digits, votes)
+    return pd.Series(
+        {
+            "string": string_time,
+            "vectorized": vectorized_time,
+            "speedup": string_time / vectorized_time,
+        }
+    )
+
+
+def generate_dataset(
+    num_rows: int, num_categories: int, seed: int = 0
+) -> pd.DataFrame:
+    """
+    Generates a dataset of Benford-distributed votes, each in one of
+    num_categories categories.
+
+    Args:
+        num_rows: an integer representing the number of votes.
+        num_categories: an integer representing the number of categories.
+        seed: an integer used to seed the random number generator.
+
+    Returns:
+        A pandas DataFrame with a "votes" column and a "category" column of
+        strings.
+    """
+    rng = np.random.default_rng(seed)
+    names = np.array([f"category {i}" for i in range(num_categories)])
+    return pd.DataFrame(
+        {
+            "votes": generate_votes(num_rows, seed),
+            "category": names[rng.integers(0, num_categories, num_rows)],
+        }
+    )
+
+
+def measure_peak_memory(function, *args) -> float:
+    """
+    Runs a function once and returns the most memory it had allocated at once
+    in megabytes, as tracked by tracemalloc (which includes numpy arrays).
+    """
+    tracemalloc.start()
+    try:
+        function(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 2**20
+
+
+def benchmark_data_analysis(
+    row_counts: tuple = (10_000, 1_000_000, 10_000_000),
+    category_counts: tuple = (10, 1_000, 100_000),
+    repeat: int = 3,
+) -> pd.DataFrame:
+    """
+    Times find_all_leading_digits, get_vote_by_category, count_leading_digits,
+    data_to_percentage and find_values_outside_range on generated datasets of
+    each size and finds the peak memory of each. Sizes with more categories
+    than rows are skipped.
+
+    Args:
+        row_counts: a tuple of the numbers of rows to generate datasets with.
+        category_counts: a tuple of the numbers of categories to generate
+        datasets with.
+        repeat: an integer representing the number of times to run each
+        function, keeping the fastest time.
+
+    Returns:
+        A pandas DataFrame with one row for each function and size, with the
+        columns "function", "num_rows", "num_categories", "seconds" and
+        "peak_mb".
+    """
+    results = []
+    for num_rows in row_counts:
+        for num_categories in category_counts:
+            if num_categories > num_rows:
+                continue
+            data = generate_dataset(num_rows, num_categories)
+            digits = find_all_leading_digits(data, "category")
+            percentages = data_to_percentage(digits)
+            _, _, max_vals, min_vals = find_std_dev_range(percentages)
+            cases = {
+                "find_all_leading_digits": (
+                    find_all_leading_digits,
+                    data,
+                    "category",
+                ),
+                "get_vote_by_category": (
+                    get_vote_by_category,
+                    data,
+                    "category",
+                ),
+                "count_leading_digits": (
+                    count_leading_digits,
+                    data,
+                    "category",
+                ),
+                "data_to_percentage": (data_to_percentage, digits),
+                "find_values_outside_range": (
+                    find_values_outside_range,
+                    percentages,
+                    min_vals,
+                    max_vals,
+                ),
+            }
+            for name, (function, *args) in cases.items():
+                results.append(
+                    {
+                        "function": name,
+                        "num_rows": num_rows,
+                        "num_categories": num_categories,
+                        "seconds": time_function(
+                            function, *args, repeat=repeat
+                        ),
+                        "peak_mb": measure_peak_memory(function, *args),
+                    }
+                )
+    return pd.DataFrame(results)
+
+
+def get_commit() -> str:
+    """
+    Finds the commit the benchmarks are run on.
+
+    Returns:
+        A string with the short hash of the current git commit, ending in
+        "+" if there are uncommitted changes, or "unknown" outside of git.
+    """
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        changed = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{commit}+" if changed else commit
+
+
+def save_results(results: pd.DataFrame, path: str = RESULTS_PATH):
+    """
+    Adds benchmark results to a csv file, labeled with the current commit and
+    time.
+
+    Args:
+        results: a pandas DataFrame from benchmark_data_analysis.
+        path: a string representing the path to the csv file.
+    """
+    results = results.assign(
+        commit=get_commit(),
+        time=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    )
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    results.to_csv(
+        path, mode="a", header=not os.path.exists(path), index=False
+    )
+
+
+def compare_results(path: str = RESULTS_PATH) -> pd.DataFrame:
+    """
+    Lines up the saved benchmark times of every commit, using the latest run
+    of each commit.
+
+    Args:
+        path: a string representing the path to the csv file of results.
+
+    Returns:
+        A pandas DataFrame with one row for each function and size and one
+        column of times in seconds for each commit, in the order they were
+        first run.
+    """
+    results = pd.read_csv(path)
+    commits = results["commit"].drop_duplicates()
+    return (
+        results.drop_duplicates(
+            ["function", "num_rows", "num_categories", "commit"], keep="last"
+        )
+        .pivot(
+            index=["function", "num_rows", "num_categories"],
+            columns="commit",
+            values="seconds",
+        )
+        .reindex(columns=commits)
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Time the data_analysis functions on generated data."
+    )
+    parser.add_argument(
+        "--rows", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000]
+    )
+    parser.add_argument(
+        "--categories", type=int, nargs="+", default=[10, 1_000, 100_000]
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default=RESULTS_PATH)
+    args = parser.parse_args()
+
+    print(benchmark_leading_digits())
+    RESULTS = benchmark_data_analysis(args.rows, args.categories, args.repeat)
+    print(RESULTS.to_string(index=False))
+    save_results(RESULTS, args.output)
+    print(compare_results(args.output))
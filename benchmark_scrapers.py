@@ -0,0 +1,141 @@
+"""
+Times the scrapers against a local server with saved pages in the same layout
+as the election websites.
+"""
+
+import os
+import tempfile
+import time
+import tracemalloc
+import pandas as pd
+
+from page_server import (
+    PageServer,
+    make_russia_dropdown_page,
+    make_russia_oblast_page,
+)
+from scrape_russia_election_data import (
+    crawl_election_data,
+    _find_candidates_and_location,
+    _soup_candidates_and_location,
+)
+
+RESULTS = [
+    ("Бабурин Сергей Николаевич", 24),
+    ("Грудинин Павел Николаевич", 655),
+    ("Жириновский Владимир Вольфович", 149),
+    ("Путин Владимир Владимирович", 10229),
+]
+
+
+def make_russia_election_pages(num_regions: int, num_oblasts: int) -> dict:
+    """
+    Makes the pages of a Russia election with num_regions regions that each
+    have num_oblasts oblasts.
+
+    Args:
+        num_regions: an integer representing the number of regions.
+        num_oblasts: an integer representing the number of oblasts per region.
+
+    Returns:
+        A dictionary with the path of each page mapped to its html. The results
+        page is at "/results".
+    """
+    pages = {
+        "/results": make_russia_dropdown_page(
+            [f"/region?id={region}" for region in range(num_regions)]
+        )
+    }
+    for region in range(num_regions):
+        oblast_paths = [
+            f"/oblast?region={region}&id={oblast}"
+            for oblast in range(num_oblasts)
+        ]
+        pages[f"/region?id={region}"] = make_russia_dropdown_page(oblast_paths)
+        for oblast, path in enumerate(oblast_paths):
+            pages[path] = make_russia_oblast_page(
+                f"Регион {region}", f"Область {oblast}", RESULTS
+            )
+    return pages
+
+
+def benchmark_russia_crawler(
+    num_regions: int = 20, num_oblasts: int = 20, workers: tuple = (1, 8)
+) -> pd.Series:
+    """
+    Crawls a local copy of a Russia election with different numbers of
+    workers.
+
+    Args:
+        num_regions: an integer representing the number of regions.
+        num_oblasts: an integer representing the number of oblasts per region.
+        workers: a tuple with each number of workers to time.
+
+    Returns:
+        A pandas Series with the oblast pages crawled per second for each
+        number of workers.
+    """
+    pages_per_second = {}
+    with PageServer(
+        make_russia_election_pages(num_regions, num_oblasts)
+    ) as server, tempfile.TemporaryDirectory() as directory:
+        for num_workers in workers:
+            path = os.path.join(directory, f"{num_workers}.csv")
+            start = time.perf_counter()
+            num_pages = crawl_election_data(
+                server.url + "/results", path, num_workers
+            )
+            pages_per_second[num_workers] = num_pages / (
+                time.perf_counter() - start
+            )
+    return pd.Series(pages_per_second, name="pages per second")
+
+
+def benchmark_russia_parser(num_pages: int = 200) -> pd.DataFrame:
+    """
+    Compares finding the votes on saved oblast pages with BeautifulSoup
+    against the table parser used by the scraper, and checks that both find
+    the same votes.
+
+    Args:
+        num_pages: an integer representing the number of pages to parse.
+
+    Returns:
+        A pandas DataFrame with a row for each parser and the columns "pages
+        per second" and "peak KB per page", the most memory allocated at once
+        while parsing a page.
+    """
+    pages = list(make_russia_election_pages(1, num_pages).values())[2:]
+    parsers = {
+        "BeautifulSoup": _soup_candidates_and_location,
+        "table parser": _find_candidates_and_location,
+    }
+    if any(
+        _find_candidates_and_location(page)
+        != _soup_candidates_and_location(page)
+        for page in pages[:10]
+    ):
+        raise AssertionError("The parsers do not find the same votes.")
+
+    results = {}
+    for name, parse in parsers.items():
+        start = time.perf_counter()
+        for page in pages:
+            parse(page)
+        pages_per_second = len(pages) / (time.perf_counter() - start)
+        tracemalloc.start()
+        try:
+            parse(pages[0])
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        results[name] = {
+            "pages per second": pages_per_second,
+            "peak KB per page": peak / 1024,
+        }
+    return pd.DataFrame(results).T
+
+
+if __name__ == "__main__":
+    print(benchmark_russia_parser())
+    print(benchmark_russia_crawler())
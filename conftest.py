@@ -0,0 +1,20 @@
+"""
+Shared pytest fixtures for testing the scrapers against a local server
+instead of the election websites.
+"""
+
+import pytest
+
+from page_server import PageServer
+
+
+@pytest.fixture
+def page_server():
+    """
+    Starts a local http server that serves saved pages. Add pages to
+    page_server.pages with the request path (including the query) as the key,
+    and build urls from page_server.url. Every requested path is recorded in
+    page_server.requests.
+    """
+    with PageServer() as server:
+        yield server
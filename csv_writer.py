@@ -0,0 +1,113 @@
+"""
+Contains a buffered csv writer used by the scrapers to save rows without
+opening the file for every page.
+"""
+
+import csv
+import os
+import shutil
+
+from scrape_journal import ScrapeJournal
+
+
+class CsvWriter:
+    """
+    Saves rows to a csv file through one open file handle, keeping up to
+    buffer_size rows in memory between writes.
+
+    While the writer is open the rows go to a temporary file next to the csv
+    file, which replaces the csv file when the writer is closed. If the csv
+    file already exists, it is copied to the temporary file so its rows are
+    kept and new rows are added after them, while the csv file itself stays
+    in place for readers until the writer is closed.
+    The header is only written if the file is empty.
+
+    If resumable is True, the writer keeps a ScrapeJournal of the pages whose
+    rows have been written, available as journal. A page is only marked as
+    done once its rows are on disk, so the journal and the file always agree.
+
+    Use it as a context manager to close the writer when done.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        column_names: list,
+        buffer_size: int = 1000,
+        resumable: bool = False,
+    ):
+        """
+        Opens the temporary file for the csv file, picking up the rows of an
+        interrupted writer or of the existing csv file.
+
+        Args:
+            path: a string representing the path to the csv file.
+            column_names: a list of strings with the title of each column.
+            buffer_size: an integer representing the number of rows to keep in
+            memory before writing them to the file.
+            resumable: True to keep a journal of the pages that were written in
+            a file next to the csv file with a ".journal" extension.
+        """
+        self.path = path
+        self.temp_path = f"{path}.tmp"
+        self.buffer_size = buffer_size
+        if not os.path.exists(self.temp_path) and os.path.exists(path):
+            # The copy is only renamed once complete, so an interrupted copy
+            # is never taken for the rows of an interrupted writer.
+            shutil.copyfile(path, f"{self.temp_path}.copy")
+            os.replace(f"{self.temp_path}.copy", self.temp_path)
+        self.journal = (
+            ScrapeJournal(self.temp_path, f"{path}.journal")
+            if resumable
+            else None
+        )
+        self._file = open(self.temp_path, "a", encoding="utf-8", newline="")
+        self._writer = csv.writer(self._file, lineterminator="\n")
+        self._rows = []
+        self._keys = []
+        if self._file.tell() == 0:
+            self._writer.writerow(column_names)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def write_rows(self, rows: list, key: str = None):
+        """
+        Adds the rows of a page to the buffer, writing the buffer to the file
+        once it has at least buffer_size rows.
+
+        Args:
+            rows: a list of rows, where each row is a list of values.
+            key: a string that identifies the page in the journal, or None if
+            the page should not be marked as done.
+        """
+        self._rows.extend(rows)
+        if key is not None:
+            self._keys.append(key)
+        if len(self._rows) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the buffered rows to the file and marks their pages as done.
+        """
+        self._writer.writerows(self._rows)
+        self._file.flush()
+        if self.journal is not None and self._keys:
+            self.journal.mark_done(*self._keys)
+        self._rows = []
+        self._keys = []
+
+    def close(self):
+        """
+        Writes any buffered rows and replaces the csv file with the temporary
+        file.
+        """
+        self.flush()
+        self._file.close()
+        if self.journal is not None:
+            self.journal.close()
+        os.replace(self.temp_path, self.path)
@@ -2,10 +2,22 @@
 Contains helper functions for analyzing and plotting the election data.
 """
 
+from decimal import Decimal
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 
+# The digits that can appear in each digit test.
+DIGIT_TESTS = {
+    "first": pd.RangeIndex(1, 10),
+    "second": pd.RangeIndex(0, 10),
+    "first_two": pd.RangeIndex(10, 100),
+    "last": pd.RangeIndex(0, 10),
+}
+# Marks a vote that has no digit for a digit test, such as the second digit of
+# a single digit vote.
+NO_DIGIT = 255
+
 
 def plot_subplots_bar(
     mean_label: str,
@@ -13,6 +25,7 @@ def plot_subplots_bar(
     mean: pd.Series,
     edge_value: tuple,
     bar_colors: list,
+    digit_label: str = "Leading Digit",
 ) -> None:
     """
     Plots the regions or states that are more than 1.96 standard deviations from
@@ -34,24 +47,69 @@ def plot_subplots_bar(
         and 'blue'. The first color is used for the country mean, and the
         second color is used for the regions or states that are outside of
         the given range.
+        digit_label (str, optional): a string used to title the subplot of each
+        digit in mean, such as "Second Digit" for the second digit test.
+    """
+    grid_size = int(np.ceil(np.sqrt(len(mean.index))))
+    fig, _axis = plt.subplots(grid_size, grid_size, figsize=(20, 20))
+    draw_subplots_bar(
+        fig.axes,
+        mean_label,
+        values_outside_std_dev,
+        mean,
+        edge_value,
+        bar_colors,
+        digit_label,
+    )
+    plt.subplots_adjust(
+        left=0.1, bottom=0.1, right=0.9, top=0.9, wspace=0.4, hspace=0.4
+    )
+
+
+def draw_subplots_bar(
+    axes: list,
+    mean_label: str,
+    values_outside_std_dev: list,
+    mean: pd.Series,
+    edge_value: tuple,
+    bar_colors: list,
+    digit_label: str = "Leading Digit",
+) -> None:
+    """
+    Draws the subplots of plot_subplots_bar on existing axes, with one bar
+    call for the mean and the values outside the range of each digit and
+    horizontal lines for the edges of the range.
+
+    Args:
+        axes (list): a list of matplotlib Axes with at least one Axes for each
+        digit in mean. Any extra Axes are hidden.
+        mean_label, values_outside_std_dev, mean, edge_value, bar_colors,
+        digit_label: the same as for plot_subplots_bar.
     """
     min_val, max_val = edge_value
-    x_values = np.linspace(-1, 10, 100)
-    fig, _axis = plt.subplots(3, 3, figsize=(20, 20))
-    for i, plot in enumerate(fig.axes):
-        plot.set_xlim([-0.5, 5])
-        plot.set_title(f"Leading Digit: {i + 1}")
-        plot.bar(mean_label, mean[i + 1], color=bar_colors[0])
-        plot.plot(x_values, [max_val[i + 1]] * len(x_values))
-        plot.plot(x_values, [min_val[i + 1]] * len(x_values))
-        for area, digit, value in values_outside_std_dev:
-            if digit == (i + 1):
-                plot.bar(area, value, color=bar_colors[1])
+    outside_by_digit = {digit: ([], []) for digit in mean.index}
+    for area, outside_digit, value in values_outside_std_dev:
+        if outside_digit in outside_by_digit:
+            outside_by_digit[outside_digit][0].append(area)
+            outside_by_digit[outside_digit][1].append(value)
+
+    for plot, digit in zip(axes, mean.index):
+        areas, values = outside_by_digit[digit]
+        plot.set_title(f"{digit_label}: {digit}")
+        plot.bar(
+            [mean_label, *areas],
+            [mean[digit], *values],
+            color=[bar_colors[0]] + [bar_colors[1]] * len(areas),
+        )
+        plot.axhline(max_val[digit], color="C0")
+        plot.axhline(min_val[digit], color="C1")
         plot.margins(0, 0)
+        plot.set_xlim([-0.5, 5])
         plt.setp(plot.get_xticklabels(), rotation=30, ha="right")
-        plt.subplots_adjust(
-            left=0.1, bottom=0.1, right=0.9, top=0.9, wspace=0.4, hspace=0.4
-        )
+        plot.axis("on")
+    # The grid is square, so it can have more Axes than digits.
+    for plot in axes[len(mean.index) :]:
+        plot.axis("off")
 
 
 def plot_labels(x_label: str = None, y_label: str = None, title: str = None):
@@ -95,6 +153,7 @@ def find_all_leading_digits(
     data: pd.DataFrame,
     column_name: str = None,
     threshold: int = 0,
+    positions: pd.DataFrame = None,
 ) -> pd.DataFrame:
     """
         Takes data from a given csv file and finds all of the specified leading
@@ -114,34 +173,147 @@ def find_all_leading_digits(
             threshold: integer representing the minimum number of discrete numbers
             in the votes column for a category to be included in the return
             dataframe
+            positions: (DataFrame) the digits of the votes from
+            get_digit_positions or load_digit_index, or None to find them
 
         Returns:
     A pandas dataframe of integers containing all leading digits in the given column of
             the csv file.
     """
-    if column_name:
-        dfs = get_vote_by_category(data, column_name, threshold)
-    else:
+    leading_digits = _find_leading_digits(data, positions)
+    if not column_name:
         return pd.DataFrame(
-            [
-                int(str(vote)[0])
-                for vote in data["votes"]
-                if str(vote)[0] in ("123456789")
-            ]
+            leading_digits[leading_digits > 0].astype(np.int64)
         )
+
+    codes, categories = _factorize_categories(data[column_name])
+    order = np.argsort(codes, kind="stable")
+    sizes = np.bincount(codes[codes >= 0], minlength=len(categories))
+    ends = np.cumsum(sizes) + np.count_nonzero(codes < 0)
     by_category = {}
-    for category, value in dfs.items():
-        by_category[category] = pd.Series(
-            [
-                int(str(vote)[0])
-                for vote in value
-                if str(vote)[0] in ("123456789")
-            ]
-        )
+    for category, size, end in zip(categories, sizes, ends):
+        if size >= threshold:
+            digits = leading_digits[order[end - size : end]]
+            by_category[category] = pd.Series(
+                digits[digits > 0].astype(np.int64)
+            )
 
     return pd.DataFrame(by_category)
 
 
+def get_leading_digits(votes) -> np.ndarray:
+    """
+    Finds the leading digit of every vote count at once using arithmetic on the
+    whole array instead of converting each vote to a string.
+
+    Votes that do not start with a digit in [1, 9] when written out (zeros,
+    negative numbers, NaN and infinity) get a leading digit of 0. Floats are
+    treated the same way str() writes them, so 0.5 has no leading digit while
+    5e-05 has a leading digit of 5.
+
+    Args:
+        votes: an array-like (such as the "votes" column of a DataFrame)
+        containing integers or floats.
+
+    Returns:
+        A numpy array of uint8 with the same length as votes containing the
+        leading digit of each vote, or 0 if the vote has no leading digit.
+    """
+    values = np.asarray(votes)
+    if values.dtype.kind not in "iuf":
+        return _string_leading_digits(values)
+
+    digits = np.zeros(values.shape, dtype=np.uint8)
+    if values.dtype.kind == "f":
+        positive = np.isfinite(values) & (values >= 1)
+        digits[positive] = _float_leading_digits(values[positive])
+        # str() switches to scientific notation below 1e-4, which gives these
+        # values a leading digit. They are rare enough to format one by one.
+        tiny = (values > 0) & (values < 1e-4)
+        digits[tiny] = _string_leading_digits(values[tiny])
+    else:
+        positive = values > 0
+        digits[positive] = _integer_leading_digits(
+            values[positive].astype(np.uint64)
+        )
+    return digits
+
+
+_POWERS_OF_TEN = 10 ** np.arange(20, dtype=np.uint64)
+_NEXT_POWERS_OF_TEN = np.append(
+    _POWERS_OF_TEN[1:], np.iinfo(np.uint64).max
+).astype(np.uint64)
+
+
+# Every power of ten up to 1e22 is exactly a float.
+_FLOAT_POWERS_OF_TEN = 10.0 ** np.arange(23)
+
+
+def _integer_leading_digits(values: np.ndarray) -> np.ndarray:
+    """
+    Finds the leading digit of an array of positive integers.
+    """
+    exponents = _integer_exponents(values)
+    return (values // _POWERS_OF_TEN[exponents]).astype(np.uint8)
+
+
+def _integer_exponents(values: np.ndarray) -> np.ndarray:
+    """
+    Finds the power of ten of the leading digit of an array of positive
+    integers, which is one less than the number of digits.
+
+    The number of digits is estimated with log10 and then corrected against an
+    exact table of powers of ten, since log10 can be off by one for integers
+    too large to be represented exactly as floats.
+    """
+    exponents = np.log10(values.astype(np.float64)).astype(np.int64)
+    np.clip(exponents, 0, 19, out=exponents)
+    exponents -= values < _POWERS_OF_TEN[exponents]
+    exponents += values >= _NEXT_POWERS_OF_TEN[exponents]
+    np.minimum(exponents, 19, out=exponents)
+    return exponents
+
+
+def _float_leading_digits(values: np.ndarray) -> np.ndarray:
+    """
+    Finds the leading digit of an array of finite floats that are at least 1.
+
+    Below 1e22 every digit times a power of ten is exactly a float, so the
+    leading digit is found by exact comparisons and matches str(). Larger
+    values, which str() may round up to the next digit, use the string path.
+    """
+    digits = np.empty(values.shape, dtype=np.uint8)
+    exact = values < _FLOAT_POWERS_OF_TEN[-1]
+    exact_values = values[exact]
+    exponents = np.floor(np.log10(exact_values)).astype(np.int64)
+    np.clip(exponents, 0, len(_FLOAT_POWERS_OF_TEN) - 2, out=exponents)
+    exponents -= exact_values < _FLOAT_POWERS_OF_TEN[exponents]
+    exponents += exact_values >= _FLOAT_POWERS_OF_TEN[exponents + 1]
+    powers = _FLOAT_POWERS_OF_TEN[exponents]
+    # The division can round up to the next digit, so correct it against the
+    # exact multiples of the power.
+    leading = np.floor(exact_values / powers)
+    leading -= exact_values < leading * powers
+    leading += exact_values >= (leading + 1) * powers
+    digits[exact] = np.clip(leading, 1, 9)
+    digits[~exact] = _string_leading_digits(values[~exact])
+    return digits
+
+
+def _string_leading_digits(values: np.ndarray) -> np.ndarray:
+    """
+    Finds the leading digit of each value by converting it to a string, which
+    is used for values that cannot be handled arithmetically.
+    """
+    return np.array(
+        [
+            int(str(value)[0]) if str(value)[0] in "123456789" else 0
+            for value in values
+        ],
+        dtype=np.uint8,
+    )
+
+
 def get_vote_by_category(
     data: pd.DataFrame, column_name: str, threshold: int = 0
 ) -> dict:
@@ -168,12 +340,451 @@ def get_vote_by_category(
     """
     return {
         key: val["votes"]
-        for key, val in dict(tuple(data.groupby(by=column_name))).items()
+        for key, val in dict(
+            tuple(data.groupby(by=column_name, observed=True))
+        ).items()
         if val["votes"].size >= threshold
     }
 
 
-def data_to_percentage(data_list: pd.DataFrame) -> pd.DataFrame:
+def count_leading_digits(
+    data: pd.DataFrame,
+    column_name: str = None,
+    threshold: int = 0,
+    positions: pd.DataFrame = None,
+) -> pd.DataFrame:
+    """
+    Counts the number of times each leading digit 1-9 appears in the "votes"
+    column for each category in a single pass over the data, without building
+    a Series of votes or digits for every category.
+
+    Args:
+        data: (DataFrame) A dataframe with the data. Must have one column with
+        the name "votes" and if counting digits for categories in a certain
+        column, must also have column_name.
+        column_name: (str) the name of the column whose unique values are the
+        categories, or None to count the digits of the entire dataframe.
+        threshold: integer representing the minimum number of discrete numbers
+        in the votes column for a category to be included in the return
+        dataframe
+        positions: (DataFrame) the digits of the votes from get_digit_positions
+        or load_digit_index, or None to find them. Passing them turns the
+        count into a single bincount over the categories.
+
+    Returns:
+        A pandas DataFrame with the digits 1-9 as the index and one column of
+        counts for each category. If column_name is None, the only column is 0.
+        Pass it to data_to_percentage with from_counts=True to get the same
+        percentages as from find_all_leading_digits.
+    """
+    leading_digits = _find_leading_digits(data, positions)
+    if column_name:
+        codes, categories = _factorize_categories(data[column_name])
+    else:
+        codes = np.zeros(leading_digits.size, dtype=np.intp)
+        categories = pd.Index([0])
+    counts, sizes = _count_digits(codes, leading_digits, len(categories))
+    keep = sizes >= threshold
+    return pd.DataFrame(
+        counts[keep].T,
+        index=pd.RangeIndex(1, 10),
+        columns=categories[keep],
+    )
+
+
+def count_leading_digits_from_csv(
+    path: str,
+    column_name: str = None,
+    threshold: int = 0,
+    chunksize: int = 100_000,
+) -> pd.DataFrame:
+    """
+    Counts the leading digits for each category like count_leading_digits, but
+    reads the csv file in chunks so that files larger than memory can be used.
+    Only the "votes" column and column_name are read, and the counts of each
+    chunk are added to a running total, so memory use depends on chunksize and
+    the number of categories rather than the size of the file.
+
+    column_name is read as a categorical, so each chunk keeps one copy of each
+    category, and categories that are all numbers are turned back into
+    numbers at the end so they sort like count_leading_digits. The votes are
+    read as float64 rather than a smaller dtype, since float32 changes the
+    leading digit of some votes above 2**24 and integers cannot hold missing
+    votes.
+
+    Args:
+        path: a string representing the path to a csv file with a "votes"
+        column and, if counting digits for categories, column_name.
+        column_name: (str) the name of the column whose unique values are the
+        categories, or None to count the digits of the entire file.
+        threshold: integer representing the minimum number of discrete numbers
+        in the votes column for a category to be included in the return
+        dataframe
+        chunksize: integer representing the number of rows to read at a time.
+
+    Returns:
+        A pandas DataFrame with the digits 1-9 as the index and one column of
+        counts for each category, the same as count_leading_digits.
+    """
+    columns = ["votes"]
+    dtypes = {"votes": "float64"}
+    if column_name:
+        columns.append(column_name)
+        dtypes[column_name] = "category"
+
+    totals = pd.DataFrame(columns=[*range(1, 10), "size"], dtype="int64")
+    for chunk in pd.read_csv(
+        path, usecols=columns, dtype=dtypes, chunksize=chunksize
+    ):
+        leading_digits = get_leading_digits(chunk["votes"])
+        if column_name:
+            codes, categories = pd.factorize(chunk[column_name])
+        else:
+            codes = np.zeros(leading_digits.size, dtype=np.intp)
+            categories = pd.Index([0])
+        counts, sizes = _count_digits(codes, leading_digits, len(categories))
+        chunk_totals = pd.DataFrame(
+            np.column_stack([counts, sizes]),
+            index=np.asarray(categories),
+            columns=totals.columns,
+        )
+        totals = totals.add(chunk_totals, fill_value=0)
+
+    if column_name:
+        # The categories are read as strings, which would sort 10 before 2.
+        try:
+            totals.index = pd.to_numeric(totals.index)
+        except (ValueError, TypeError):
+            pass
+    totals = totals[totals["size"] >= threshold].sort_index()
+    return pd.DataFrame(
+        totals.drop(columns="size").to_numpy(dtype=np.int64).T,
+        index=pd.RangeIndex(1, 10),
+        columns=totals.index,
+    )
+
+
+def _find_leading_digits(
+    data: pd.DataFrame, positions: pd.DataFrame = None
+) -> np.ndarray:
+    """
+    Finds the leading digit of every vote, or takes it from digits that were
+    already found.
+
+    Args:
+        data: a pandas DataFrame with a "votes" column.
+        positions: a pandas DataFrame with the digits of the votes from
+        get_digit_positions, or None to find the leading digits.
+
+    Returns:
+        A numpy array of uint8 with the leading digit of each vote, or 0 if a
+        vote has no leading digit, the same as get_leading_digits.
+    """
+    if positions is None:
+        return get_leading_digits(data["votes"])
+    if len(positions.index) != len(data.index):
+        raise ValueError("positions must have one row for each vote.")
+    first_digits = positions["first"].to_numpy()
+    return np.where(first_digits == NO_DIGIT, 0, first_digits).astype(np.uint8)
+
+
+def _factorize_categories(column: pd.Series) -> (np.ndarray, pd.Index):
+    """
+    Numbers the categories of a column in sorted order.
+
+    Args:
+        column: a pandas Series with the category of each row. It can be a
+        categorical column, such as from load_election_data.
+
+    Returns:
+        A numpy array with the code of each row's category, or -1 for missing
+        categories, and a pandas Index with the category of each code. The
+        Index is a plain Index even for a categorical column, so the results
+        are the same as for a column of strings.
+    """
+    codes, categories = pd.factorize(column, sort=True)
+    return codes, pd.Index(np.asarray(categories))
+
+
+def _count_digits(
+    codes: np.ndarray,
+    digits: np.ndarray,
+    num_categories: int,
+    digit_values: pd.RangeIndex = DIGIT_TESTS["first"],
+) -> (np.ndarray, np.ndarray):
+    """
+    Counts the digits of each category with a single bincount over the
+    combined category and digit indexes.
+
+    Args:
+        codes: a numpy array of integers with the category of each vote, where
+        -1 means the vote has no category.
+        digits: a numpy array with the digit of each vote. Digits outside of
+        digit_values, such as 0 for leading digits or NO_DIGIT, are not
+        counted.
+        num_categories: the number of categories.
+        digit_values: a pandas RangeIndex with the digits to count.
+
+    Returns:
+        A numpy array with one row of counts of each digit in digit_values for
+        each category, and a numpy array with the number of votes in each
+        category.
+    """
+    width = len(digit_values)
+    has_category = codes >= 0
+    valid = (
+        has_category
+        & (digits >= digit_values.start)
+        & (digits < digit_values.stop)
+    )
+    counts = np.bincount(
+        codes[valid] * width
+        + digits[valid].astype(np.intp)
+        - digit_values.start,
+        minlength=num_categories * width,
+    ).reshape(num_categories, width)
+    sizes = np.bincount(codes[has_category], minlength=num_categories)
+    return counts, sizes
+
+
+def get_digit_positions(votes) -> pd.DataFrame:
+    """
+    Finds the digits used by every digit test in DIGIT_TESTS in one pass over
+    the votes: the first digit, the second digit, the first two digits and the
+    last digit.
+
+    The first digit is found the same way as get_leading_digits. The other
+    digits are only found for votes of at least 10, using the integer part of
+    the vote, since single digit votes have no second digit and would bias the
+    last digit test. Digits that cannot be found are set to NO_DIGIT.
+
+    Args:
+        votes: an array-like (such as the "votes" column of a DataFrame)
+        containing integers or floats.
+
+    Returns:
+        A pandas DataFrame of uint8 with one row for each vote and one column
+        for each digit test in DIGIT_TESTS.
+    """
+    values = np.asarray(votes)
+    if values.dtype.kind not in "iuf":
+        values = pd.to_numeric(values, errors="coerce")
+
+    positions = {
+        test: np.full(values.size, NO_DIGIT, dtype=np.uint8)
+        for test in DIGIT_TESTS
+    }
+    leading_digits = get_leading_digits(values)
+    positions["first"][leading_digits > 0] = leading_digits[leading_digits > 0]
+
+    if values.dtype.kind == "f":
+        # Floats of 2**64 or more do not fit in a uint64, so their digits are
+        # found from the number that str() writes instead.
+        fits = values < 2.0**64
+        two_or_more_digits = np.isfinite(values) & (values >= 10) & fits
+        too_large = np.isfinite(values) & ~fits
+        first_two, last = _string_digit_positions(values[too_large])
+        positions["first_two"][too_large] = first_two
+        positions["second"][too_large] = first_two % 10
+        positions["last"][too_large] = last
+        whole_votes = np.floor(values[two_or_more_digits]).astype(np.uint64)
+    else:
+        # Integers stay integers, since floats cannot hold every integer
+        # above 2**53 exactly.
+        two_or_more_digits = values >= 10
+        whole_votes = values[two_or_more_digits].astype(np.uint64)
+    first_two = (
+        whole_votes // _POWERS_OF_TEN[_integer_exponents(whole_votes) - 1]
+    )
+    positions["first_two"][two_or_more_digits] = first_two
+    positions["second"][two_or_more_digits] = first_two % 10
+    positions["last"][two_or_more_digits] = whole_votes % 10
+    return pd.DataFrame(positions)
+
+
+def _string_digit_positions(values: np.ndarray) -> (np.ndarray, np.ndarray):
+    """
+    Finds the first two digits and the last digit of the integer part of each
+    float the way str() writes it, for floats too large to be integers.
+
+    Args:
+        values: a numpy array of finite floats of at least 10.
+
+    Returns:
+        A numpy array of uint8 with the first two digits of each float and a
+        numpy array of uint8 with the last digit of each float.
+    """
+    integers = [str(int(Decimal(repr(float(value))))) for value in values]
+    return (
+        np.array([int(digits[:2]) for digits in integers], dtype=np.uint8),
+        np.array([int(digits[-1]) for digits in integers], dtype=np.uint8),
+    )
+
+
+def count_digit_positions(
+    data: pd.DataFrame,
+    column_name: str = None,
+    threshold: int = 0,
+    positions: pd.DataFrame = None,
+) -> dict:
+    """
+    Counts the digits of every digit test in DIGIT_TESTS for each category,
+    finding the digits of the votes only once for all of the tests.
+
+    Args:
+        data: (DataFrame) A dataframe with the data. Must have one column with
+        the name "votes" and if counting digits for categories in a certain
+        column, must also have column_name.
+        column_name: (str) the name of the column whose unique values are the
+        categories, or None to count the digits of the entire dataframe.
+        threshold: integer representing the minimum number of discrete numbers
+        in the votes column for a category to be included in the return
+        dataframes
+        positions: (DataFrame) the digits of the votes from get_digit_positions
+        or load_digit_index, or None to find them
+
+    Returns:
+        A dictionary with the names of the digit tests as keys, each mapped to
+        a pandas DataFrame with the digits of that test as the index and one
+        column of counts for each category, like count_leading_digits.
+    """
+    if positions is None:
+        positions = get_digit_positions(data["votes"])
+    if column_name:
+        codes, categories = _factorize_categories(data[column_name])
+    else:
+        codes = np.zeros(len(positions.index), dtype=np.intp)
+        categories = pd.Index([0])
+
+    counts_by_test = {}
+    for test, digit_values in DIGIT_TESTS.items():
+        counts, sizes = _count_digits(
+            codes,
+            positions[test].to_numpy(),
+            len(categories),
+            digit_values,
+        )
+        keep = sizes >= threshold
+        counts_by_test[test] = pd.DataFrame(
+            counts[keep].T, index=digit_values, columns=categories[keep]
+        )
+    return counts_by_test
+
+
+def count_digit_cube(
+    data: pd.DataFrame,
+    column_names,
+    test: str = "first",
+    positions: pd.DataFrame = None,
+) -> pd.DataFrame:
+    """
+    Counts the digits of a digit test for every combination of categories in
+    several columns at once, such as each candidate in each state, in a single
+    pass over the data. Only combinations that appear in the data are kept.
+
+    The cube can be sliced with pandas, such as
+    cube.xs("Joseph R. Biden Jr.", level="candidate", drop_level=False), and
+    rolled up to any of its columns with roll_up_digit_cube without going back
+    to the votes.
+
+    Args:
+        data: (DataFrame) A dataframe with the data. Must have one column with
+        the name "votes" and every column in column_names.
+        column_names: a string or list of strings with the names of the
+        columns whose unique values are the categories.
+        test: (str) the name of the digit test in DIGIT_TESTS to count the
+        digits of.
+        positions: (DataFrame) the digits of the votes from get_digit_positions
+        or load_digit_index, or None to find them
+
+    Returns:
+        A pandas DataFrame with one row for each combination of categories,
+        indexed by a MultiIndex with a level for each column in column_names,
+        and one column of counts for each digit of the test plus a "size"
+        column with the number of votes of the combination.
+    """
+    if test not in DIGIT_TESTS:
+        raise ValueError(f"Unknown digit test: {test}.")
+    if isinstance(column_names, str):
+        column_names = [column_names]
+    if test == "first":
+        digits = _find_leading_digits(data, positions)
+    elif positions is None:
+        digits = get_digit_positions(data["votes"])[test].to_numpy()
+    else:
+        digits = positions[test].to_numpy()
+
+    # Combine the codes of every column into a single code for each
+    # combination, then number the combinations that appear.
+    combined = np.zeros(len(data.index), dtype=np.int64)
+    has_category = np.ones(len(data.index), dtype=bool)
+    levels = []
+    for column_name in column_names:
+        codes, categories = _factorize_categories(data[column_name])
+        combined = combined * len(categories) + codes
+        has_category &= codes >= 0
+        levels.append(categories)
+    cells, cell_codes = np.unique(combined[has_category], return_inverse=True)
+    codes = np.full(len(data.index), -1, dtype=np.intp)
+    codes[has_category] = cell_codes
+
+    level_codes = []
+    for categories in reversed(levels):
+        level_codes.insert(0, cells % len(categories))
+        cells = cells // len(categories)
+    counts, sizes = _count_digits(
+        codes, digits, len(level_codes[0]), DIGIT_TESTS[test]
+    )
+    return pd.DataFrame(
+        np.column_stack([counts, sizes]),
+        index=pd.MultiIndex(
+            levels=levels, codes=level_codes, names=column_names
+        ),
+        columns=[*DIGIT_TESTS[test], "size"],
+    )
+
+
+def roll_up_digit_cube(
+    cube: pd.DataFrame, column_names=None, threshold: int = 0
+) -> pd.DataFrame:
+    """
+    Adds up the digit counts of a cube from count_digit_cube over every column
+    that is not in column_names, such as the counts of each state from a cube
+    of each candidate in each state.
+
+    Args:
+        cube: a pandas DataFrame from count_digit_cube, or a slice of one.
+        column_names: a string or list of strings with the names of the
+        columns in the cube to keep, or None to add up the entire cube.
+        threshold: integer representing the minimum number of votes for a
+        category to be included in the return dataframe
+
+    Returns:
+        A pandas DataFrame with the digits of the test as the index and one
+        column of counts for each category, the same as count_leading_digits
+        or count_digit_positions. For a list of column names, the columns are
+        a MultiIndex with a level for each column.
+    """
+    if column_names is None:
+        totals = cube.sum().to_frame(0).T
+    else:
+        totals = cube.groupby(level=column_names).sum()
+    totals = totals[totals["size"] >= threshold]
+    digits = totals.columns.drop("size")
+    return pd.DataFrame(
+        totals[digits].to_numpy(dtype=np.int64).T,
+        index=pd.RangeIndex(digits[0], digits[-1] + 1),
+        columns=(
+            totals.index.rename(None)
+            if isinstance(column_names, str)
+            else totals.index
+        ),
+    )
+
+
+def data_to_percentage(
+    data_list: pd.DataFrame, from_counts: bool = False
+) -> pd.DataFrame:
     """
     Takes a dataframe with one or more columns filled with digits and returns a
     dataframe with the percentages corresponding to the number of times the
@@ -183,8 +794,8 @@ def data_to_percentage(data_list: pd.DataFrame) -> pd.DataFrame:
         data_list: a dataframe of integers representing all of the leading
         digits from a dataset (in this case, the number of vote counts).
         Each columns is a category and is a Series with digits.
-        threshold: (int) minimum number of integers in column for percentage
-        to be found in it and for it to be returned.
+        from_counts: (bool) True if data_list is a dataframe of digit counts
+        from count_leading_digits instead of digits.
 
     Returns:
         returns a dataframe of Series with the percentages of each column that
@@ -193,6 +804,11 @@ def data_to_percentage(data_list: pd.DataFrame) -> pd.DataFrame:
         is dropped.
     """
 
+    if from_counts:
+        counts = data_list[data_list.any(axis=1)]
+        counts = counts.loc[:, (counts > 0).all(axis=0)]
+        return counts.multiply(100 / counts.sum()).astype("float64")
+
     def per_column_percentage(column: pd.Series) -> pd.Series:
         number_of_occurrences = column.value_counts()
         number_of_occurrences = number_of_occurrences[
@@ -226,9 +842,39 @@ def get_theoretical_benford_law_values(num_values: int = 9) -> pd.Series:
     return pd.Series(theoretical_y_values, index=theoretical_x_values)
 
 
+def get_theoretical_digit_distribution(test: str = "first") -> pd.Series:
+    """
+    Finds the percentage of votes expected to have each digit for a digit test.
+    The first, second and first two digit tests follow Benford's law, and the
+    last digit of a vote is expected to be uniformly distributed.
+
+    Args:
+        test (str, optional): the name of a digit test in DIGIT_TESTS. Will
+        default to the first digit test.
+
+    Returns:
+        A pandas Series with the digits of the test as the index and the
+        expected percentage of each digit as the values.
+    """
+    if test not in DIGIT_TESTS:
+        raise ValueError(f"Unknown digit test: {test}.")
+    digits = DIGIT_TESTS[test]
+    if test == "second":
+        first_two = np.arange(10, 100).reshape(9, 10)
+        probabilities = np.log10(1 + 1 / first_two).sum(axis=0)
+    elif test == "last":
+        probabilities = np.full(len(digits), 1 / len(digits))
+    else:
+        probabilities = np.log10(1 + 1 / digits.to_numpy())
+    return pd.Series(probabilities * 100, index=digits)
+
+
 def find_values_outside_range(
-    data: pd.DataFrame, min_range: pd.Series, max_range: pd.Series
-) -> list:
+    data: pd.DataFrame,
+    min_range: pd.Series,
+    max_range: pd.Series,
+    as_frame: bool = False,
+):
     """
     Finds values in each column of data that fall below or above their respective
     value in min_range and max_range respectively.
@@ -238,27 +884,37 @@ def find_values_outside_range(
         min_range (pd.Series): a pandas Series with the same length as data
         height.
         max_range (pd.Series): a pandas Series with same length as data height
+        as_frame (bool, optional): True to return the values outside range as
+        a pandas DataFrame instead of a list.
 
     Returns:
         A list of tuples with the format (column name, row number, value outside range) for
-        each value outside range.
+        each value outside range. If as_frame is True, a pandas DataFrame with
+        the columns "category", "digit" and "value" and one row for each value
+        outside range is returned instead.
     """
     if min_range.size != len(data.index) or max_range.size != len(data.index):
         raise ValueError(
             "Length of data is not equal to length of min_range or max_range."
         )
-    data_boolean = data.apply(
-        lambda x: list(zip(x.lt(max_range), x.gt(min_range)))
+    values = data.to_numpy()
+    inside_range = (values < max_range.to_numpy()[:, np.newaxis]) & (
+        values > min_range.to_numpy()[:, np.newaxis]
     )
-    return_list = []
-    for column in data_boolean:
-        for index, element in data_boolean[column].iteritems():
-            # The second comparison ensures no np.NaN values get added to a
-            # tuple.
-            if False in element and data[column][index] == data[column][index]:
-                return_list.append((column, index, data[column][index]))
+    # Transposing lists the values column by column, and the NaN check ensures
+    # no np.NaN values get added to a tuple.
+    columns, rows = np.nonzero((~inside_range & pd.notna(values)).T)
+    outside_values = values[rows, columns]
 
-    return return_list
+    if as_frame:
+        return pd.DataFrame(
+            {
+                "category": data.columns[columns],
+                "digit": data.index[rows],
+                "value": outside_values,
+            }
+        )
+    return list(zip(data.columns[columns], data.index[rows], outside_values))
 
 
 def find_std_dev_range(
@@ -270,7 +926,8 @@ def find_std_dev_range(
 
     Args:
         data (pd.DataFrame): a pandas DataFrame containing the column with the
-        votes data. There must be exactly 9 rows in the DataFrame.
+        votes data. There must be one row for each digit, such as the 9 rows
+        for the digits 1-9 of the first digit test.
 
     Returns:
         Four pandas Series containing the mean, standard deviation, maximum
@@ -281,10 +938,10 @@ def find_std_dev_range(
     std_devs = data.std(axis=1, ddof=0)
     max_vals = pd.Series(
         [mean + 1.96 * std_dev for mean, std_dev in zip(means, std_devs)],
-        index=(1, 2, 3, 4, 5, 6, 7, 8, 9),
+        index=data.index,
     )
     min_vals = pd.Series(
         [mean - 1.96 * std_dev for mean, std_dev in zip(means, std_devs)],
-        index=(1, 2, 3, 4, 5, 6, 7, 8, 9),
+        index=data.index,
     )
     return means, std_devs, max_vals, min_vals
@@ -0,0 +1,373 @@
+"""
+Caches the election data csv files as numpy arrays, so the data is only parsed
+from the csv file once and later loads read the arrays straight from disk. The
+cache also keeps the digits of every vote, so the digits are only found once.
+"""
+
+import csv
+import hashlib
+import io
+import json
+import os
+import numpy as np
+import pandas as pd
+
+from data_analysis import DIGIT_TESTS, get_digit_positions
+from quick_fix_too_many_commas import normalize_rows
+
+# Changes whenever the layout of the cache changes, so old caches are rebuilt.
+CACHE_VERSION = 2
+
+
+def load_election_data(
+    csv_path: str, cache_dir: str = None, refresh: bool = False
+) -> pd.DataFrame:
+    """
+    Loads an election data csv file, such as the US or Russia data, from its
+    cache, building the cache first if the csv file has changed since the
+    cache was built.
+
+    In the cache, every column of text (such as "candidate", "state" or
+    "region") is a categorical column, and integer columns that fit are int32.
+    The cache is kept in a directory with a ".npy" file for each array and a
+    "meta.json" file recording the size, modification time and SHA-256 hash of
+    the csv file. The csv file is only hashed if its size or modification time
+    changed, so a cache is still used after the csv file is copied or touched.
+
+    Args:
+        csv_path: a string representing the path to the csv file.
+        cache_dir: a string representing the directory to keep the cache in,
+        or None to keep it next to the csv file with a ".cache" extension.
+        refresh: True to rebuild the cache even if the csv file has not
+        changed.
+
+    Returns:
+        A pandas DataFrame with the same columns and values as reading the csv
+        file with pd.read_csv.
+    """
+    cache_dir, meta = _open_cache(csv_path, cache_dir, refresh)
+    return _read_cache(cache_dir, meta)
+
+
+def load_digit_index(
+    csv_path: str, cache_dir: str = None, refresh: bool = False
+) -> pd.DataFrame:
+    """
+    Loads the digits of every vote in an election data csv file from its
+    cache, building the cache first like load_election_data. The digits are
+    found with get_digit_positions when the cache is built, and are
+    memory-mapped from the cache afterwards.
+
+    Pass the digits as positions to count_leading_digits,
+    count_digit_positions or find_all_leading_digits to group the votes by
+    any column without finding their digits again.
+
+    Args:
+        csv_path: a string representing the path to the csv file.
+        cache_dir: a string representing the directory to keep the cache in,
+        or None to keep it next to the csv file with a ".cache" extension.
+        refresh: True to rebuild the cache even if the csv file has not
+        changed.
+
+    Returns:
+        A pandas DataFrame of uint8 with one row for each row of the csv file
+        and one column for each digit test in DIGIT_TESTS, the same as
+        get_digit_positions.
+    """
+    cache_dir, meta = _open_cache(csv_path, cache_dir, refresh)
+    if not meta["has_digits"]:
+        raise ValueError(f"{csv_path} has no votes column.")
+    return _frame_from_arrays(
+        {
+            test: np.load(
+                os.path.join(cache_dir, f"digits.{test}.npy"), mmap_mode="c"
+            )
+            for test in DIGIT_TESTS
+        }
+    )
+
+
+def _open_cache(csv_path: str, cache_dir: str, refresh: bool) -> (str, dict):
+    """
+    Finds the cache of a csv file, building it if it is missing or was built
+    from different contents of the csv file.
+
+    Args:
+        csv_path: a string representing the path to the csv file.
+        cache_dir: a string representing the directory to keep the cache in,
+        or None to keep it next to the csv file with a ".cache" extension.
+        refresh: True to rebuild the cache even if the csv file has not
+        changed.
+
+    Returns:
+        A string representing the directory the cache is kept in and a
+        dictionary with the metadata of the cache.
+    """
+    cache_dir = cache_dir or f"{csv_path}.cache"
+    meta = None if refresh else _read_meta(cache_dir)
+    source = _describe_source(csv_path)
+    if meta is not None and not _is_same_source(meta, source, csv_path):
+        meta = None
+    if meta is None:
+        source["sha256"] = _hash_file(csv_path)
+        meta = _write_cache(_read_csv(csv_path), cache_dir, source)
+    elif meta["source"] != source:
+        # The csv file was touched but not changed.
+        meta["source"].update(source)
+        _write_meta(cache_dir, meta)
+    return cache_dir, meta
+
+
+def _read_csv(csv_path: str) -> pd.DataFrame:
+    """
+    Reads a csv file with pd.read_csv, fixing any rows that were split into
+    too many columns by commas in their last value, such as in the Russia
+    data, with normalize_rows. The file is only read a second time if pandas
+    finds rows with too many columns.
+
+    Args:
+        csv_path: a string representing the path to the csv file.
+
+    Returns:
+        A pandas DataFrame with the values of the csv file.
+    """
+    try:
+        return pd.read_csv(csv_path)
+    except pd.errors.ParserError:
+        pass
+    fixed = io.StringIO()
+    with open(csv_path, "r", encoding="utf-8", newline="") as file:
+        rows = csv.reader(file)
+        header = next(rows)
+        writer = csv.writer(fixed, lineterminator="\n")
+        writer.writerow(header)
+        writer.writerows(row for row, _ in normalize_rows(rows, len(header)))
+    fixed.seek(0)
+    return pd.read_csv(fixed)
+
+
+def _describe_source(csv_path: str) -> dict:
+    """
+    Finds the size and modification time of a csv file.
+
+    Args:
+        csv_path: a string representing the path to the csv file.
+
+    Returns:
+        A dictionary with the "size" and "mtime_ns" of the csv file.
+    """
+    stat = os.stat(csv_path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _is_same_source(meta: dict, source: dict, csv_path: str) -> bool:
+    """
+    Checks if a cache was built from the current contents of a csv file,
+    hashing the csv file only if its size or modification time changed.
+
+    Args:
+        meta: a dictionary with the metadata of the cache.
+        source: a dictionary with the size and modification time of the csv
+        file from _describe_source.
+        csv_path: a string representing the path to the csv file.
+
+    Returns:
+        True if the cache matches the csv file, and False otherwise.
+    """
+    if meta.get("version") != CACHE_VERSION:
+        return False
+    cached_source = meta["source"]
+    if all(cached_source.get(key) == value for key, value in source.items()):
+        return True
+    if cached_source.get("size") != source["size"]:
+        return False
+    if cached_source.get("sha256") == _hash_file(csv_path):
+        source["sha256"] = cached_source["sha256"]
+        return True
+    return False
+
+
+def _hash_file(path: str, chunk_size: int = 1 << 20) -> str:
+    """
+    Finds the SHA-256 hash of a file, reading it in chunks.
+
+    Args:
+        path: a string representing the path to the file.
+        chunk_size: an integer representing the number of bytes to read at
+        once.
+
+    Returns:
+        A string with the hexadecimal hash of the file.
+    """
+    file_hash = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+def _write_cache(data: pd.DataFrame, cache_dir: str, source: dict) -> dict:
+    """
+    Saves every column of a dataframe as numpy arrays in a cache directory,
+    along with the digits of the "votes" column if there is one.
+
+    The metadata is written last and removed first, so a cache that was only
+    partly written is never read.
+
+    Args:
+        data: a pandas DataFrame read from the csv file.
+        cache_dir: a string representing the directory to keep the cache in.
+        source: a dictionary with the size, modification time and hash of
+        the csv file.
+
+    Returns:
+        A dictionary with the metadata of the cache.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    meta_path = os.path.join(cache_dir, "meta.json")
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+
+    columns = []
+    for index, (name, column) in enumerate(data.items()):
+        prefix = os.path.join(cache_dir, str(index))
+        if column.dtype == object:
+            categorical = pd.Categorical(column)
+            np.save(f"{prefix}.codes.npy", _smallest_codes(categorical.codes))
+            np.save(
+                f"{prefix}.categories.npy",
+                categorical.categories.to_numpy(dtype=str),
+            )
+            columns.append({"name": name, "kind": "category"})
+        else:
+            values = column.to_numpy()
+            if values.dtype.kind == "i" and (
+                values.size == 0
+                or np.iinfo(np.int32).min
+                <= values.min()
+                <= values.max()
+                <= np.iinfo(np.int32).max
+            ):
+                values = values.astype(np.int32)
+            np.save(f"{prefix}.npy", values)
+            columns.append({"name": name, "kind": "values"})
+
+    has_digits = "votes" in data.columns
+    if has_digits:
+        for test, digits in get_digit_positions(data["votes"]).items():
+            np.save(
+                os.path.join(cache_dir, f"digits.{test}.npy"),
+                digits.to_numpy(),
+            )
+
+    meta = {
+        "version": CACHE_VERSION,
+        "source": source,
+        "columns": columns,
+        "has_digits": has_digits,
+    }
+    _write_meta(cache_dir, meta)
+    return meta
+
+
+def _smallest_codes(codes: np.ndarray) -> np.ndarray:
+    """
+    Stores the codes of a categorical column in the smallest integer type
+    that fits the number of categories.
+
+    Args:
+        codes: a numpy array with the code of each value, or -1 for missing
+        values.
+
+    Returns:
+        A numpy array with the same codes as int8, int16 or int32.
+    """
+    for dtype in (np.int8, np.int16):
+        if codes.size == 0 or codes.max() <= np.iinfo(dtype).max:
+            return codes.astype(dtype)
+    return codes.astype(np.int32)
+
+
+def _read_meta(cache_dir: str) -> dict:
+    """
+    Reads the metadata of a cache.
+
+    Args:
+        cache_dir: a string representing the directory the cache is kept in.
+
+    Returns:
+        A dictionary with the metadata of the cache, or None if there is no
+        cache in the directory.
+    """
+    try:
+        with open(
+            os.path.join(cache_dir, "meta.json"), "r", encoding="utf-8"
+        ) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(cache_dir: str, meta: dict):
+    """
+    Writes the metadata of a cache through a temporary file, so the metadata
+    is either fully written or not written at all.
+
+    Args:
+        cache_dir: a string representing the directory the cache is kept in.
+        meta: a dictionary with the metadata of the cache.
+    """
+    meta_path = os.path.join(cache_dir, "meta.json")
+    with open(f"{meta_path}.tmp", "w", encoding="utf-8") as file:
+        json.dump(meta, file)
+    os.replace(f"{meta_path}.tmp", meta_path)
+
+
+def _read_cache(cache_dir: str, meta: dict) -> pd.DataFrame:
+    """
+    Reads the columns of a cache into a dataframe. The arrays are memory-mapped
+    copy-on-write, so changing the dataframe does not change the cache.
+
+    Args:
+        cache_dir: a string representing the directory the cache is kept in.
+        meta: a dictionary with the metadata of the cache.
+
+    Returns:
+        A pandas DataFrame with the cached columns.
+    """
+    columns = {}
+    for index, column in enumerate(meta["columns"]):
+        prefix = os.path.join(cache_dir, str(index))
+        if column["kind"] == "category":
+            columns[column["name"]] = pd.Categorical.from_codes(
+                np.load(f"{prefix}.codes.npy", mmap_mode="c"),
+                np.load(f"{prefix}.categories.npy"),
+            )
+        else:
+            columns[column["name"]] = np.load(f"{prefix}.npy", mmap_mode="c")
+    return _frame_from_arrays(columns)
+
+
+def _frame_from_arrays(columns: dict) -> pd.DataFrame:
+    """
+    Makes a dataframe from memory-mapped arrays without copying them. The
+    DataFrame constructor would copy the arrays into one block for each
+    dtype, reading the whole cache into memory.
+
+    Args:
+        columns: a dictionary with the name of each column mapped to a numpy
+        array or pandas Categorical with its values.
+
+    Returns:
+        A pandas DataFrame whose columns share memory with the arrays.
+    """
+    if not columns:
+        return pd.DataFrame()
+    return pd.concat(
+        [
+            pd.Series(values, name=name, copy=False)
+            for name, values in columns.items()
+        ],
+        axis=1,
+        copy=False,
+    )
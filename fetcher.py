@@ -0,0 +1,268 @@
+"""
+Downloads pages for the scrapers over reused connections, with a limit on the
+rate of requests and the number of requests to each host at once, and retries
+with exponential backoff when a request fails.
+"""
+
+import http.client
+import random
+import threading
+import time
+from urllib.error import HTTPError
+from urllib.parse import urljoin, urlsplit
+
+# Responses that are worth retrying, since the server may give the page later.
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+
+
+class TokenBucket:
+    """
+    Limits the rate of requests to rate per second on average, allowing
+    bursts of up to capacity requests at once. It can be shared by threads.
+    """
+
+    def __init__(self, rate: float, capacity: int = 1):
+        """
+        Creates a full bucket.
+
+        Args:
+            rate: a float representing the number of tokens added per second.
+            capacity: an integer representing the most tokens the bucket holds.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Takes a token from the bucket, waiting until there is one.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            # Take the token now, even if it has not been added yet, so
+            # waiting threads are given tokens in the order they asked.
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait > 0:
+            time.sleep(wait)
+
+
+class Fetcher:
+    """
+    Downloads pages over a pool of persistent connections to each host, which
+    can be shared by the threads of a scraper.
+
+    Every request waits for a token from a TokenBucket if a rate is given,
+    and at most max_per_host requests are sent to a host at once. Requests
+    that fail with a connection error or a status in RETRY_STATUSES are tried
+    again up to retries times, waiting backoff * 2 ** attempt seconds (with
+    up to 10% random jitter) before each retry.
+
+    Use it as a context manager to close the connections when done.
+    """
+
+    def __init__(
+        self,
+        rate: float = None,
+        burst: int = 1,
+        max_per_host: int = 8,
+        retries: int = 3,
+        backoff: float = 0.5,
+        timeout: float = 30,
+        headers: dict = None,
+    ):
+        """
+        Creates a fetcher without any connections.
+
+        Args:
+            rate: a float representing the most requests per second, or None
+            for no limit.
+            burst: an integer representing the most requests sent at once
+            before the rate limit applies.
+            max_per_host: an integer representing the most requests sent to a
+            host at once, which is also the most connections kept to it.
+            retries: an integer representing the number of times to retry a
+            failed request.
+            backoff: a float representing the number of seconds to wait before
+            the first retry, doubling for each retry after it.
+            timeout: a float representing the number of seconds to wait for
+            the server.
+            headers: a dictionary of headers to send with every request.
+        """
+        self.bucket = None if rate is None else TokenBucket(rate, burst)
+        self.max_per_host = max_per_host
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.headers = dict(headers or {})
+        # Each host as (scheme, netloc) mapped to its semaphore and a list of
+        # idle connections.
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def fetch(
+        self, url: str, default_charset: str = "utf-8", max_redirects: int = 5
+    ) -> str:
+        """
+        Downloads a page and decodes it with the charset the server sends,
+        following redirects.
+
+        Args:
+            url: a string representing the url of the page.
+            default_charset: a string with the charset to decode the page with
+            if the server does not send one.
+            max_redirects: an integer representing the most redirects to
+            follow.
+
+        Returns:
+            A string representing the html page source.
+
+        Raises:
+            HTTPError: if the server responds with an error after all of the
+            retries, or with too many redirects.
+            OSError: if the server cannot be reached after all of the retries.
+        """
+        for _ in range(max_redirects + 1):
+            status, headers, body = self._request_with_retries(url)
+            if status in REDIRECT_STATUSES and headers.get("Location"):
+                url = urljoin(url, headers["Location"])
+                continue
+            if status >= 400:
+                reason = http.client.responses.get(status, "")
+                raise HTTPError(url, status, reason, headers, None)
+            charset = headers.get_content_charset() or default_charset
+            return body.decode(charset)
+        raise HTTPError(url, status, "Too many redirects", headers, None)
+
+    def close(self):
+        """
+        Closes every idle connection.
+        """
+        with self._lock:
+            hosts = list(self._hosts.values())
+            self._hosts = {}
+        for _, idle in hosts:
+            for connection in idle:
+                connection.close()
+
+    def _request_with_retries(self, url: str) -> tuple:
+        """
+        Sends a GET request, retrying with exponential backoff if it fails.
+
+        Args:
+            url: a string representing the url to request.
+
+        Returns:
+            A tuple with the status, the headers and the body of the response.
+        """
+        for attempt in range(self.retries):
+            try:
+                status, headers, body = self._request(url)
+            except (OSError, http.client.HTTPException):
+                pass
+            else:
+                if status not in RETRY_STATUSES:
+                    return status, headers, body
+            delay = self.backoff * 2**attempt
+            time.sleep(delay + random.uniform(0, delay / 10))
+        return self._request(url)
+
+    def _request(self, url: str) -> tuple:
+        """
+        Sends a GET request over an idle connection to the host, or a new one,
+        keeping the connection for later requests if the server allows it.
+
+        Args:
+            url: a string representing the url to request.
+
+        Returns:
+            A tuple with the status, the headers and the body of the response.
+        """
+        parts = urlsplit(url)
+        semaphore, idle = self._get_host(parts.scheme, parts.netloc)
+        path = parts.path or "/"
+        if parts.query:
+            path = f"{path}?{parts.query}"
+
+        if self.bucket is not None:
+            self.bucket.acquire()
+        with semaphore:
+            with self._lock:
+                connection = idle.pop() if idle else None
+            if connection is not None:
+                try:
+                    response, body = self._send(connection, path)
+                except (ConnectionError, http.client.HTTPException):
+                    # The server may have closed the idle connection, so try
+                    # once more on a new one before counting it as a failure.
+                    connection = None
+            if connection is None:
+                connection_class = (
+                    http.client.HTTPSConnection
+                    if parts.scheme == "https"
+                    else http.client.HTTPConnection
+                )
+                connection = connection_class(
+                    parts.netloc, timeout=self.timeout
+                )
+                response, body = self._send(connection, path)
+            if response.will_close:
+                connection.close()
+            else:
+                with self._lock:
+                    idle.append(connection)
+        return response.status, response.headers, body
+
+    def _send(self, connection: http.client.HTTPConnection, path: str):
+        """
+        Sends a GET request over a connection and reads the response, closing
+        the connection if the request fails.
+
+        Args:
+            connection: an HTTPConnection to the host.
+            path: a string with the path and query to request.
+
+        Returns:
+            The HTTPResponse and a bytes object with its body.
+        """
+        try:
+            connection.request("GET", path, headers=self.headers)
+            response = connection.getresponse()
+            return response, response.read()
+        except BaseException:
+            connection.close()
+            raise
+
+    def _get_host(self, scheme: str, netloc: str) -> tuple:
+        """
+        Finds the semaphore and idle connections of a host, adding them the
+        first time the host is requested.
+
+        Args:
+            scheme: a string with the scheme of the host, such as "http".
+            netloc: a string with the host name and port.
+
+        Returns:
+            A tuple with the semaphore that limits the requests to the host
+            and the list of idle connections to it.
+        """
+        with self._lock:
+            if (scheme, netloc) not in self._hosts:
+                self._hosts[(scheme, netloc)] = (
+                    threading.BoundedSemaphore(self.max_per_host),
+                    [],
+                )
+            return self._hosts[(scheme, netloc)]
@@ -0,0 +1,381 @@
+"""
+Generates the leading digit analysis of the notebooks for election data csv
+files from the command line, saving plots and summaries for each dataset
+instead of running a notebook by hand.
+
+For example, to make reports for the US data by state and candidate and for
+the Russia data by region and candidate:
+
+    python generate_reports.py data/2020-us-elections-data.csv \
+        data/2018-Russia-election-data.csv \
+        --columns state region candidate --threshold 200 --workers 2
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import json
+import os
+import pandas as pd
+
+from batch_plotting import SubplotsBarRenderer
+from data_analysis import (
+    count_leading_digits,
+    data_to_percentage,
+    find_std_dev_range,
+    find_values_outside_range,
+)
+from data_cache import load_election_data
+from goodness_of_fit import find_goodness_of_fit
+
+
+def generate_report(
+    csv_path: str,
+    column_names: list,
+    output_dir: str,
+    threshold: int = 0,
+    bar_colors: tuple = ("blue", "green"),
+) -> dict:
+    """
+    Runs the leading digit analysis of a dataset for each grouping column and
+    saves the results to a directory named after the csv file.
+
+    For each column in column_names that the dataset has, the directory gets
+    a "<column>.png" plot of the values outside the 1.96 standard deviation
+    range like plot_subplots_bar, a "<column>_outliers.csv" file with those
+    values, a "<column>_goodness_of_fit.csv" file with the statistics of
+    find_goodness_of_fit for each category and a "<column>_counts.csv" file
+    with the leading digit counts of each category, which update_report
+    starts from. A "summary.json" file lists the files along with the mean
+    percentage of each digit and the values outside the range.
+
+    Args:
+        csv_path: a string representing the path to the csv file.
+        column_names: a list of strings with the names of the columns to group
+        the votes by. Columns that are not in the dataset are skipped.
+        output_dir: a string representing the directory to save the reports
+        of every dataset in.
+        threshold: an integer representing the minimum number of votes for a
+        category to be included.
+        bar_colors: a tuple of two colors for the mean and for the values
+        outside the range, like plot_subplots_bar.
+
+    Returns:
+        A dictionary with the summary that was saved to "summary.json".
+    """
+    data = load_election_data(csv_path)
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    report_dir = os.path.join(output_dir, name)
+    os.makedirs(report_dir, exist_ok=True)
+    renderer = SubplotsBarRenderer()
+
+    summary = {
+        "dataset": csv_path,
+        "report_dir": report_dir,
+        "num_votes": len(data.index),
+        "threshold": threshold,
+        "columns": {},
+    }
+    for column_name in column_names:
+        if column_name not in data.columns:
+            continue
+        counts = count_leading_digits(data, column_name, threshold)
+        summary["columns"][column_name] = _save_column_report(
+            report_dir, name, column_name, counts, renderer, bar_colors
+        )
+    _save_summary(summary)
+    return summary
+
+
+def update_report(
+    csv_path: str,
+    output_dir: str,
+    categories: dict,
+    bar_colors: tuple = ("blue", "green"),
+) -> dict:
+    """
+    Updates the report that generate_report saved for a dataset after the
+    votes of some categories changed, such as the states or regions of the
+    pages updated by refresh_election_data.
+
+    Only the leading digits of the votes in the changed categories are
+    counted again. Their counts replace the old counts in the
+    "<column>_counts.csv" file, and the other files of the column are made
+    again from the counts, since the mean and range depend on every category.
+    Columns without changed categories are left as they are. The columns and
+    threshold of the report are kept.
+
+    Args:
+        csv_path: a string representing the path to the csv file.
+        output_dir: a string representing the directory the reports of every
+        dataset were saved in.
+        categories: a dictionary with the name of each grouping column mapped
+        to a list of the categories in that column whose votes changed, such
+        as from find_changed_categories. The categories may be strings even
+        if the column is numeric.
+        bar_colors: a tuple of two colors for the mean and for the values
+        outside the range, like plot_subplots_bar.
+
+    Returns:
+        A dictionary with the summary that was saved to "summary.json".
+    """
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    report_dir = os.path.join(output_dir, name)
+    with open(
+        os.path.join(report_dir, "summary.json"), "r", encoding="utf-8"
+    ) as file:
+        summary = json.load(file)
+    data = load_election_data(csv_path)
+    renderer = SubplotsBarRenderer()
+
+    summary["num_votes"] = len(data.index)
+    for column_name, column_summary in summary["columns"].items():
+        # The categories and the columns of the saved counts are compared in
+        # the dtype of the data, so numeric categories match and sort as
+        # numbers.
+        dtype = _category_dtype(data[column_name])
+        changed = pd.Index(
+            [str(category) for category in categories.get(column_name, [])]
+        ).astype(dtype)
+        if changed.empty:
+            continue
+        counts = pd.read_csv(column_summary["counts"], index_col=0)
+        counts.columns = counts.columns.astype(dtype)
+        changed_counts = count_leading_digits(
+            data[data[column_name].isin(changed)],
+            column_name,
+            summary["threshold"],
+        )
+        counts = pd.concat(
+            [counts.drop(columns=changed, errors="ignore"), changed_counts],
+            axis=1,
+        ).sort_index(axis=1)
+        summary["columns"][column_name] = _save_column_report(
+            report_dir, name, column_name, counts, renderer, bar_colors
+        )
+    _save_summary(summary)
+    return summary
+
+
+def find_changed_categories(changes: list, column_names: list) -> dict:
+    """
+    Finds the categories whose votes changed in a refresh of the scraped
+    pages.
+
+    Args:
+        changes: a list of PageChange tuples from refresh_election_data, whose
+        rows are VoteRecords.
+        column_names: a list of strings with the names of the grouping
+        columns.
+
+    Returns:
+        A dictionary with each name in column_names that the rows have mapped
+        to a sorted list of the categories in the old or new rows of the
+        changed pages.
+    """
+    categories = {}
+    for change in changes:
+        for row in change.old_rows + change.new_rows:
+            for column_name in column_names:
+                if column_name in row._fields:
+                    categories.setdefault(column_name, set()).add(
+                        str(getattr(row, column_name))
+                    )
+    return {
+        column_name: sorted(values)
+        for column_name, values in categories.items()
+    }
+
+
+def _category_dtype(values: pd.Series):
+    """
+    Finds the dtype of the categories of a grouping column, which are the
+    column names of its leading digit counts.
+
+    Args:
+        values: a pandas Series with the values of the grouping column.
+
+    Returns:
+        The dtype of the categories of a categorical column, or of the values
+        of any other column.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.dtype.categories.dtype
+    return values.dtype
+
+
+def _save_column_report(
+    report_dir: str,
+    name: str,
+    column_name: str,
+    counts: pd.DataFrame,
+    renderer: SubplotsBarRenderer,
+    bar_colors: tuple,
+) -> dict:
+    """
+    Saves the files of the report of one grouping column from the leading
+    digit counts of its categories. If no category has enough votes, the plot
+    and outliers of an earlier report of the column are removed.
+
+    Args:
+        report_dir: a string representing the directory of the report.
+        name: a string with the name of the dataset, used as the mean label.
+        column_name: a string with the name of the grouping column.
+        counts: a pandas DataFrame of leading digit counts with one column for
+        each category, from count_leading_digits.
+        renderer: a SubplotsBarRenderer to save the plot with.
+        bar_colors: a tuple of two colors for the plot.
+
+    Returns:
+        A dictionary with the summary of the column.
+    """
+    percentages = data_to_percentage(counts, from_counts=True)
+    column_summary = {
+        "num_categories": len(percentages.columns),
+        "counts": os.path.join(report_dir, f"{column_name}_counts.csv"),
+        "goodness_of_fit": os.path.join(
+            report_dir, f"{column_name}_goodness_of_fit.csv"
+        ),
+    }
+    counts.to_csv(column_summary["counts"])
+    find_goodness_of_fit(counts).to_csv(column_summary["goodness_of_fit"])
+    if len(percentages.columns) > 0:
+        means, _, max_vals, min_vals = find_std_dev_range(percentages)
+        outliers = find_values_outside_range(percentages, min_vals, max_vals)
+        column_summary["plot"] = renderer.save(
+            os.path.join(report_dir, f"{column_name}.png"),
+            name,
+            outliers,
+            means,
+            (min_vals, max_vals),
+            list(bar_colors),
+        )
+        column_summary["outliers"] = os.path.join(
+            report_dir, f"{column_name}_outliers.csv"
+        )
+        column_summary["means"] = {
+            str(digit): float(mean) for digit, mean in means.items()
+        }
+        column_summary["values_outside_range"] = [
+            {
+                "category": str(category),
+                "digit": int(digit),
+                "value": float(value),
+            }
+            for category, digit, value in outliers
+        ]
+        pd.DataFrame(outliers, columns=["category", "digit", "value"]).to_csv(
+            column_summary["outliers"], index=False
+        )
+    else:
+        for file_name in [f"{column_name}.png", f"{column_name}_outliers.csv"]:
+            if os.path.exists(os.path.join(report_dir, file_name)):
+                os.remove(os.path.join(report_dir, file_name))
+    return column_summary
+
+
+def _save_summary(summary: dict):
+    """
+    Saves the summary of a report to "summary.json" in its directory.
+
+    Args:
+        summary: a dictionary with the summary of the report.
+    """
+    with open(
+        os.path.join(summary["report_dir"], "summary.json"),
+        "w",
+        encoding="utf-8",
+    ) as file:
+        json.dump(summary, file, ensure_ascii=False, indent=2)
+
+
+def generate_reports(
+    csv_paths: list,
+    column_names: list,
+    output_dir: str,
+    threshold: int = 0,
+    bar_colors: tuple = ("blue", "green"),
+    workers: int = 1,
+) -> list:
+    """
+    Generates the report of each dataset with generate_report, making the
+    reports of different datasets in parallel.
+
+    Args:
+        csv_paths: a list of strings with the paths to the csv files.
+        column_names: a list of strings with the names of the columns to group
+        the votes by.
+        output_dir: a string representing the directory to save the reports
+        in.
+        threshold: an integer representing the minimum number of votes for a
+        category to be included.
+        bar_colors: a tuple of two colors for the plots.
+        workers: an integer representing the number of processes to make
+        reports in. Will make them in the current process if it is 1.
+
+    Returns:
+        A list with the summary of each dataset, in the order of csv_paths.
+    """
+    arguments = [
+        (csv_path, column_names, output_dir, threshold, bar_colors)
+        for csv_path in csv_paths
+    ]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(generate_report, *zip(*arguments)))
+    return [generate_report(*argument) for argument in arguments]
+
+
+def main(argv: list = None):
+    """
+    Reads the command line arguments and generates the reports.
+
+    Args:
+        argv: a list of strings with the command line arguments, or None to
+        use sys.argv.
+    """
+    parser = argparse.ArgumentParser(
+        description="Make leading digit reports for election data csv files."
+    )
+    parser.add_argument("csv_paths", nargs="+", help="csv files to analyze")
+    parser.add_argument(
+        "--columns",
+        nargs="+",
+        default=["candidate", "state", "region"],
+        help="columns to group the votes by, skipped if a file lacks them",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=int,
+        default=0,
+        help="minimum number of votes for a category to be included",
+    )
+    parser.add_argument(
+        "--output", default="reports", help="directory to save reports in"
+    )
+    parser.add_argument(
+        "--colors",
+        nargs=2,
+        default=["blue", "green"],
+        help="colors of the mean and of the values outside the range",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="number of datasets to analyze at once",
+    )
+    args = parser.parse_args(argv)
+    workers = min(args.workers, len(args.csv_paths))
+    for summary in generate_reports(
+        args.csv_paths,
+        args.columns,
+        args.output,
+        args.threshold,
+        tuple(args.colors),
+        workers,
+    ):
+        print(f"{summary['dataset']}: {summary['report_dir']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""
+Contains functions for measuring how well the digits of each category follow
+Benford's law, computed for every category at once.
+"""
+
+import numpy as np
+import pandas as pd
+
+from data_analysis import (
+    get_theoretical_digit_distribution,
+    count_digit_cube,
+    roll_up_digit_cube,
+)
+
+# Chi-square values above which a digit test is rejected at a 5% significance
+# level, for the 8, 9 and 89 degrees of freedom of each digit test.
+CHI_SQUARE_CRITICAL_VALUES = {
+    "first": 15.507,
+    "second": 16.919,
+    "first_two": 112.022,
+    "last": 16.919,
+}
+# Upper limits of the mean absolute deviation for close, acceptable and
+# marginally acceptable conformity from Nigrini's Benford's law tests. There
+# are no limits for the last digit test.
+MAD_CONFORMITY_LIMITS = {
+    "first": (0.006, 0.012, 0.015),
+    "second": (0.008, 0.010, 0.012),
+    "first_two": (0.0012, 0.0018, 0.0022),
+}
+MAD_CONFORMITY_LABELS = (
+    "close conformity",
+    "acceptable conformity",
+    "marginally acceptable conformity",
+    "nonconformity",
+)
+# Multiplied by 1 / sqrt(number of digits) to find the Kolmogorov-Smirnov
+# statistic above which a digit test is rejected at a 5% significance level.
+KS_CRITICAL_COEFFICIENT = 1.36
+
+
+def get_digit_proportions(
+    counts: pd.DataFrame, test: str
+) -> (np.ndarray, np.ndarray, np.ndarray):
+    """
+    Turns a dataframe of digit counts into the observed and expected proportion
+    of each digit and the number of digits in each category.
+
+    Args:
+        counts: a pandas DataFrame with the digits of the test as the index and
+        one column of digit counts for each category.
+        test: the name of the digit test in DIGIT_TESTS the counts are for.
+
+    Returns:
+        A numpy array of the observed proportions with the same shape as
+        counts, a numpy array with one column of the expected proportions, and
+        a numpy array with the number of digits in each category.
+    """
+    expected = get_theoretical_digit_distribution(test)
+    if not counts.index.isin(expected.index).all():
+        raise ValueError(f"Index of counts does not match the {test} test.")
+    expected = expected.reindex(counts.index).to_numpy()[:, np.newaxis] / 100
+    values = counts.to_numpy(dtype=np.float64)
+    sizes = values.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        observed = values / sizes
+    return observed, expected, sizes
+
+
+def find_goodness_of_fit(
+    counts: pd.DataFrame, test: str = "first"
+) -> pd.DataFrame:
+    """
+    Finds how well the digits of each category fit the expected distribution
+    of a digit test using the chi-square statistic, the mean absolute
+    deviation (MAD) and the Kolmogorov-Smirnov (KS) statistic.
+
+    Args:
+        counts: a pandas DataFrame with the digits of the test as the index and
+        one column of digit counts for each category, such as the output of
+        count_leading_digits or count_digit_positions.
+        test (str, optional): the name of the digit test in DIGIT_TESTS the
+        counts are for. Will default to the first digit test.
+
+    Returns:
+        A pandas DataFrame with one row for each category and the columns
+        "size" (the number of digits), "chi_square", "chi_square_reject",
+        "mad", "mad_conformity", "ks" and "ks_reject". The reject columns are
+        True where the category does not follow the distribution at a 5%
+        significance level. Categories with no digits have NaN statistics.
+    """
+    observed, expected, sizes = get_digit_proportions(counts, test)
+    deviations = observed - expected
+
+    chi_square = sizes * (deviations**2 / expected).sum(axis=0)
+    mad = np.abs(deviations).mean(axis=0)
+    ks = np.abs(np.cumsum(deviations, axis=0)).max(axis=0)
+    with np.errstate(divide="ignore"):
+        ks_critical_values = KS_CRITICAL_COEFFICIENT / np.sqrt(sizes)
+
+    return pd.DataFrame(
+        {
+            "size": sizes.astype(np.int64),
+            "chi_square": chi_square,
+            "chi_square_reject": chi_square > CHI_SQUARE_CRITICAL_VALUES[test],
+            "mad": mad,
+            "mad_conformity": find_mad_conformity(mad, test),
+            "ks": ks,
+            "ks_reject": ks > ks_critical_values,
+        },
+        index=counts.columns,
+    )
+
+
+def find_mad_conformity(mad, test: str = "first") -> np.ndarray:
+    """
+    Labels mean absolute deviations with Nigrini's conformity ranges.
+
+    Args:
+        mad: an array-like of mean absolute deviations between observed and
+        expected proportions.
+        test (str, optional): the name of the digit test in DIGIT_TESTS the
+        deviations are for. Will default to the first digit test.
+
+    Returns:
+        A numpy array of strings from MAD_CONFORMITY_LABELS for each deviation,
+        or None where the deviation is NaN or the test has no conformity
+        ranges.
+    """
+    mad = np.asarray(mad, dtype=np.float64)
+    labels = np.full(mad.shape, None, dtype=object)
+    if test not in MAD_CONFORMITY_LIMITS:
+        return labels
+    ranges = np.searchsorted(MAD_CONFORMITY_LIMITS[test], mad, side="right")
+    has_mad = ~np.isnan(mad)
+    labels[has_mad] = np.array(MAD_CONFORMITY_LABELS)[ranges[has_mad]]
+    return labels
+
+
+def find_z_statistics(
+    counts: pd.DataFrame, test: str = "first"
+) -> pd.DataFrame:
+    """
+    Finds the Z-statistic of every digit in every category, which measures how
+    many standard errors the observed proportion of a digit is from the
+    expected proportion. The continuity correction of 1 / (2 * size) is only
+    applied where it is smaller than the absolute deviation.
+
+    Args:
+        counts: a pandas DataFrame with the digits of the test as the index and
+        one column of digit counts for each category.
+        test (str, optional): the name of the digit test in DIGIT_TESTS the
+        counts are for. Will default to the first digit test.
+
+    Returns:
+        A pandas DataFrame with the same index and columns as counts containing
+        the Z-statistic of each digit. Values above 1.96 are significant at a
+        5% level.
+    """
+    observed, expected, sizes = get_digit_proportions(counts, test)
+    deviations = np.abs(observed - expected)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        corrections = np.where(
+            1 / (2 * sizes) < deviations, 1 / (2 * sizes), 0
+        )
+        z_statistics = (deviations - corrections) / np.sqrt(
+            expected * (1 - expected) / sizes
+        )
+    return pd.DataFrame(
+        z_statistics, index=counts.index, columns=counts.columns
+    )
+
+
+def sweep_thresholds(
+    data: pd.DataFrame,
+    column_name: str,
+    thresholds,
+    test: str = "first",
+    positions: pd.DataFrame = None,
+) -> pd.DataFrame:
+    """
+    Finds the categories that have at least each of several thresholds of
+    votes, along with how well each of them fits a digit test, as if
+    find_goodness_of_fit was run on the counts of each threshold.
+
+    The digits are counted and the statistics are found for each category
+    only once, since they do not depend on the threshold, so sweeping many
+    thresholds costs about as much as one.
+
+    Args:
+        data: a pandas DataFrame with a "votes" column and column_name.
+        column_name: the name of the column whose unique values are the
+        categories.
+        thresholds: a list of integers representing the minimum numbers of
+        votes for a category to be included.
+        test (str, optional): the name of the digit test in DIGIT_TESTS to
+        count the digits of. Will default to the first digit test.
+        positions (pd.DataFrame, optional): the digits of the votes from
+        get_digit_positions or load_digit_index, or None to find them.
+
+    Returns:
+        A pandas DataFrame with one row for each category that meets each
+        threshold, indexed by the threshold and the category, with a
+        "num_votes" column with the number of votes of the category and the
+        columns of find_goodness_of_fit. Use .loc[threshold] to get the
+        categories of one threshold.
+    """
+    cube = count_digit_cube(data, column_name, test, positions)
+    fit = find_goodness_of_fit(roll_up_digit_cube(cube, column_name), test)
+    num_votes = cube["size"].groupby(level=column_name).sum().to_numpy()
+    fit.insert(0, "num_votes", num_votes)
+
+    thresholds = np.asarray(thresholds)
+    threshold_rows, categories = np.nonzero(
+        num_votes >= thresholds[:, np.newaxis]
+    )
+    swept = fit.iloc[categories]
+    swept.index = pd.MultiIndex.from_arrays(
+        [thresholds[threshold_rows], fit.index[categories]],
+        names=["threshold", column_name],
+    )
+    return swept
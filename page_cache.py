@@ -0,0 +1,464 @@
+"""
+Keeps the raw html of every page a scraper saves, compressed on disk, so the
+csv files can be made again with new parsing logic without scraping the
+election websites again.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import csv
+import gzip
+import hashlib
+import os
+import sqlite3
+from typing import NamedTuple
+
+from csv_writer import CsvWriter
+from scrape_journal import ScrapeJournal
+
+
+class PageChange(NamedTuple):
+    """
+    A page whose html changed since it was saved, with the rows parsed from
+    the html before and after the change. old_rows is empty for a new page.
+    """
+
+    key: str
+    old_rows: list
+    new_rows: list
+
+
+class PageCache:
+    """
+    A content-addressed cache of html pages, keyed by the same strings as the
+    ScrapeJournal, such as the fips numbers of a county or the url of an
+    oblast page.
+
+    Each page is saved once as a gzip file named after the SHA-256 hash of its
+    html, so pages with the same html share a file. A SQLite index maps each
+    key to the hash of its latest html, in the order the keys were first
+    saved, which is the order of their rows in the csv file.
+
+    Use it as a context manager to close the index when done.
+    """
+
+    def __init__(self, directory: str):
+        """
+        Opens the cache in a directory, creating it if it does not exist.
+
+        Args:
+            directory: a string representing the directory to keep the pages
+            and the index in.
+        """
+        self.directory = directory
+        os.makedirs(os.path.join(directory, "objects"), exist_ok=True)
+        self._connection = sqlite3.connect(os.path.join(directory, "index.db"))
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "key TEXT PRIMARY KEY, sha256 TEXT NOT NULL)"
+        )
+        self._connection.commit()
+        self._digests = dict(
+            self._connection.execute(
+                "SELECT key, sha256 FROM pages ORDER BY rowid"
+            )
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._digests)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._digests
+
+    def keys(self) -> list:
+        """
+        Lists the keys of the saved pages.
+
+        Returns:
+            A list of strings with the key of each page, in the order the
+            pages were first saved.
+        """
+        return list(self._digests)
+
+    def digest(self, key: str) -> str:
+        """
+        Finds the hash of the latest html saved for a page.
+
+        Args:
+            key: a string that identifies the page.
+
+        Returns:
+            A string with the hexadecimal SHA-256 hash of the html, or None if
+            the page has not been saved.
+        """
+        return self._digests.get(key)
+
+    def object_path(self, digest: str) -> str:
+        """
+        Finds the path to the gzip file of the html with a hash.
+
+        Args:
+            digest: a string with the hexadecimal SHA-256 hash of the html.
+
+        Returns:
+            A string representing the path to the file.
+        """
+        return os.path.join(
+            self.directory, "objects", digest[:2], f"{digest}.html.gz"
+        )
+
+    def put(self, key: str, page_html: str) -> bool:
+        """
+        Saves the html of a page, replacing any html saved before for the key.
+        The file is written before the index, so the index only refers to
+        complete files.
+
+        Args:
+            key: a string that identifies the page.
+            page_html: a string representing the html page source.
+
+        Returns:
+            True if the html is different from the html saved before for the
+            key or the page is new, and False if it is the same.
+        """
+        body = page_html.encode("utf-8")
+        digest = page_digest(page_html)
+        if self._digests.get(key) == digest:
+            return False
+
+        path = self.object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(f"{path}.tmp", "wb") as file:
+                file.write(gzip.compress(body, compresslevel=6))
+            os.replace(f"{path}.tmp", path)
+        with self._connection:
+            # Updating instead of replacing the row keeps its place in order.
+            self._connection.execute(
+                "INSERT INTO pages (key, sha256) VALUES (?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET sha256 = excluded.sha256",
+                (key, digest),
+            )
+        self._digests[key] = digest
+        return True
+
+    def get(self, key: str) -> str:
+        """
+        Reads the latest html saved for a page.
+
+        Args:
+            key: a string that identifies the page.
+
+        Returns:
+            A string representing the html page source.
+
+        Raises:
+            KeyError: if the page has not been saved.
+        """
+        return _read_object(self.object_path(self._digests[key]))
+
+    def close(self):
+        """
+        Closes the index.
+        """
+        self._connection.close()
+
+
+def page_digest(page_html: str) -> str:
+    """
+    Finds the hash that a PageCache keeps for the html of a page.
+
+    Args:
+        page_html: a string representing the html page source.
+
+    Returns:
+        A string with the hexadecimal SHA-256 hash of the html.
+    """
+    return hashlib.sha256(page_html.encode("utf-8")).hexdigest()
+
+
+def refresh_pages(
+    path: str, cache: PageCache, pages, parse, column_names: list
+) -> list:
+    """
+    Updates a csv file with the pages that changed since they were saved in a
+    PageCache, such as pages with results that were updated after they were
+    scraped.
+
+    The hash of each page is compared with the hash in the cache, and only the
+    pages that changed are parsed. The rows of the old html of a changed page
+    are replaced in the csv file by the rows of its new html, and the rows of
+    new pages are added to the end. Every other row is kept as it is. The
+    cache and the journal of the csv file are updated to the new pages.
+
+    Args:
+        path: a string representing the path to the csv file, which must have
+        been saved with the pages in the cache.
+        cache: the PageCache the pages were saved in.
+        pages: an iterable of (key, html) tuples with the current html of
+        each page.
+        parse: a function that takes the html of a page and returns a list of
+        rows, such as get_vote_rows.
+        column_names: a list of strings with the title of each column.
+
+    Returns:
+        A list with a PageChange for each page that changed or is new, in the
+        order of pages.
+
+    Raises:
+        FileExistsError: if a scrape of the csv file was interrupted, since
+        its rows are not in the csv file yet.
+        KeyError: if a page in the journal of the csv file is not in the
+        cache, since its old rows could not be found to be replaced.
+    """
+    if os.path.exists(f"{path}.tmp"):
+        raise FileExistsError(
+            f"{path}.tmp is from an interrupted scrape, finish it first."
+        )
+    _check_journal_keys(path, cache)
+    changes = []
+    changed_pages = []
+    for key, page_html in pages:
+        if cache.digest(key) == page_digest(page_html):
+            continue
+        old_rows = parse(cache.get(key)) if key in cache else []
+        changes.append(PageChange(key, old_rows, parse(page_html)))
+        changed_pages.append((key, page_html))
+    if not changes:
+        return changes
+
+    # The journal is opened before the rows are read, since opening it cuts
+    # the csv file back to its size when the last page was saved.
+    with ScrapeJournal(path) as journal:
+        rows = []
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8", newline="") as file:
+                rows = list(csv.reader(file))[1:]
+        rows = _replace_rows(rows, changes)
+        with open(
+            f"{path}.refresh", "w", encoding="utf-8", newline=""
+        ) as file:
+            writer = csv.writer(file, lineterminator="\n")
+            writer.writerow(column_names)
+            writer.writerows(rows)
+        # If the refresh is interrupted after the csv file is replaced, the
+        # journal must not cut the new csv file back to the size of the old
+        # one, so the larger size is recorded before it is replaced.
+        journal.reserve(
+            max(
+                os.path.getsize(f"{path}.refresh"),
+                os.path.getsize(path) if os.path.exists(path) else 0,
+            )
+        )
+        os.replace(f"{path}.refresh", path)
+        journal.mark_done(*[change.key for change in changes])
+    # The cache is updated last, so if the refresh is interrupted the pages
+    # are found to have changed again, and their new rows are not added twice.
+    for key, page_html in changed_pages:
+        cache.put(key, page_html)
+    return changes
+
+
+def _replace_rows(rows: list, changes: list) -> list:
+    """
+    Replaces the rows of changed pages in the rows of a csv file.
+
+    The old rows of a page are replaced where they appear together in the csv
+    file. If they are not found, the new rows are added to the end, unless
+    they are already in the csv file together.
+
+    Args:
+        rows: a list of the rows of the csv file, where each row is a list of
+        strings.
+        changes: a list of PageChange tuples of the pages that changed.
+
+    Returns:
+        A list of the rows of the csv file with the rows of the pages
+        replaced.
+    """
+    # The position of every row, so each page is found without a scan.
+    positions = {}
+    for position, row in enumerate(rows):
+        positions.setdefault(tuple(row), []).append(position)
+
+    def find(page_rows):
+        if not page_rows:
+            return None
+        for start in positions.get(tuple(page_rows[0]), []):
+            if rows[start : start + len(page_rows)] == page_rows:
+                return start
+        return None
+
+    replacements = {}
+    added_rows = []
+    for change in changes:
+        old_rows = [[str(value) for value in row] for row in change.old_rows]
+        new_rows = [[str(value) for value in row] for row in change.new_rows]
+        start = find(old_rows)
+        if start is not None:
+            replacements[start] = (len(old_rows), new_rows)
+        elif find(new_rows) is None:
+            added_rows.extend(new_rows)
+
+    new_csv_rows = []
+    position = 0
+    while position < len(rows):
+        if position in replacements:
+            num_old_rows, new_rows = replacements[position]
+            new_csv_rows.extend(new_rows)
+            position += num_old_rows
+        else:
+            new_csv_rows.append(rows[position])
+            position += 1
+    return new_csv_rows + added_rows
+
+
+def reparse_pages(
+    cache_dir: str,
+    parse,
+    path: str,
+    column_names: list,
+    workers: int = None,
+    buffer_size: int = 1000,
+) -> int:
+    """
+    Makes a csv file again from the pages in a PageCache, parsing the pages in
+    parallel with a pool of processes.
+
+    The rows are saved in the order of the keys, along with a journal of the
+    keys, to files next to the csv file that replace the csv file, its journal
+    and the temporary file of any interrupted scrape once every page is
+    parsed. Resuming a scrape with the new csv file therefore skips the pages
+    in the cache. Nothing is replaced unless every page in the journal of the
+    csv file is in the cache, since the rows of the other pages would be lost.
+
+    Args:
+        cache_dir: a string representing the directory of the PageCache.
+        parse: a function that takes the html of a page and returns a list of
+        rows, such as get_vote_rows. It must be defined at the top level of a
+        module so it can be sent to the processes.
+        path: a string representing the path to the csv file.
+        column_names: a list of strings with the title of each column.
+        workers: an integer representing the number of processes, or None for
+        the number of cores.
+        buffer_size: an integer representing the number of rows to keep in
+        memory before writing them to the file.
+
+    Returns:
+        An integer representing the number of pages that were parsed.
+
+    Raises:
+        KeyError: if a page in the journal of the csv file is not in the cache.
+    """
+    with PageCache(cache_dir) as cache:
+        keys = cache.keys()
+        object_paths = [cache.object_path(cache.digest(key)) for key in keys]
+        _check_journal_keys(path, cache)
+
+    workers = workers or os.cpu_count() or 1
+    new_path = f"{path}.reparse"
+    for stale_path in (new_path, f"{new_path}.tmp", f"{new_path}.journal"):
+        if os.path.exists(stale_path):
+            os.remove(stale_path)
+    with ProcessPoolExecutor(max_workers=workers) as executor, CsvWriter(
+        new_path, column_names, buffer_size, resumable=True
+    ) as writer:
+        chunksize = max(1, len(keys) // (4 * workers))
+        for key, rows in zip(
+            keys,
+            executor.map(
+                _parse_object,
+                [parse] * len(keys),
+                object_paths,
+                chunksize=chunksize,
+            ),
+        ):
+            writer.write_rows(rows, key)
+    # The rows of an interrupted scrape are in the cache, so they are replaced
+    # along with the csv file.
+    if os.path.exists(f"{path}.tmp"):
+        os.remove(f"{path}.tmp")
+    os.replace(f"{new_path}.journal", f"{path}.journal")
+    os.replace(new_path, path)
+    return len(keys)
+
+
+def _check_journal_keys(path: str, cache: PageCache):
+    """
+    Checks that every page in the journal of a csv file is in a PageCache.
+
+    Args:
+        path: a string representing the path to the csv file.
+        cache: the PageCache the pages should have been saved in.
+
+    Raises:
+        KeyError: if a page in the journal is not in the cache.
+    """
+    missing_keys = [
+        key for key in _journal_keys(f"{path}.journal") if key not in cache
+    ]
+    if missing_keys:
+        raise KeyError(
+            f"{len(missing_keys)} pages of {path} are not in the cache, such "
+            f"as {missing_keys[0]!r}, scrape them again first."
+        )
+
+
+def _journal_keys(journal_path: str) -> list:
+    """
+    Lists the pages marked as done in the journal of a csv file, without
+    opening it as a ScrapeJournal, which would cut back the csv file.
+
+    Args:
+        journal_path: a string representing the path to the journal.
+
+    Returns:
+        A list of strings with the key of each page, which is empty if there
+        is no journal.
+    """
+    if not os.path.exists(journal_path):
+        return []
+    connection = sqlite3.connect(journal_path)
+    try:
+        return [
+            key
+            for (key,) in connection.execute(
+                "SELECT key FROM pages ORDER BY rowid"
+            )
+        ]
+    finally:
+        connection.close()
+
+
+def _read_object(object_path: str) -> str:
+    """
+    Reads the html from a gzip file of the cache.
+
+    Args:
+        object_path: a string representing the path to the file.
+
+    Returns:
+        A string representing the html page source.
+    """
+    with open(object_path, "rb") as file:
+        return gzip.decompress(file.read()).decode("utf-8")
+
+
+def _parse_object(parse, object_path: str) -> list:
+    """
+    Reads the html from a gzip file of the cache and parses it.
+
+    Args:
+        parse: a function that takes the html of a page and returns a list of
+        rows.
+        object_path: a string representing the path to the file.
+
+    Returns:
+        The list of rows returned by parse.
+    """
+    return parse(_read_object(object_path))
@@ -0,0 +1,175 @@
+"""
+A local http server that serves saved pages, and functions that make pages in
+the same layout as the election websites, used to test and benchmark the
+scrapers without the election websites.
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+import time
+
+
+class _PageHandler(BaseHTTPRequestHandler):
+    """
+    Serves the pages of the server it belongs to, keyed by request path, over
+    keep-alive connections.
+    """
+
+    protocol_version = "HTTP/1.1"
+    # Sends the body without waiting for the headers to be acknowledged,
+    # which would delay every response on a kept-alive connection.
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        """
+        Counts the connection before reading requests from it.
+        """
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        """
+        Sends the saved page for the path after the server's latency, a 503 if
+        the path has failures left, or a 404 if there is no page.
+        """
+        with self.server.lock:
+            self.server.requests.append(self.path)
+            failures = self.server.failures.get(self.path, 0)
+            if failures:
+                self.server.failures[self.path] = failures - 1
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if failures:
+            self.send_error(503)
+            return
+        page = self.server.pages.get(self.path)
+        if page is None:
+            self.send_error(404)
+            return
+        body = page.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        """
+        Keeps the output free of request logs.
+        """
+
+
+class PageServer(ThreadingHTTPServer):
+    """
+    A local http server that serves saved pages in a background thread. Add
+    pages to pages with the request path (including the query) as the key,
+    and build urls from url. Every requested path is recorded in requests,
+    and the number of connections opened to the server in connections.
+
+    To test how clients handle a slow or failing server, every response waits
+    latency seconds, and a path in failures gets a 503 response for its count
+    of requests before the page is served.
+
+    Use it as a context manager to start and stop the server.
+    """
+
+    def __init__(
+        self, pages: dict = None, latency: float = 0, failures: dict = None
+    ):
+        super().__init__(("127.0.0.1", 0), _PageHandler)
+        self.pages = dict(pages or {})
+        self.latency = latency
+        self.failures = dict(failures or {})
+        self.requests = []
+        self.connections = 0
+        self.lock = Lock()
+        self.url = f"http://127.0.0.1:{self.server_address[1]}"
+        self._thread = Thread(target=self.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
+
+
+def make_us_county_page(county: str, results: list) -> str:
+    """
+    Makes a county results page in the same layout as the US election website.
+
+    Args:
+        county: a string with the county and state, such as "Autauga, AL"
+        results: a list of (candidate, votes) tuples
+
+    Returns:
+        A string with the html of the page.
+    """
+    rows = "".join(f"""
+        <tr>
+            <td class="name">{candidate}</td>
+            <td class="name">Party</td>
+            <td class="name"><span class="color"></span></td>
+            <td class="num">{votes:,}</td>
+            <td class="num">50.0%</td>
+        </tr>""" for candidate, votes in results)
+    return f"""
+    <html><body>
+        <div class="header">2020 Presidential Election - {county}</div>
+        <table>{rows}</table>
+    </body></html>"""
+
+
+def make_russia_dropdown_page(urls: list) -> str:
+    """
+    Makes a page with a "gs" drop down of regions or oblasts in the same
+    layout as the Russia election website.
+
+    Args:
+        urls: a list of strings with the url of each option
+
+    Returns:
+        A string with the html of the page.
+    """
+    options = "".join(f'<option value="{url}">{url}</option>' for url in urls)
+    return f"""
+    <html><body>
+        <form><select name="gs"><option>---</option>{options}</select>
+        <input type="button" name="go" value="go"></form>
+    </body></html>"""
+
+
+def make_russia_oblast_page(region: str, oblast: str, results: list) -> str:
+    """
+    Makes an oblast results page in the same layout as the Russia election
+    website, where the results table starts with 13 rows of turnout numbers.
+
+    Args:
+        region: a string with the name of the region
+        oblast: a string with the name of the oblast, or None if the page is
+        for a region without oblasts
+        results: a list of (candidate, votes) tuples
+
+    Returns:
+        A string with the html of the page.
+    """
+    location = " > ".join(
+        ["Сводная таблица", region] + ([oblast] if oblast else [])
+    )
+    turnout_rows = "".join(
+        f"<tr>\n<td>{i}</td><td>Число избирателей</td><td>1</td>\n</tr>"
+        for i in range(1, 14)
+    )
+    result_rows = "".join(
+        f"<tr>\n<td>{i}.</td><td>{candidate}</td><td>{votes}</td>\n</tr>"
+        for i, (candidate, votes) in enumerate(results, start=1)
+    )
+    return f"""
+    <html><body>
+        <table><tr><td>ЦИК России</td></tr></table>
+        <table><tr><td>{location},</td></tr></table>
+        <table>{turnout_rows}{result_rows}</table>
+        <table><tr><td>footer</td></tr></table>
+    </body></html>"""
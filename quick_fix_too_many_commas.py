@@ -2,16 +2,72 @@
 Fixes the extra commas in some of the regions in the Russian data.
 """
 
-file = open("data/2018-Russia-election-data.csv", "r", encoding="utf-8")
-TEXT = ""
-for line in file:
-    if len(line.split(",")) == 5:
-        last_char_index = line.rfind(",")
-        new_line = line[:last_char_index] + "" + line[last_char_index + 1:]
-        TEXT += new_line
-    else:
-        TEXT += line
-file.close()
-x = open("data/2018-Russia-election-data.csv", "w", encoding="utf-8")
-x.writelines(TEXT)
-x.close()
+import csv
+import os
+
+
+def normalize_rows(rows, num_columns: int = 4):
+    """
+    Fixes rows that were split into too many columns by commas in their last
+    value, such as an oblast name with a comma in it, by joining the extra
+    columns back into the last value.
+
+    Args:
+        rows: an iterable of rows, where each row is a list of strings, such as
+        a csv reader.
+        num_columns: an integer representing the number of columns each row
+        should have.
+
+    Yields:
+        A tuple with each row, with at most num_columns values, and True if
+        the row was fixed or False if it was already fine.
+    """
+    for row in rows:
+        if len(row) > num_columns:
+            yield row[: num_columns - 1] + [
+                ",".join(row[num_columns - 1 :])
+            ], True
+        else:
+            yield row, False
+
+
+def normalize_csv(
+    input_path: str, output_path: str = None, num_columns: int = 4
+) -> int:
+    """
+    Fixes rows with too many columns in a csv file one line at a time, so files
+    of any size are fixed without reading them into memory. Values with commas
+    are quoted in the fixed file, so the file can be read by any csv reader.
+
+    The fixed rows are written to a temporary file next to the output file,
+    which replaces the output file once every row is written, so the output
+    file can be the same as the input file.
+
+    Args:
+        input_path: a string representing the path to the csv file to fix.
+        output_path: a string representing the path to save the fixed csv file
+        to, or None to replace the input file.
+        num_columns: an integer representing the number of columns each row
+        should have, including the header.
+
+    Returns:
+        An integer representing the number of rows that were fixed.
+    """
+    output_path = output_path or input_path
+    temp_path = f"{output_path}.tmp"
+    num_fixed = 0
+    with open(input_path, "r", encoding="utf-8", newline="") as input_file:
+        with open(temp_path, "w", encoding="utf-8", newline="") as output:
+            writer = csv.writer(output, lineterminator="\n")
+            for row, fixed in normalize_rows(
+                csv.reader(input_file), num_columns
+            ):
+                writer.writerow(row)
+                num_fixed += fixed
+    os.replace(temp_path, output_path)
+    return num_fixed
+
+
+if __name__ == "__main__":
+    NUM_FIXED = normalize_csv("data/2018-Russia-election-data.csv")
+    print(f"Fixed {NUM_FIXED} rows")
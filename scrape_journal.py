@@ -0,0 +1,132 @@
+"""
+Keeps a journal of the pages a scraper has already saved so that an
+interrupted scrape can be resumed without starting over or saving duplicate
+rows.
+"""
+
+import os
+import sqlite3
+
+
+class ScrapeJournal:
+    """
+    A SQLite journal of the pages that have been saved to a csv file, keyed by
+    a string that identifies the page, such as the fips number of a county or
+    the url of an oblast page.
+
+    Along with each page, the journal records the size of the csv file after
+    the page's rows were saved. When the journal is opened, the csv file is cut
+    back to the size after the last saved page, which removes any rows that
+    were written by a page that was interrupted before it was marked as done.
+    Saving a page and then marking it as done is therefore idempotent: a page
+    is either skipped with its rows saved once, or saved again from scratch.
+
+    Use it as a context manager to close the journal when done.
+    """
+
+    def __init__(self, csv_path: str, journal_path: str = None):
+        """
+        Opens the journal of a csv file and removes any rows in the csv file
+        that were saved after the last page was marked as done.
+
+        Args:
+            csv_path: a string representing the path to the csv file the
+            pages are saved to.
+            journal_path: a string representing the path to the journal, or
+            None to keep it next to the csv file with a ".journal" extension.
+        """
+        self.csv_path = csv_path
+        self._connection = sqlite3.connect(
+            journal_path or f"{csv_path}.journal"
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "key TEXT PRIMARY KEY, csv_size INTEGER NOT NULL)"
+        )
+        self._connection.commit()
+        self._done = {
+            key for (key,) in self._connection.execute("SELECT key FROM pages")
+        }
+        self.restore()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._done)
+
+    def is_done(self, key: str) -> bool:
+        """
+        Checks if a page has already been saved.
+
+        Args:
+            key: a string that identifies the page.
+
+        Returns:
+            True if the page has been marked as done, and False otherwise.
+        """
+        return key in self._done
+
+    def mark_done(self, *keys: str):
+        """
+        Marks pages as done after their rows have been saved to the csv file,
+        recording the current size of the csv file. The pages are marked in
+        one transaction.
+
+        Args:
+            keys: strings that identify the pages.
+        """
+        csv_size = (
+            os.path.getsize(self.csv_path)
+            if os.path.exists(self.csv_path)
+            else 0
+        )
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO pages (key, csv_size) VALUES (?, ?)",
+                [(key, csv_size) for key in keys],
+            )
+        self._done.update(keys)
+
+    def reserve(self, csv_size: int):
+        """
+        Records a size the csv file may grow to before the pages whose rows
+        it gains are marked as done, such as when the csv file is replaced,
+        so that restore does not cut the csv file back below it. Nothing is
+        recorded if no pages have been marked as done, since the csv file is
+        then never cut back.
+
+        Args:
+            csv_size: an integer representing the size of the csv file in
+            bytes.
+        """
+        with self._connection:
+            self._connection.execute(
+                "UPDATE pages SET csv_size = MAX(csv_size, ?) "
+                "WHERE rowid = (SELECT MAX(rowid) FROM pages)",
+                (csv_size,),
+            )
+
+    def restore(self):
+        """
+        Cuts the csv file back to its size after the last page was marked as
+        done. The csv file is left as is if no pages have been marked as done
+        or if it is already that size.
+        """
+        (csv_size,) = self._connection.execute(
+            "SELECT csv_size FROM pages ORDER BY rowid DESC LIMIT 1"
+        ).fetchone() or (None,)
+        if csv_size is None or not os.path.exists(self.csv_path):
+            return
+        if os.path.getsize(self.csv_path) > csv_size:
+            with open(self.csv_path, "r+b") as file:
+                file.truncate(csv_size)
+
+    def close(self):
+        """
+        Closes the journal.
+        """
+        self._connection.close()
@@ -4,8 +4,11 @@ in the Russia 2018 Presidential election.
 """
 
 import re
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from typing import NamedTuple
 from os import stat
-import time
+from urllib.parse import urljoin
 from selenium import webdriver
 from selenium.common.exceptions import NoSuchElementException
 from selenium.webdriver.common.by import By
@@ -13,6 +16,23 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from bs4 import BeautifulSoup
 
+from csv_writer import CsvWriter
+from fetcher import Fetcher
+from page_cache import PageCache, refresh_pages, reparse_pages
+
+COLUMN_NAMES = ["candidate", "votes", "region", "oblast"]
+
+
+class VoteRecord(NamedTuple):
+    """
+    The votes for a candidate in an oblast, in the order of COLUMN_NAMES.
+    """
+
+    candidate: str
+    votes: int
+    region: str
+    oblast: str
+
 
 def get_vote_counts(page_html: str) -> str:
     """
@@ -29,25 +49,9 @@ def get_vote_counts(page_html: str) -> str:
         follows: candidate, votes, region, oblast
     """
 
-    soup = BeautifulSoup(page_html)
-    tables = soup.find_all("table")
-    rows = tables[-2].find_all("tr")[13:]
-
-    candidates_and_votes = [r.text.split("\n")[1][2:] for r in rows]
-    separate_candidate_votes_regex = re.compile("([^0-9]+)([0-9]+)")
-    candidates_and_votes = [
-        separate_candidate_votes_regex.match(cav).groups()
-        for cav in candidates_and_votes
-    ]
-
-    location = tables[1].find_all("tr")[0].find("td").text.split(" > ")
+    candidates_and_votes, location = _find_candidates_and_location(page_html)
     print(f"location: {location}")
-    if len(location) > 2:
-        region_oblast = ",".join([location[1], location[2][:-1]])
-    elif len(location) > 1:
-        region_oblast = ",".join([location[1][:-1], location[1][:-1]])
-    else:
-        region_oblast = "N/A"
+    region_oblast = ",".join(_find_region_oblast(location))
     oblast_csv = (
         "\n".join(
             [
@@ -65,6 +69,108 @@ def get_vote_counts(page_html: str) -> str:
     return oblast_csv
 
 
+def get_vote_rows(page_html: str) -> list:
+    """
+    Takes the html source of the page with vote counts and collects all of the
+    votes for each candidate from that page into rows for a CsvWriter.
+
+    Args:
+        page_html: a string representing the html page source containing the
+        vote counts.
+    Returns:
+        A list with a VoteRecord for each candidate, where the region and
+        oblast are "N/A" if the page has no location.
+    """
+    candidates_and_votes, location = _find_candidates_and_location(page_html)
+    region_oblast = _find_region_oblast(location)
+    if len(region_oblast) < 2:
+        region_oblast = ["N/A", "N/A"]
+    return [
+        VoteRecord(candidate, int(votes), *region_oblast)
+        for candidate, votes in candidates_and_votes
+    ]
+
+
+def _find_candidates_and_location(page_html: str) -> (list, list):
+    """
+    Finds the candidates, their votes and the location in the html source of
+    the page with vote counts.
+
+    The page is read with a _TableTextParser, which only keeps the text of
+    each table row instead of building a tree of the whole page like
+    BeautifulSoup, and finds the same text as _soup_candidates_and_location.
+
+    Args:
+        page_html: a string representing the html page source containing the
+        vote counts.
+    Returns:
+        A list of (candidate, votes) tuples of strings, and a list of strings
+        with the parts of the location at the top of the page.
+    """
+    parser = _TableTextParser()
+    parser.feed(page_html)
+    parser.close()
+    rows = parser.tables[-2][13:]
+
+    separate_candidate_votes_regex = re.compile("([^0-9]+)([0-9]+)")
+    candidates_and_votes = [
+        separate_candidate_votes_regex.match(
+            "".join(row_text).split("\n")[1][2:]
+        ).groups()
+        for row_text, _ in rows
+    ]
+
+    _, location_cells = parser.tables[1][0]
+    location = "".join(location_cells[0]).split(" > ")
+    return candidates_and_votes, location
+
+
+def _soup_candidates_and_location(page_html: str) -> (list, list):
+    """
+    Finds the candidates, their votes and the location like
+    _find_candidates_and_location, but with BeautifulSoup. It is kept to check
+    and benchmark the faster parser against.
+
+    Args:
+        page_html: a string representing the html page source containing the
+        vote counts.
+    Returns:
+        A list of (candidate, votes) tuples of strings, and a list of strings
+        with the parts of the location at the top of the page.
+    """
+    soup = BeautifulSoup(page_html)
+    tables = soup.find_all("table")
+    rows = tables[-2].find_all("tr")[13:]
+
+    candidates_and_votes = [r.text.split("\n")[1][2:] for r in rows]
+    separate_candidate_votes_regex = re.compile("([^0-9]+)([0-9]+)")
+    candidates_and_votes = [
+        separate_candidate_votes_regex.match(cav).groups()
+        for cav in candidates_and_votes
+    ]
+
+    location = tables[1].find_all("tr")[0].find("td").text.split(" > ")
+    return candidates_and_votes, location
+
+
+def _find_region_oblast(location: list) -> list:
+    """
+    Finds the region and oblast in the location at the top of a page. Regions
+    without oblasts are used as their own oblast.
+
+    Args:
+        location: a list of strings with the parts of the location.
+    Returns:
+        A list with the region and oblast, or ["N/A"] if the location has no
+        region.
+    """
+    if len(location) > 2:
+        return [location[1], location[2][:-1]]
+    if len(location) > 1:
+        return [location[1][:-1], location[1][:-1]]
+    return ["N/A"]
+
+
 def save_csv(votes_data: str, path: str, column_names: str):
     """
     Adds a string of data to the end of a csv file.
@@ -79,16 +185,33 @@ def save_csv(votes_data: str, path: str, column_names: str):
     """
     file = open(path, "a", encoding="utf-8")
     if stat(path).st_size == 0:
-        file.write(f"{column_names}+\n")
+        file.write(f"{column_names}\n")
     file.write(votes_data)
     file.close()
 
 
-def get_election_data():
+def get_election_data(
+    path: str = "data/2018-Russia-election-data.csv",
+    buffer_size: int = 1000,
+    code_timeout: float = 60,
+    page_cache: PageCache = None,
+):
     """
     Iterates through a website containing the election data for the Russia 2018
     Presidential Election, grabs the votes for each candidate in each region,
     and stored that data in a csv file.
+
+    Oblasts that are already in the file's journal, keyed by the url of their
+    page, are skipped so that an interrupted run picks up where it left off.
+
+    Args:
+        path: a string representing the path to the file to store the data.
+        buffer_size: an integer representing the number of rows to keep in
+        memory before writing them to the file.
+        code_timeout: a float representing the number of seconds to wait for
+        the numerical code to be entered in the browser.
+        page_cache: a PageCache to save the html of every oblast page in, or
+        None to not save the pages.
     """
 
     url = "http://www.vybory.izbirkom.ru/region/izbirkom?action=show& \
@@ -100,61 +223,328 @@ def get_election_data():
     driver = webdriver.Chrome()
 
     driver.get(url)
-    # 10 seconds to manually enter code to proceed
-    time.sleep(10)
 
-    # wait until page loads, then select the page with the table of data
+    # wait until the code has been entered manually and the page loads, then
+    # select the page with the table of data
     # only need to do this once as the configurations save
-    table_format = WebDriverWait(driver, 10).until(
+    table_format = WebDriverWait(driver, code_timeout).until(
         EC.presence_of_element_located((By.LINK_TEXT, "Результаты выборов"))
     )
 
     table_format.click()
-
-    dropdown_regions = driver.find_element_by_name("gs")
-    election_regions = dropdown_regions.find_elements_by_tag_name("option")
-
-    for k in range(1, len(election_regions)):
+    with CsvWriter(path, COLUMN_NAMES, buffer_size, resumable=True) as writer:
         dropdown_regions = driver.find_element_by_name("gs")
         election_regions = dropdown_regions.find_elements_by_tag_name("option")
-        # navigate to the page with data for the region
-        election_regions[k].click()
-        select_button = driver.find_element_by_name("go")
-        select_button.click()
-
-        try:
-            dropdown_oblast = driver.find_element_by_name("gs")
-            election_oblast = dropdown_oblast.find_elements_by_tag_name(
+
+        for k in range(1, len(election_regions)):
+            dropdown_regions = driver.find_element_by_name("gs")
+            election_regions = dropdown_regions.find_elements_by_tag_name(
                 "option"
             )
+            region_key = urljoin(
+                driver.current_url, election_regions[k].get_attribute("value")
+            )
+            # navigate to the page with data for the region
+            election_regions[k].click()
+            select_button = driver.find_element_by_name("go")
+            select_button.click()
 
-            for i in range(1, len(election_oblast)):
+            try:
                 dropdown_oblast = driver.find_element_by_name("gs")
                 election_oblast = dropdown_oblast.find_elements_by_tag_name(
                     "option"
                 )
-                # navigate to the page for an oblast in that city
-                election_oblast[i].click()
-                select_button = driver.find_element_by_name("go")
-                select_button.click()
-                oblast_data = get_vote_counts(driver.page_source)
-                save_csv(
-                    oblast_data,
-                    "data/2018-Russia-election-data.csv",
-                    "candidate,votes,region,oblast",
-                )
-                driver.back()
-        except NoSuchElementException:
-            oblast_data = get_vote_counts(driver.page_source)
-            save_csv(
-                oblast_data,
-                "data/2018-Russia-election-data.csv",
-                "candidate,votes,region,oblast",
-            )
-        driver.back()
 
+                for i in range(1, len(election_oblast)):
+                    dropdown_oblast = driver.find_element_by_name("gs")
+                    election_oblast = (
+                        dropdown_oblast.find_elements_by_tag_name("option")
+                    )
+                    oblast_key = urljoin(
+                        driver.current_url,
+                        election_oblast[i].get_attribute("value"),
+                    )
+                    if writer.journal.is_done(oblast_key):
+                        continue
+                    # navigate to the page for an oblast in that city
+                    election_oblast[i].click()
+                    select_button = driver.find_element_by_name("go")
+                    select_button.click()
+                    page_html = driver.page_source
+                    if page_cache is not None:
+                        page_cache.put(oblast_key, page_html)
+                    writer.write_rows(get_vote_rows(page_html), oblast_key)
+                    driver.back()
+            except NoSuchElementException:
+                if not writer.journal.is_done(region_key):
+                    page_html = driver.page_source
+                    if page_cache is not None:
+                        page_cache.put(region_key, page_html)
+                    writer.write_rows(get_vote_rows(page_html), region_key)
+            driver.back()
     driver.quit()
 
 
+def get_dropdown_urls(page_html: str, page_url: str) -> list:
+    """
+    Finds the urls of the pages listed in the "gs" drop down of a page, which
+    lists the regions on the results page and the oblasts on a region page.
+
+    Args:
+        page_html: a string representing the html page source.
+        page_url: a string representing the url of the page.
+    Returns:
+        A list of the absolute urls of the options in the drop down, without
+        the first option as it does not link to a page. The list is empty if
+        the page has no drop down.
+    """
+    soup = BeautifulSoup(page_html, "html.parser")
+    dropdown = soup.find("select", attrs={"name": "gs"})
+    if dropdown is None:
+        return []
+    return [
+        urljoin(page_url, option.get("value"))
+        for option in dropdown.find_all("option")[1:]
+    ]
+
+
+def fetch_page(url: str, fetcher: Fetcher) -> str:
+    """
+    Downloads a page with a fetcher and decodes it with the charset the server
+    sends, or windows-1251 like the election website if it sends none.
+
+    Args:
+        url: a string representing the url of the page.
+        fetcher: a Fetcher used to download the page.
+    Returns:
+        A string representing the html page source.
+    """
+    return fetcher.fetch(url, default_charset="windows-1251")
+
+
+def find_oblast_pages(
+    results_url: str, executor: ThreadPoolExecutor, fetcher: Fetcher
+) -> list:
+    """
+    Discovers the region and oblast tree of the election results, fetching the
+    region pages with the executor's workers.
+
+    Args:
+        results_url: a string representing the url of the results page with
+        the drop down of regions.
+        executor: a ThreadPoolExecutor used to fetch the region pages.
+        fetcher: a Fetcher used to download the pages.
+    Returns:
+        A list of (url, html) tuples with one tuple for each oblast page, where
+        html is None if the page has not been fetched yet. Regions without
+        oblasts are their own oblast page, and their html is kept so that they
+        are not fetched twice.
+    """
+    region_urls = get_dropdown_urls(
+        fetch_page(results_url, fetcher), results_url
+    )
+    oblast_pages = []
+    for region_url, region_html in zip(
+        region_urls,
+        executor.map(fetch_page, region_urls, [fetcher] * len(region_urls)),
+    ):
+        oblast_urls = get_dropdown_urls(region_html, region_url)
+        if oblast_urls:
+            oblast_pages.extend((url, None) for url in oblast_urls)
+        else:
+            oblast_pages.append((region_url, region_html))
+    return oblast_pages
+
+
+def crawl_election_data(
+    results_url: str,
+    path: str = "data/2018-Russia-election-data.csv",
+    workers: int = 8,
+    buffer_size: int = 1000,
+    fetcher: Fetcher = None,
+    page_cache: PageCache = None,
+) -> int:
+    """
+    Collects the votes for each candidate in each region like
+    get_election_data, but by first discovering the url of every oblast page
+    and then fetching the pages directly with a pool of workers instead of
+    clicking through them in a browser. Oblasts that are already in the file's
+    journal are not fetched again.
+
+    Args:
+        results_url: a string representing the url of the results page with
+        the drop down of regions, after any code has been entered.
+        path: a string representing the path to the file to store the data.
+        workers: an integer representing the number of pages to fetch at once.
+        buffer_size: an integer representing the number of rows to keep in
+        memory before writing them to the file.
+        fetcher: a Fetcher used to download the pages, which can limit the
+        rate of requests, or None to use one that allows workers requests at
+        once and is closed when done.
+        page_cache: a PageCache to save the html of every oblast page in, or
+        None to not save the pages.
+    Returns:
+        An integer representing the number of oblast pages that were saved,
+        not counting the ones that were already in the journal.
+    """
+    if fetcher is None:
+        with Fetcher(max_per_host=workers) as fetcher:
+            return crawl_election_data(
+                results_url, path, workers, buffer_size, fetcher, page_cache
+            )
+
+    def get_oblast_data(page):
+        url, page_html = page
+        page_html = page_html or fetch_page(url, fetcher)
+        return page_html, get_vote_rows(page_html)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor, CsvWriter(
+        path, COLUMN_NAMES, buffer_size, resumable=True
+    ) as writer:
+        oblast_pages = [
+            page
+            for page in find_oblast_pages(results_url, executor, fetcher)
+            if not writer.journal.is_done(page[0])
+        ]
+        for (url, _), (page_html, oblast_rows) in zip(
+            oblast_pages, executor.map(get_oblast_data, oblast_pages)
+        ):
+            if page_cache is not None:
+                page_cache.put(url, page_html)
+            writer.write_rows(oblast_rows, url)
+    return len(oblast_pages)
+
+
+def reparse_election_data(
+    path: str = "data/2018-Russia-election-data.csv",
+    cache_dir: str = None,
+    workers: int = None,
+) -> int:
+    """
+    Makes the csv file of the votes again from the oblast pages saved in a
+    PageCache by get_election_data or crawl_election_data, parsing the pages
+    with get_vote_rows in a pool of processes instead of scraping them again.
+
+    Args:
+        path: a string representing the path to the file to store the data.
+        cache_dir: a string representing the directory of the PageCache, or
+        None for the directory next to the csv file with a ".pages"
+        extension.
+        workers: an integer representing the number of processes, or None for
+        the number of cores.
+    Returns:
+        An integer representing the number of oblast pages that were parsed.
+    """
+    return reparse_pages(
+        cache_dir or f"{path}.pages",
+        get_vote_rows,
+        path,
+        COLUMN_NAMES,
+        workers,
+    )
+
+
+def refresh_election_data(
+    results_url: str,
+    path: str = "data/2018-Russia-election-data.csv",
+    cache_dir: str = None,
+    workers: int = 8,
+    fetcher: Fetcher = None,
+) -> list:
+    """
+    Fetches every oblast page again and updates the rows of the oblasts whose
+    results changed since their pages were saved in a PageCache, without
+    scraping everything again. See refresh_pages.
+
+    Args:
+        results_url: a string representing the url of the results page with
+        the drop down of regions, after any code has been entered.
+        path: a string representing the path to the file the data is stored
+        in.
+        cache_dir: a string representing the directory of the PageCache, or
+        None for the directory next to the csv file with a ".pages"
+        extension.
+        workers: an integer representing the number of pages to fetch at once.
+        fetcher: a Fetcher used to download the pages, or None to use one that
+        allows workers requests at once and is closed when done.
+    Returns:
+        A list with a PageChange for each oblast page that changed or is new.
+    """
+    if fetcher is None:
+        with Fetcher(max_per_host=workers) as fetcher:
+            return refresh_election_data(
+                results_url, path, cache_dir, workers, fetcher
+            )
+
+    def get_oblast_page(page):
+        url, page_html = page
+        return url, page_html or fetch_page(url, fetcher)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor, PageCache(
+        cache_dir or f"{path}.pages"
+    ) as page_cache:
+        return refresh_pages(
+            path,
+            page_cache,
+            executor.map(
+                get_oblast_page,
+                find_oblast_pages(results_url, executor, fetcher),
+            ),
+            get_vote_rows,
+            COLUMN_NAMES,
+        )
+
+
+class _TableTextParser(HTMLParser):
+    """
+    Collects the text of every row of every table in a page without building
+    a tree of the page.
+
+    tables has a list of rows for each table, in the order the tables start,
+    and each row is a (text, cells) tuple. The text is a list of all of the
+    text in the row and the cells are a list of the text in each td or th of
+    the row. Like find_all("tr") in BeautifulSoup, the rows of a table include
+    the rows of any tables inside it.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.tables = []
+        # Each open table, row or cell as (tag, rows or text).
+        self._open = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "table":
+            table = []
+            self.tables.append(table)
+            self._open.append((tag, table))
+        elif tag == "tr":
+            row = ([], [])
+            for open_tag, rows in self._open:
+                if open_tag == "table":
+                    rows.append(row)
+            self._open.append((tag, row))
+        elif tag in ("td", "th"):
+            cell = []
+            for open_tag, row in reversed(self._open):
+                if open_tag == "tr":
+                    row[1].append(cell)
+                    break
+            self._open.append((tag, cell))
+
+    def handle_endtag(self, tag):
+        for index in range(len(self._open) - 1, -1, -1):
+            if self._open[index][0] == tag:
+                del self._open[index:]
+                break
+
+    def handle_data(self, data):
+        for tag, element in self._open:
+            if tag == "tr":
+                element[0].append(data)
+            elif tag != "table":
+                element.append(data)
+
+
 if __name__ == "__main__":
     get_election_data()
@@ -3,9 +3,36 @@ Finds and stores the voting data for each candidate in every district
 in the US 2020 Presidential election.
 """
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
 from os import stat
+from typing import NamedTuple
+from urllib.parse import urlencode, urljoin
 from selenium import webdriver
 
+from csv_writer import CsvWriter
+from fetcher import Fetcher
+from page_cache import PageCache, refresh_pages, reparse_pages
+
+STATE_URL = (
+    "https://uselectionatlas.org/RESULTS/state.php?year=2020"
+    "&off=0&elect=0&fips={fips}&f=0"
+)
+STATE_FIPS = [x for x in range(1, 57) if x not in (3, 7, 11, 14, 43, 52)]
+COLUMN_NAMES = ["candidate", "votes", "county", "state"]
+
+
+class VoteRecord(NamedTuple):
+    """
+    The votes for a candidate in a county, in the order of COLUMN_NAMES.
+    """
+
+    candidate: str
+    votes: int
+    county: str
+    state: str
+
 
 def get_vote_counts(driver) -> str:
     """
@@ -17,25 +44,116 @@ def get_vote_counts(driver) -> str:
     Returns:
         str: csv formatted in this format: candidate, votes, "county, state"
     """
-    candidates = [
-        x.text.replace(",", " ")
-        for x in driver.find_elements_by_class_name("name")[::3]
-    ]
+    return format_vote_counts(get_vote_rows(driver))
 
-    votes = [
-        int(x.text.replace(",", ""))
-        for x in driver.find_elements_by_class_name("num")[::2]
-    ]
-    location = ",".join(
-        driver.find_element_by_class_name("header")
-        .text.split(" - ")[-1]
-        .split(", ")
+
+def get_vote_rows(driver, bulk: bool = True) -> list:
+    """
+    Finds the rows of vote counts on the page open in a browser.
+
+    By default the page source is read from the browser once and parsed with
+    parse_vote_rows. Reading the text of each element instead takes a round
+    trip to the browser for every element, which is slow for counties with
+    many candidates.
+
+    Args:
+        driver: a WebDriver with a county results page open
+        bulk (bool): True to parse the page source, or False to read the text
+        of each element from the browser
+
+    Returns:
+        list: a VoteRecord for each candidate
+    """
+    if bulk:
+        return parse_vote_rows(driver.page_source)
+    return make_vote_rows(
+        [x.text for x in driver.find_elements_by_class_name("name")[::3]],
+        [x.text for x in driver.find_elements_by_class_name("num")[::2]],
+        driver.find_element_by_class_name("header").text,
+    )
+
+
+def parse_vote_counts(page_html: str) -> str:
+    """
+    Turns the html of a page with the vote counts from a county election into a
+    csv, the same way as get_vote_counts but without a browser.
+
+    Args:
+        page_html (str): html source of the page with vote counts
+
+    Returns:
+        str: csv formatted in this format: candidate, votes, "county, state"
+    """
+    return format_vote_counts(parse_vote_rows(page_html))
+
+
+def parse_vote_rows(page_html: str) -> list:
+    """
+    Finds the rows of vote counts in the html of a county results page, the
+    same way as get_vote_rows but without a browser.
+
+    Args:
+        page_html (str): html source of the page with vote counts
+
+    Returns:
+        list: a VoteRecord for each candidate
+    """
+    parser = _ClassTextParser(("name", "num", "header"))
+    parser.feed(page_html)
+    parser.close()
+    return make_vote_rows(
+        parser.texts["name"][::3],
+        parser.texts["num"][::2],
+        parser.texts["header"][0],
     )
+
+
+def make_vote_rows(names: list, numbers: list, header: str) -> list:
+    """
+    Turns the text of the elements of a county page into rows of vote counts.
+
+    Args:
+        names (list): text of every third element with the class "name", which
+        are the candidates
+        numbers (list): text of every second element with the class "num",
+        which are the vote counts
+        header (str): text of the first element with the class "header"
+
+    Returns:
+        list: a VoteRecord for each candidate. The state is the text after the
+        last comma of the location in the header, and the county is the text
+        before it.
+
+    Raises:
+        ValueError: if the location in the header has no comma between the
+        county and the state, such as the header of a state page.
+    """
+    location = header.split(" - ")[-1]
+    county, separator, state = location.rpartition(", ")
+    if not separator:
+        raise ValueError(f"No county and state in the header {header!r}.")
+    return [
+        VoteRecord(candidate, int(vote_count.replace(",", "")), county, state)
+        for candidate, vote_count in zip(names, numbers)
+    ]
+
+
+def format_vote_counts(rows: list) -> str:
+    """
+    Turns rows of vote counts into csv data for save_csv. Commas in candidate
+    names are replaced with spaces since the data is not quoted.
+
+    Args:
+        rows (list): a VoteRecord for each candidate
+
+    Returns:
+        str: csv formatted in this format: candidate, votes, "county, state"
+    """
     return (
         "\n".join(
             [
-                f"{candidate},{vote_count},{location}"
-                for candidate, vote_count in zip(candidates, votes)
+                ",".join([candidate.replace(",", " "), str(votes), *location])
+                for candidate, votes, *location in rows
             ]
         )
         + "\n"
@@ -54,46 +172,344 @@ def save_csv(vote_data: str, file_path: str, column_names: str):
     """
     file = open(file_path, "a")
     if stat(file_path).st_size == 0:
-        file.write(f"{column_names}+\n")
+        file.write(f"{column_names}\n")
     file.write(vote_data)
     file.close()
 
 
-def get_data_for_states():
+def get_data_for_states(
+    file_path: str = "data/2020-us-elections-data.csv",
+    buffer_size: int = 1000,
+    page_cache: PageCache = None,
+):
     """
     Currently, it goes to Alabama, finds the 2020 election data for each
     candidate for each county, and stores it in data/2020-elections-data.txt.
+
+    Counties that are already in the file's journal are skipped, so an
+    interrupted run picks up where it left off.
+
+    Args:
+        file_path (str): file to store data in
+        buffer_size (int): the number of rows to keep in memory before writing
+        them to the file
+        page_cache (PageCache): saves the html of every county page, or None
+        to not save the pages
     """
     # Next two lines are optional, along with the options argument to
     # webdriver.Chrome, in order to eliminate irrelevant logging information.
     options = webdriver.ChromeOptions()
     options.add_experimental_option("excludeSwitches", ["enable-logging"])
 
-    with webdriver.Chrome(options=options) as driver:
-        for fip_number in [
-            x for x in range(1, 57) if x not in (3, 7, 11, 14, 43, 52)
-        ]:
-            driver.get(
-                f"https://uselectionatlas.org/RESULTS/state.php?year=2020 \
-                    &off=0&elect=0&fips={fip_number}&f=0"
-            )
+    with webdriver.Chrome(options=options) as driver, CsvWriter(
+        file_path, COLUMN_NAMES, buffer_size, resumable=True
+    ) as writer:
+        for fip_number in STATE_FIPS:
+            driver.get(STATE_URL.format(fips=fip_number))
             drop_down = driver.find_element_by_name("fips")
             counties = drop_down.find_elements_by_tag_name("option")
             for i, _ in enumerate(counties):
                 drop_down = driver.find_element_by_name("fips")
                 counties = drop_down.find_elements_by_tag_name("option")
                 county = counties[i]
+                key = f"{fip_number}/{county.get_attribute('value')}"
+                if writer.journal.is_done(key):
+                    continue
                 county.click()
                 input_button = driver.find_element_by_name("submit")
                 input_button.click()
-                county_data = get_vote_counts(driver)
-                save_csv(
-                    county_data,
-                    "data/2020-us-elections-data.csv",
-                    "candidate,votes,county,state",
-                )
+                page_html = driver.page_source
+                if page_cache is not None:
+                    page_cache.put(key, page_html)
+                writer.write_rows(parse_vote_rows(page_html), key)
                 driver.back()
 
 
+def get_county_urls(state_html: str, state_url: str) -> dict:
+    """
+    Finds the url of the results page of every county in the county drop down
+    of a state page, which is where the page's form submits to for each county.
+
+    Args:
+        state_html (str): html source of a state results page
+        state_url (str): url of the state results page
+
+    Returns:
+        dict: the fips number of each county mapped to the url of its results
+        page, in drop down order
+    """
+    parser = _CountyFormParser()
+    parser.feed(state_html)
+    parser.close()
+    action = urljoin(state_url, parser.action or state_url)
+    return {
+        fips: f"{action.split('?')[0]}?"
+        + urlencode({**parser.inputs, "fips": fips})
+        for fips in parser.counties
+    }
+
+
+async def fetch_pages(
+    urls: list, semaphore: asyncio.Semaphore, fetcher: Fetcher
+) -> list:
+    """
+    Downloads pages concurrently, with at most as many requests at once as the
+    semaphore allows.
+
+    Args:
+        urls (list): urls of the pages
+        semaphore (asyncio.Semaphore): limits the number of requests at once
+        fetcher (Fetcher): downloads the pages in worker threads
+
+    Returns:
+        list: html source of each page, in the same order as urls
+    """
+
+    async def fetch(url):
+        async with semaphore:
+            return await asyncio.to_thread(fetcher.fetch, url)
+
+    return await asyncio.gather(*[fetch(url) for url in urls])
+
+
+async def get_data_for_states_async(
+    file_path: str = "data/2020-us-elections-data.csv",
+    state_url: str = STATE_URL,
+    state_fips: list = None,
+    max_concurrency: int = 8,
+    buffer_size: int = 1000,
+    fetcher: Fetcher = None,
+    page_cache: PageCache = None,
+):
+    """
+    Finds the 2020 election data for each candidate for each county of every
+    state like get_data_for_states, but requests the county pages directly
+    instead of clicking through them in a browser, with up to max_concurrency
+    requests at once. Counties already in the file's journal are not
+    requested again.
+
+    Args:
+        file_path (str): file to store data in
+        state_url (str): url of a state page with {fips} in place of the state
+        fips number
+        state_fips (list): fips numbers of the states, or None for every state
+        max_concurrency (int): the maximum number of requests at once
+        buffer_size (int): the number of rows to keep in memory before writing
+        them to the file
+        fetcher (Fetcher): downloads the pages and can limit the rate of
+        requests, or None to use one that is closed when done
+        page_cache (PageCache): saves the html of every county page, or None
+        to not save the pages
+    """
+    if fetcher is None:
+        with Fetcher(max_per_host=max_concurrency) as fetcher:
+            return await get_data_for_states_async(
+                file_path,
+                state_url,
+                state_fips,
+                max_concurrency,
+                buffer_size,
+                fetcher,
+                page_cache,
+            )
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def get_state_data(fips, journal):
+        url = state_url.format(fips=fips)
+        (state_html,) = await fetch_pages([url], semaphore, fetcher)
+        county_urls = {
+            f"{fips}/{county}": county_url
+            for county, county_url in get_county_urls(state_html, url).items()
+            if not journal.is_done(f"{fips}/{county}")
+        }
+        county_pages = await fetch_pages(
+            list(county_urls.values()), semaphore, fetcher
+        )
+        return list(zip(county_urls, county_pages))
+
+    with CsvWriter(
+        file_path, COLUMN_NAMES, buffer_size, resumable=True
+    ) as writer:
+        states = [
+            asyncio.create_task(get_state_data(fips, writer.journal))
+            for fips in (STATE_FIPS if state_fips is None else state_fips)
+        ]
+        # Save each state as soon as it and the states before it are done.
+        for state in states:
+            for key, page_html in await state:
+                if page_cache is not None:
+                    page_cache.put(key, page_html)
+                writer.write_rows(parse_vote_rows(page_html), key)
+
+
+def reparse_election_data(
+    file_path: str = "data/2020-us-elections-data.csv",
+    cache_dir: str = None,
+    workers: int = None,
+) -> int:
+    """
+    Makes the csv file of the votes again from the county pages saved in a
+    PageCache by get_data_for_states or get_data_for_states_async, parsing the
+    pages with parse_vote_rows in a pool of processes instead of scraping
+    them again.
+
+    Args:
+        file_path (str): file to store data in
+        cache_dir (str): directory of the PageCache, or None for the directory
+        next to the csv file with a ".pages" extension
+        workers (int): the number of processes, or None for the number of
+        cores
+
+    Returns:
+        int: the number of county pages that were parsed
+    """
+    return reparse_pages(
+        cache_dir or f"{file_path}.pages",
+        parse_vote_rows,
+        file_path,
+        COLUMN_NAMES,
+        workers,
+    )
+
+
+def refresh_election_data(
+    file_path: str = "data/2020-us-elections-data.csv",
+    state_url: str = STATE_URL,
+    state_fips: list = None,
+    cache_dir: str = None,
+    max_concurrency: int = 8,
+    fetcher: Fetcher = None,
+) -> list:
+    """
+    Requests every county page again and updates the rows of the counties
+    whose results changed since their pages were saved in a PageCache, such
+    as after the results were certified, without scraping everything again.
+    See refresh_pages.
+
+    Args:
+        file_path (str): file the data is stored in
+        state_url (str): url of a state page with {fips} in place of the state
+        fips number
+        state_fips (list): fips numbers of the states, or None for every state
+        cache_dir (str): directory of the PageCache, or None for the directory
+        next to the csv file with a ".pages" extension
+        max_concurrency (int): the maximum number of requests at once
+        fetcher (Fetcher): downloads the pages and can limit the rate of
+        requests, or None to use one that is closed when done
+
+    Returns:
+        list: a PageChange for each county page that changed or is new
+    """
+    if fetcher is None:
+        with Fetcher(max_per_host=max_concurrency) as fetcher:
+            return refresh_election_data(
+                file_path,
+                state_url,
+                state_fips,
+                cache_dir,
+                max_concurrency,
+                fetcher,
+            )
+
+    state_fips = STATE_FIPS if state_fips is None else state_fips
+    state_urls = [state_url.format(fips=fips) for fips in state_fips]
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        county_urls = {}
+        for fips, url, state_html in zip(
+            state_fips, state_urls, executor.map(fetcher.fetch, state_urls)
+        ):
+            for county, county_url in get_county_urls(state_html, url).items():
+                county_urls[f"{fips}/{county}"] = county_url
+        county_pages = executor.map(fetcher.fetch, county_urls.values())
+        with PageCache(cache_dir or f"{file_path}.pages") as page_cache:
+            return refresh_pages(
+                file_path,
+                page_cache,
+                zip(county_urls, county_pages),
+                parse_vote_rows,
+                COLUMN_NAMES,
+            )
+
+
+class _ClassTextParser(HTMLParser):
+    """
+    Collects the text of every element with one of the given classes, with
+    whitespace collapsed like the text of a WebDriver element.
+    """
+
+    VOID_ELEMENTS = {"area", "base", "br", "col", "embed", "hr", "img"}
+    VOID_ELEMENTS |= {"input", "link", "meta", "source", "track", "wbr"}
+
+    def __init__(self, class_names: tuple):
+        super().__init__()
+        self.texts = {class_name: [] for class_name in class_names}
+        # Each open element with a wanted class as [class names, depth, text].
+        self._open = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.VOID_ELEMENTS:
+            return
+        for element in self._open:
+            element[1] += 1
+        classes = (dict(attrs).get("class") or "").split()
+        wanted = [name for name in classes if name in self.texts]
+        if wanted:
+            self._open.append([wanted, 0, []])
+
+    def handle_endtag(self, tag):
+        if tag in self.VOID_ELEMENTS:
+            return
+        still_open = []
+        for element in self._open:
+            if element[1] == 0:
+                text = " ".join("".join(element[2]).split())
+                for class_name in element[0]:
+                    self.texts[class_name].append(text)
+            else:
+                element[1] -= 1
+                still_open.append(element)
+        self._open = still_open
+
+    def handle_data(self, data):
+        for element in self._open:
+            element[2].append(data)
+
+
+class _CountyFormParser(HTMLParser):
+    """
+    Finds the action, submitted inputs and county options of the form with the
+    "fips" drop down on a state page.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.action = None
+        self.inputs = {}
+        self.counties = []
+        self._form_action = None
+        self._form_inputs = {}
+        self._in_drop_down = False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "form":
+            self._form_action = attrs.get("action")
+            self._form_inputs = {}
+        elif tag == "input" and attrs.get("type") in ("hidden", "submit"):
+            if attrs.get("name"):
+                self._form_inputs[attrs["name"]] = attrs.get("value", "")
+        elif tag == "select" and attrs.get("name") == "fips":
+            self.action = self._form_action
+            self.inputs = self._form_inputs
+            self._in_drop_down = True
+        elif tag == "option" and self._in_drop_down:
+            self.counties.append(attrs.get("value"))
+
+    def handle_endtag(self, tag):
+        if tag == "select":
+            self._in_drop_down = False
+
+
 if __name__ == "__main__":
     get_data_for_states()
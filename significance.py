@@ -0,0 +1,144 @@
+"""
+Contains functions for finding how significant the digit deviations of each
+category are by comparing them to simulated Benford's law conforming samples
+of the same size.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+from goodness_of_fit import get_digit_proportions
+
+
+def find_empirical_p_values(
+    counts: pd.DataFrame,
+    test: str = "first",
+    num_draws: int = 1000,
+    seed: int = None,
+    batch_size: int = 100,
+    workers: int = 1,
+) -> (pd.Series, pd.DataFrame):
+    """
+    Finds empirical p-values for the digit deviations of each category by
+    drawing num_draws samples from the expected distribution with the same
+    number of digits as the category. Unlike the 1.96 standard deviation range
+    from find_std_dev_range, this does not assume that the percentages are
+    normally distributed, which matters for categories with few votes.
+
+    The categories are simulated in batches of batch_size, and every batch
+    gets its own random seed spawned from seed, so the p-values are the same
+    for any number of workers.
+
+    Args:
+        counts: a pandas DataFrame with the digits of the test as the index and
+        one column of digit counts for each category, such as the output of
+        count_leading_digits or count_digit_positions.
+        test (str, optional): the name of the digit test in DIGIT_TESTS the
+        counts are for. Will default to the first digit test.
+        num_draws (int, optional): the number of samples to draw for each
+        category.
+        seed (int, optional): an integer used to seed the random number
+        generator, or None to use a random seed.
+        batch_size (int, optional): the number of categories to simulate at
+        once. Lower it to use less memory for tests with many digits.
+        workers (int, optional): the number of processes to simulate batches
+        in. Will simulate in the current process if it is 1.
+
+    Returns:
+        A pandas Series with the p-value of the chi-square statistic of each
+        category, and a pandas DataFrame with the same index and columns as
+        counts with the p-value of the absolute deviation of each digit. A
+        p-value is the fraction of draws (counting the category itself) that
+        deviate at least as much as the category. Categories with no digits
+        have NaN p-values.
+    """
+    observed, expected, sizes = get_digit_proportions(counts, test)
+    expected = expected[:, 0]
+    batches = [
+        (
+            observed[:, start : start + batch_size].T,
+            sizes[start : start + batch_size].astype(np.int64),
+            expected,
+            num_draws,
+            batch_seed,
+        )
+        for start, batch_seed in zip(
+            range(0, len(sizes), batch_size),
+            np.random.SeedSequence(seed).spawn(-(-len(sizes) // batch_size)),
+        )
+    ]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_simulate_batch, *zip(*batches)))
+    else:
+        results = [_simulate_batch(*batch) for batch in batches]
+
+    chi_square_p_values = np.concatenate(
+        [np.empty(0)] + [result[0] for result in results]
+    )
+    digit_p_values = np.concatenate(
+        [np.empty((0, len(expected)))] + [result[1] for result in results]
+    )
+    return (
+        pd.Series(chi_square_p_values, index=counts.columns),
+        pd.DataFrame(
+            digit_p_values.T, index=counts.index, columns=counts.columns
+        ),
+    )
+
+
+def _simulate_batch(
+    observed: np.ndarray,
+    sizes: np.ndarray,
+    expected: np.ndarray,
+    num_draws: int,
+    seed: np.random.SeedSequence,
+) -> (np.ndarray, np.ndarray):
+    """
+    Draws samples for a batch of categories at once and compares them to the
+    observed proportions.
+
+    Args:
+        observed: a numpy array with one row of observed digit proportions for
+        each category in the batch.
+        sizes: a numpy array with the number of digits in each category.
+        expected: a numpy array with the expected proportion of each digit.
+        num_draws: the number of samples to draw for each category.
+        seed: the seed of the random number generator for this batch.
+
+    Returns:
+        A numpy array with the chi-square p-value of each category, and a
+        numpy array with one row of digit p-values for each category.
+    """
+    rng = np.random.default_rng(seed)
+    draws = rng.multinomial(
+        sizes[:, np.newaxis], expected, size=(len(sizes), num_draws)
+    )
+    with np.errstate(invalid="ignore", divide="ignore"):
+        drawn = draws / sizes[:, np.newaxis, np.newaxis]
+    drawn_deviations = drawn - expected
+    observed_deviations = observed - expected
+
+    drawn_chi_square = (drawn_deviations**2 / expected).sum(axis=2)
+    observed_chi_square = (observed_deviations**2 / expected).sum(axis=1)
+    # Allow for rounding errors so that draws that deviate exactly as much as
+    # the category are counted.
+    tolerance = 1e-12
+    chi_square_p_values = (
+        1
+        + (
+            drawn_chi_square >= observed_chi_square[:, np.newaxis] - tolerance
+        ).sum(axis=1)
+    ) / (num_draws + 1)
+    digit_p_values = (
+        1
+        + (
+            np.abs(drawn_deviations)
+            >= np.abs(observed_deviations)[:, np.newaxis, :] - tolerance
+        ).sum(axis=1)
+    ) / (num_draws + 1)
+
+    chi_square_p_values[sizes == 0] = np.nan
+    digit_p_values[sizes == 0] = np.nan
+    return chi_square_p_values, digit_p_values
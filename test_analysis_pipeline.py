@@ -0,0 +1,78 @@
+"""
+Test the pipeline that remembers the results of each step of the analysis.
+"""
+
+import pandas as pd
+
+from analysis_pipeline import AnalysisPipeline
+from data_analysis import (
+    data_to_percentage,
+    find_all_leading_digits,
+    find_std_dev_range,
+    find_values_outside_range,
+)
+
+DATA = pd.DataFrame(
+    {
+        "votes": [19838, 7503, 83544, 24578, 5, 301, 1, 2, 250, 91],
+        "state": 5 * ["AL"] + 5 * ["AK"],
+    }
+)
+
+
+def test_pipeline_matches_functions():
+    """
+    Test that each step of the pipeline gives the same result as chaining the
+    functions in data_analysis.
+    """
+    pipeline = AnalysisPipeline()
+    percentages = data_to_percentage(find_all_leading_digits(DATA, "state"))
+    means, std_devs, max_vals, min_vals = find_std_dev_range(percentages)
+    pd.testing.assert_frame_equal(
+        pipeline.percentages(DATA, "state"), percentages
+    )
+    for output, expected in zip(
+        pipeline.std_dev_range(DATA, "state"),
+        (means, std_devs, max_vals, min_vals),
+    ):
+        pd.testing.assert_series_equal(output, expected)
+    assert pipeline.values_outside_range(
+        DATA, "state"
+    ) == find_values_outside_range(percentages, min_vals, max_vals)
+
+
+def test_pipeline_reuses_steps():
+    """
+    Test that the pipeline only computes the steps whose data or parameters
+    changed, and counts the hits and misses.
+    """
+    pipeline = AnalysisPipeline()
+    pipeline.values_outside_range(DATA, "state")
+    # Each of the four steps is computed once, and the later steps find the
+    # percentages computed for the standard deviation range.
+    assert (pipeline.hits, pipeline.misses) == (1, 4)
+    pipeline.values_outside_range(DATA, "state")
+    assert (pipeline.hits, pipeline.misses) == (2, 4)
+    pipeline.percentages(DATA, "state", threshold=5)
+    assert (pipeline.hits, pipeline.misses) == (2, 6)
+    pipeline.percentages(DATA.copy(), "state")
+    assert (pipeline.hits, pipeline.misses) == (2, 8)
+
+    pipeline.clear()
+    assert (len(pipeline), pipeline.hits, pipeline.misses) == (0, 0, 0)
+
+
+def test_pipeline_drops_least_recently_used():
+    """
+    Test that the pipeline keeps at most max_size results and drops the least
+    recently used result first.
+    """
+    pipeline = AnalysisPipeline(max_size=2)
+    first = pipeline.count_leading_digits(DATA, "state")
+    pipeline.count_leading_digits(DATA, "state", 5)
+    assert pipeline.count_leading_digits(DATA, "state") is first
+    pipeline.count_leading_digits(DATA)
+    assert len(pipeline) == 2
+    assert pipeline.count_leading_digits(DATA, "state") is first
+    pipeline.count_leading_digits(DATA, "state", 5)
+    assert (pipeline.hits, pipeline.misses) == (2, 4)
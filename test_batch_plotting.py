@@ -0,0 +1,63 @@
+"""
+Test the renderer that saves the subplots of plot_subplots_bar to files.
+"""
+
+import pandas as pd
+
+from batch_plotting import SubplotsBarRenderer
+
+MEAN = pd.Series([30.0, 18.0, 12.0], index=[1, 2, 3])
+MIN_VAL = pd.Series([25.0, 15.0, 10.0], index=[1, 2, 3])
+MAX_VAL = pd.Series([35.0, 21.0, 14.0], index=[1, 2, 3])
+VALUES_OUTSIDE = [("AL", 1, 40.0), ("AK", 1, 20.0), ("AL", 3, 5.0)]
+
+
+def test_draw_groups_bars():
+    """
+    Test that the draw function draws one bar for the mean and one for each
+    value outside the range of each digit, with two lines for the range, and
+    hides the axes that are not used.
+    """
+    renderer = SubplotsBarRenderer()
+    figure = renderer.draw(
+        "USA", VALUES_OUTSIDE, MEAN, (MIN_VAL, MAX_VAL), ["blue", "green"]
+    )
+    assert len(figure.axes) == 4
+    assert [len(axes.patches) for axes in figure.axes] == [3, 1, 2, 0]
+    assert [len(axes.lines) for axes in figure.axes] == [2, 2, 2, 0]
+    assert [axes.axison for axes in figure.axes] == [True, True, True, False]
+    assert [bar.get_height() for bar in figure.axes[0].patches] == [
+        30.0,
+        40.0,
+        20.0,
+    ]
+    assert figure.axes[2].get_title() == "Leading Digit: 3"
+
+
+def test_save_reuses_figure(tmp_path):
+    """
+    Test that the save function writes an image file for each plot, reusing
+    the figure without keeping the bars of earlier plots.
+
+    Args:
+        tmp_path: a temporary directory for the image files
+    """
+    renderer = SubplotsBarRenderer(figsize=(4, 4), dpi=20)
+    first = renderer.draw(
+        "USA", VALUES_OUTSIDE, MEAN, (MIN_VAL, MAX_VAL), ["blue", "green"]
+    )
+    for name in ["first", "second"]:
+        path = renderer.save(
+            str(tmp_path / f"{name}.png"),
+            "USA",
+            [],
+            MEAN,
+            (MIN_VAL, MAX_VAL),
+            ["blue", "green"],
+        )
+        assert open(path, "rb").read(8) == b"\x89PNG\r\n\x1a\n"
+    second = renderer.draw(
+        "USA", [], MEAN, (MIN_VAL, MAX_VAL), ["blue", "green"]
+    )
+    assert second is first
+    assert [len(axes.patches) for axes in second.axes] == [1, 1, 1, 0]
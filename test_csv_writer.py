@@ -0,0 +1,99 @@
+"""
+Test the buffered csv writer the scrapers save their rows with.
+"""
+
+from csv_writer import CsvWriter
+
+COLUMN_NAMES = ["candidate", "votes", "county", "state"]
+
+
+def test_csv_writer_quotes_values(tmp_path):
+    """
+    Test that the writer writes the header once and quotes values with commas
+    instead of changing them.
+
+    Args:
+        tmp_path: a temporary directory for the csv file
+    """
+    path = tmp_path / "votes.csv"
+    with CsvWriter(str(path), COLUMN_NAMES) as writer:
+        writer.write_rows([["Biden, Joseph", 10, "Autauga", "Alabama"]])
+    with CsvWriter(str(path), COLUMN_NAMES) as writer:
+        writer.write_rows([["Trump", 20, "Autauga", "Alabama"]])
+    assert path.read_text(encoding="utf-8") == (
+        "candidate,votes,county,state\n"
+        '"Biden, Joseph",10,Autauga,Alabama\n'
+        "Trump,20,Autauga,Alabama\n"
+    )
+
+
+def test_csv_writer_keeps_csv_file_while_open(tmp_path):
+    """
+    Test that the csv file keeps its saved rows while a writer adds rows to
+    it, and only has the new rows once the writer is closed.
+
+    Args:
+        tmp_path: a temporary directory for the csv file
+    """
+    path = tmp_path / "votes.csv"
+    with CsvWriter(str(path), COLUMN_NAMES) as writer:
+        writer.write_rows([["A", 1, "Autauga", "Alabama"]])
+    saved = path.read_text()
+
+    writer = CsvWriter(str(path), COLUMN_NAMES, buffer_size=1)
+    writer.write_rows([["B", 2, "Baldwin", "Alabama"]])
+    assert path.read_text() == saved
+    writer.close()
+    assert path.read_text() == saved + "B,2,Baldwin,Alabama\n"
+
+
+def test_csv_writer_buffers_rows(tmp_path):
+    """
+    Test that the writer keeps rows in memory until the buffer is full, writes
+    them to the temporary file, and replaces the csv file when closed.
+
+    Args:
+        tmp_path: a temporary directory for the csv file
+    """
+    path = tmp_path / "votes.csv"
+    writer = CsvWriter(str(path), COLUMN_NAMES, buffer_size=3)
+    writer.write_rows(2 * [["A", 1, "Autauga", "Alabama"]])
+    assert len(writer._rows) == 2
+    writer.write_rows([["B", 2, "Autauga", "Alabama"]])
+    assert not writer._rows
+    assert len(open(writer.temp_path).read().splitlines()) == 4
+    assert not path.exists()
+    writer.write_rows([["C", 3, "Baldwin", "Alabama"]])
+    writer.close()
+    assert len(path.read_text().splitlines()) == 5
+    assert not (tmp_path / "votes.csv.tmp").exists()
+
+
+def test_csv_writer_marks_pages_after_writing(tmp_path):
+    """
+    Test that a resumable writer only marks pages as done once their rows are
+    written, and that rows of pages that were not marked are removed when an
+    interrupted writer is opened again.
+
+    Args:
+        tmp_path: a temporary directory for the csv file and journal
+    """
+    path = tmp_path / "votes.csv"
+    writer = CsvWriter(str(path), COLUMN_NAMES, buffer_size=2, resumable=True)
+    writer.write_rows([["A", 1, "Autauga", "Alabama"]], "1/1001")
+    assert not writer.journal.is_done("1/1001")
+    writer.write_rows([["B", 2, "Baldwin", "Alabama"]], "1/1003")
+    assert writer.journal.is_done("1/1001")
+    assert writer.journal.is_done("1/1003")
+    # Interrupt the writer after a page that was written but not marked.
+    writer._file.write("C,3,Barbour,Alabama\n")
+    writer._file.close()
+    writer.journal.close()
+
+    with CsvWriter(str(path), COLUMN_NAMES, resumable=True) as writer:
+        assert len(writer.journal) == 2
+    assert path.read_text() == (
+        "candidate,votes,county,state\n"
+        "A,1,Autauga,Alabama\n"
+        "B,2,Baldwin,Alabama\n"
+    )
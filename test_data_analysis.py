@@ -9,7 +9,17 @@ import numpy as np
 from data_analysis import (
     get_theoretical_benford_law_values,
     find_all_leading_digits,
+    get_leading_digits,
     get_vote_by_category,
+    count_leading_digits,
+    count_leading_digits_from_csv,
+    get_digit_positions,
+    count_digit_positions,
+    count_digit_cube,
+    roll_up_digit_cube,
+    get_theoretical_digit_distribution,
+    DIGIT_TESTS,
+    NO_DIGIT,
     data_to_percentage,
     find_values_outside_range,
     find_std_dev_range,
@@ -139,6 +149,50 @@ find_all_leading_digits_cases = [
     ),
 ]
 
+# get_leading_digits(votes) -> np.ndarray
+get_leading_digits_cases = [
+    # Check that integers return their first digit and that zeros and negative
+    # numbers return 0
+    (
+        pd.Series([10, 0, 2, -35, 987654321, 1000, 999]),
+        np.array([1, 0, 2, 0, 9, 1, 9]),
+    ),
+    # Check that integers too large to be exact floats return the right digit
+    (
+        np.array([10**18, 10**18 - 1, 2**63 - 1], dtype=np.int64),
+        np.array([1, 9, 9]),
+    ),
+    # Check that floats match the first character of their string, including
+    # NaN, infinity, values below one and values in scientific notation
+    (
+        pd.Series([15.0, np.nan, np.inf, 0.5, 5e-05, 0.0001, 1e23, -2.5]),
+        np.array([1, 0, 0, 0, 5, 0, 1, 0]),
+    ),
+    # Check that values that are not numbers fall back to their string
+    (
+        np.array(["123", "abc", 7], dtype=object),
+        np.array([1, 0, 7]),
+    ),
+    # Check that floats too large for the exact powers of ten match their
+    # string, including values just below a power of ten
+    (
+        np.array(
+            [
+                1e20,
+                9.9e19,
+                np.nextafter(1e22, 0),
+                1e22,
+                np.nextafter(1e24, 0),
+                1e34,
+                np.nextafter(3e21, 0),
+                np.nextafter(1e5, 0),
+                np.finfo(np.float64).max,
+            ]
+        ),
+        np.array([1, 9, 9, 1, 9, 1, 2, 9, 1]),
+    ),
+]
+
 # get_vote_by_category(data: pd.DataFrame, column_name: str, threshold:
 # int = 0)
 get_vote_by_category_cases = [
@@ -169,6 +223,126 @@ get_vote_by_category_cases = [
     ),
 ]
 
+# count_leading_digits(data: pd.DataFrame, column_name: str = None,
+# threshold: int = 0) -> pd.DataFrame
+count_leading_digits_cases = [
+    # Check that the digits of each category are counted, ignoring zeros
+    (
+        pd.DataFrame(
+            data={
+                "random title": ["red", "red", "red", "blue", "blue", "blue"],
+                "votes": [10, 15, 22, 111, 20, 0],
+            }
+        ),
+        ["random title"],
+        [],
+        pd.DataFrame(
+            data={
+                "blue": [1, 1, 0, 0, 0, 0, 0, 0, 0],
+                "red": [2, 1, 0, 0, 0, 0, 0, 0, 0],
+            },
+            index=[1, 2, 3, 4, 5, 6, 7, 8, 9],
+        ),
+    ),
+    # Check that the threshold counts every vote, including zeros
+    (
+        pd.DataFrame(
+            data={
+                "random title": ["red", "red", "blue", "blue", "blue"],
+                "votes": [10, 15, 111, 20, 0],
+            }
+        ),
+        ["random title"],
+        [3],
+        pd.DataFrame(
+            data={"blue": [1, 1, 0, 0, 0, 0, 0, 0, 0]},
+            index=[1, 2, 3, 4, 5, 6, 7, 8, 9],
+        ),
+    ),
+    # Check that the whole dataframe is counted if no column is given
+    (
+        pd.DataFrame(data={"votes": [10, 15, 22, 111, 20, 9]}),
+        [],
+        [],
+        pd.DataFrame(
+            data={0: [3, 2, 0, 0, 0, 0, 0, 0, 1]},
+            index=[1, 2, 3, 4, 5, 6, 7, 8, 9],
+        ),
+    ),
+]
+
+# get_digit_positions(votes) -> pd.DataFrame
+get_digit_positions_cases = [
+    # Check that every digit is found for votes of at least 10 and that only
+    # the first digit is found for single digit votes
+    (
+        pd.Series([123, 10, 9876, 7]),
+        pd.DataFrame(
+            data={
+                "first": [1, 1, 9, 7],
+                "second": [2, 0, 8, NO_DIGIT],
+                "first_two": [12, 10, 98, NO_DIGIT],
+                "last": [3, 0, 6, NO_DIGIT],
+            }
+        ),
+    ),
+    # Check that zeros, NaN and negative numbers have no digits and that the
+    # integer part of floats is used
+    (
+        pd.Series([0, np.nan, -45, 45.7]),
+        pd.DataFrame(
+            data={
+                "first": [NO_DIGIT, NO_DIGIT, NO_DIGIT, 4],
+                "second": [NO_DIGIT, NO_DIGIT, NO_DIGIT, 5],
+                "first_two": [NO_DIGIT, NO_DIGIT, NO_DIGIT, 45],
+                "last": [NO_DIGIT, NO_DIGIT, NO_DIGIT, 5],
+            }
+        ),
+    ),
+    # Check that integers too large to be exact floats keep their digits
+    (
+        pd.Series(np.array([2**63 + 5, 2**53 + 1], dtype=np.uint64)),
+        pd.DataFrame(
+            data={
+                "first": [9, 9],
+                "second": [2, 0],
+                "first_two": [92, 90],
+                "last": [3, 3],
+            }
+        ),
+    ),
+    # Check that floats too large for a uint64 use the digits str() writes
+    (
+        pd.Series([1e20, 9.9e19]),
+        pd.DataFrame(
+            data={
+                "first": [1, 9],
+                "second": [0, 9],
+                "first_two": [10, 99],
+                "last": [0, 0],
+            }
+        ),
+    ),
+]
+
+# get_theoretical_digit_distribution(test: str = "first") -> pd.Series
+get_theoretical_digit_distribution_cases = [
+    # Check that the first digit test matches Benford's law for digits 1-9
+    (
+        "first",
+        [30.103, 17.609, 12.494, 9.691, 7.918, 6.695, 5.799, 5.115, 4.576],
+    ),
+    # Check that the second digit test gives the Benford's law values for the
+    # digits 0-9
+    (
+        "second",
+        [11.968, 11.389, 10.882, 10.433, 10.031, 9.668, 9.337, 9.035, 8.757]
+        + [8.5],
+    ),
+    # Check that the last digit test is uniform
+    ("last", 10 * [10.0]),
+]
+
 # data_to_percentage(data_list: pd.DataFrame) -> pd.DataFrame:
 data_to_percentage_cases = [
     # Check that a dataframe with only 1s and leading digits returns 100%
@@ -207,6 +381,29 @@ data_to_percentage_cases = [
     ),
 ]
 
+# data_to_percentage(data_list: pd.DataFrame, from_counts=True)
+data_to_percentage_from_counts_cases = [
+    # Check that digit counts give the same percentages as the digits, with
+    # digits that never appear removed and columns missing a digit dropped
+    (
+        pd.DataFrame(
+            data={"leading digits": [5, 5, 0, 0, 0, 0, 0, 0, 0]},
+            index=[1, 2, 3, 4, 5, 6, 7, 8, 9],
+        ),
+        pd.DataFrame(data={"leading digits": [50.0, 50.0]}, index=[1, 2]),
+    ),
+    (
+        pd.DataFrame(
+            data={
+                "leading digits": [5, 5, 0, 0, 0, 0, 0, 0, 0],
+                "second column": [4, 0, 0, 0, 0, 0, 0, 0, 0],
+            },
+            index=[1, 2, 3, 4, 5, 6, 7, 8, 9],
+        ),
+        pd.DataFrame(data={"leading digits": [50.0, 50.0]}, index=[1, 2]),
+    ),
+]
+
 # find_values_outside_range(data: pd.DataFrame, min_range: pd.Series,
 # max_range: pd.Series) -> list:
 find_values_outside_range_cases = [
@@ -438,6 +635,39 @@ def test_find_all_leading_digits(data, column_name, threshold, output):
     )
 
 
+@pytest.mark.parametrize("votes,output", get_leading_digits_cases)
+def test_get_leading_digits(votes, output):
+    """
+    Test that the get_leading_digits function finds the leading digit of each
+    vote the same way as reading the first character of the vote as a string.
+
+    Args:
+        votes: an array-like of integers or floats representing vote counts
+        output: a numpy array of the leading digit of each vote, or 0 if the
+        vote has no leading digit
+    """
+    assert np.array_equal(get_leading_digits(votes), output)
+
+
+def test_get_leading_digits_matches_strings():
+    """
+    Test that the get_leading_digits function matches the leading digit found
+    by converting each vote to a string for a large range of random votes.
+    """
+    rng = np.random.default_rng(0)
+    votes = np.concatenate(
+        [
+            rng.integers(-(10**12), 10**12, 1000),
+            rng.random(1000) * 10.0 ** rng.integers(-8, 20, 1000),
+        ]
+    )
+    expected = [
+        int(str(vote)[0]) if str(vote)[0] in "123456789" else 0
+        for vote in votes
+    ]
+    assert get_leading_digits(votes).tolist() == expected
+
+
 @pytest.mark.parametrize(
     "data,column_name,threshold,output", get_vote_by_category_cases
 )
@@ -462,6 +692,248 @@ def test_get_vote_by_category(data, column_name, threshold, output):
         )
 
 
+@pytest.mark.parametrize(
+    "data,column_name,threshold,output", count_leading_digits_cases
+)
+def test_count_leading_digits(data, column_name, threshold, output):
+    """
+    Test that the function count_leading_digits counts each leading digit for
+    every category that meets the threshold.
+
+    Args:
+        data: a pandas DataFrame containing the votes data and at least one
+        category column
+        column_name: a string representing the name of the category to count by
+        threshold: integer representing the minimum number of votes in the
+        category
+        output: a pandas DataFrame with the count of each digit 1-9 in each
+        category
+    """
+    assert (
+        pd.testing.assert_frame_equal(
+            count_leading_digits(data, *column_name, *threshold),
+            output,
+            check_dtype=False,
+            check_index_type=False,
+            check_column_type=False,
+        )
+        is None
+    )
+
+
+@pytest.mark.parametrize(
+    "data,column_name,threshold,output", count_leading_digits_cases
+)
+def test_count_leading_digits_from_csv(
+    data, column_name, threshold, output, tmp_path
+):
+    """
+    Test that the function count_leading_digits_from_csv gives the same counts
+    as count_leading_digits when the csv file is read in small chunks.
+
+    Args:
+        data: a pandas DataFrame containing the votes data and at least one
+        category column
+        column_name: a string representing the name of the category to count by
+        threshold: integer representing the minimum number of votes in the
+        category
+        output: a pandas DataFrame with the count of each digit 1-9 in each
+        category
+        tmp_path: a temporary directory to write the csv file in
+    """
+    path = tmp_path / "votes.csv"
+    data.to_csv(path, index=False)
+    assert (
+        pd.testing.assert_frame_equal(
+            count_leading_digits_from_csv(
+                path, *column_name, *threshold, chunksize=2
+            ),
+            output,
+            check_dtype=False,
+            check_index_type=False,
+            check_column_type=False,
+        )
+        is None
+    )
+
+
+def test_count_leading_digits_from_csv_numeric_categories(tmp_path):
+    """
+    Test that count_leading_digits_from_csv keeps a numeric category column
+    numeric, so its categories are in the same order as count_leading_digits.
+
+    Args:
+        tmp_path: a temporary directory to write the csv file in
+    """
+    data = pd.DataFrame(
+        {"votes": [12, 25, 31, 47, 5, 6], "group": [10, 2, 1, 10, 2, 1]}
+    )
+    path = tmp_path / "votes.csv"
+    data.to_csv(path, index=False)
+    counts = count_leading_digits_from_csv(path, "group", chunksize=2)
+    assert counts.columns.tolist() == [1, 2, 10]
+    pd.testing.assert_frame_equal(
+        counts,
+        count_leading_digits(data, "group"),
+        check_dtype=False,
+        check_index_type=False,
+    )
+
+
+def test_count_leading_digits_from_csv_compact_chunks(tmp_path, monkeypatch):
+    """
+    Test that count_leading_digits_from_csv reads the category column of each
+    chunk as a categorical and the votes as float64.
+
+    Args:
+        tmp_path: a temporary directory to write the csv file in
+        monkeypatch: the pytest fixture used to record the chunks
+    """
+    path = tmp_path / "votes.csv"
+    pd.DataFrame(
+        {"votes": [12, 25, 31, 47], "state": ["AL", "AK", "AL", "AK"]}
+    ).to_csv(path, index=False)
+    chunks = []
+    read_csv = pd.read_csv
+
+    def recording_read_csv(*args, **kwargs):
+        for chunk in read_csv(*args, **kwargs):
+            chunks.append(chunk)
+            yield chunk
+
+    monkeypatch.setattr(pd, "read_csv", recording_read_csv)
+    counts = count_leading_digits_from_csv(path, "state", chunksize=2)
+    assert counts.columns.tolist() == ["AK", "AL"]
+    assert len(chunks) == 2
+    for chunk in chunks:
+        assert chunk["state"].dtype == "category"
+        assert chunk["votes"].dtype == "float64"
+
+
+@pytest.mark.parametrize("votes,output", get_digit_positions_cases)
+def test_get_digit_positions(votes, output):
+    """
+    Test that the get_digit_positions function finds the first, second, first
+    two and last digits of each vote.
+
+    Args:
+        votes: a pandas Series of integers or floats representing vote counts
+        output: a pandas DataFrame with the digits of each vote for every digit
+        test
+    """
+    assert (
+        pd.testing.assert_frame_equal(
+            get_digit_positions(votes), output, check_dtype=False
+        )
+        is None
+    )
+
+
+def test_count_digit_positions():
+    """
+    Test that the count_digit_positions function gives a dataframe of counts
+    for every digit test, with the same first digit counts as
+    count_leading_digits.
+    """
+    data = pd.DataFrame(
+        data={
+            "random title": ["red", "red", "red", "blue", "blue"],
+            "votes": [10, 15, 22, 111, 5],
+        }
+    )
+    counts = count_digit_positions(data, "random title")
+    assert list(counts) == list(DIGIT_TESTS)
+    for test, digit_values in DIGIT_TESTS.items():
+        assert counts[test].index.tolist() == list(digit_values)
+    assert (
+        pd.testing.assert_frame_equal(
+            counts["first"],
+            count_leading_digits(data, "random title"),
+            check_index_type=False,
+        )
+        is None
+    )
+    assert counts["second"]["red"].tolist() == [1, 0, 1, 0, 0, 1] + 4 * [0]
+    assert counts["last"]["blue"].tolist() == [0, 1] + 8 * [0]
+    assert counts["first_two"]["blue"][11] == 1
+
+
+def test_count_digit_cube():
+    """
+    Test that the count_digit_cube function counts the digits of every
+    combination of categories that appears in the data, and that rolling it up
+    gives the same counts as counting each column on its own.
+    """
+    data = pd.DataFrame(
+        data={
+            "candidate": ["A", "A", "A", "B", "B", "B"],
+            "state": ["AL", "AL", "AK", "AL", "AK", None],
+            "votes": [10, 25, 3, 111, 5, 40],
+        }
+    )
+    cube = count_digit_cube(data, ["candidate", "state"])
+    assert cube.index.tolist() == [
+        ("A", "AK"),
+        ("A", "AL"),
+        ("B", "AK"),
+        ("B", "AL"),
+    ]
+    assert cube.loc[("A", "AL")].tolist() == [1, 1, 0, 0, 0, 0, 0, 0, 0, 2]
+    assert cube["size"].sum() == 5
+    for column_name in [None, "candidate", "state"]:
+        assert (
+            pd.testing.assert_frame_equal(
+                roll_up_digit_cube(cube, column_name, threshold=3),
+                count_leading_digits(data.dropna(), column_name, threshold=3),
+            )
+            is None
+        )
+    candidate_a = cube.xs("A", level="candidate", drop_level=False)
+    assert roll_up_digit_cube(candidate_a, "state").columns.tolist() == [
+        "AK",
+        "AL",
+    ]
+    assert roll_up_digit_cube(cube, ["candidate", "state"]).shape == (9, 4)
+    last_digits = count_digit_cube(data, "candidate", "last")
+    assert (
+        pd.testing.assert_frame_equal(
+            roll_up_digit_cube(last_digits, "candidate"),
+            count_digit_positions(data, "candidate")["last"],
+        )
+        is None
+    )
+
+
+@pytest.mark.parametrize(
+    "test,output", get_theoretical_digit_distribution_cases
+)
+def test_get_theoretical_digit_distribution(test, output):
+    """
+    Test that the get_theoretical_digit_distribution function gives the
+    expected percentage of each digit for a digit test.
+
+    Args:
+        test: a string representing the name of the digit test
+        output: a list of the expected percentage of each digit
+    """
+    distribution = get_theoretical_digit_distribution(test)
+    assert distribution.index.tolist() == list(DIGIT_TESTS[test])
+    assert distribution.to_list() == pytest.approx(output, 0.001)
+
+
+def test_get_theoretical_digit_distribution_first_two():
+    """
+    Test that the first two digit distribution adds up to 100 percent and
+    rolls up to the second digit distribution.
+    """
+    first_two = get_theoretical_digit_distribution("first_two")
+    second = first_two.groupby(first_two.index % 10).sum()
+    assert first_two.sum() == pytest.approx(100)
+    assert second.to_list() == pytest.approx(
+        get_theoretical_digit_distribution("second").to_list()
+    )
+
+
 @pytest.mark.parametrize("data,output", data_to_percentage_cases)
 def test_data_to_percentage(data, output):
     """
@@ -478,6 +950,27 @@ def test_data_to_percentage(data, output):
     )
 
 
+@pytest.mark.parametrize("data,output", data_to_percentage_from_counts_cases)
+def test_data_to_percentage_from_counts(data, output):
+    """
+    Test that the data_to_percentage function turns a dataframe of digit counts
+    into the percentage of times each digit occurs in each column.
+
+    Args:
+        data: a pandas dataframe with the count of each digit in each column
+        output: a pandas dataframe containing the percentage of times that each
+        digit occurs in each column
+    """
+    assert (
+        pd.testing.assert_frame_equal(
+            data_to_percentage(data, from_counts=True),
+            output,
+            check_index_type=False,
+        )
+        is None
+    )
+
+
 @pytest.mark.parametrize(
     "data, min_range, max_range,output", find_values_outside_range_cases
 )
@@ -499,6 +992,35 @@ def test_find_values_outside_range(data, min_range, max_range, output):
     assert find_values_outside_range(data, min_range, max_range) == output
 
 
+@pytest.mark.parametrize(
+    "data, min_range, max_range,output", find_values_outside_range_cases
+)
+def test_find_values_outside_range_as_frame(data, min_range, max_range, output):
+    """
+    Test that the find_values_outside_range function returns the same values
+    outside range as a dataframe when as_frame is True.
+
+    Args:
+        data: a pandas dataframe containing the votes data
+        min_range: a pandas Series containing the minimum probabilities that
+        each digit 1-9 can occur
+        max_range: a pandas Series containing the maximum probabilities that
+        each digit 1-9 can occur
+        output: a list of states that fall outside of the min and max range for
+        each digit
+    """
+    assert (
+        pd.testing.assert_frame_equal(
+            find_values_outside_range(
+                data, min_range, max_range, as_frame=True
+            ),
+            pd.DataFrame(output, columns=["category", "digit", "value"]),
+            check_dtype=False,
+        )
+        is None
+    )
+
+
 @pytest.mark.parametrize(
     "data, min_range, max_range", find_values_outside_range_cases_invalid
 )
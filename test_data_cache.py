@@ -0,0 +1,195 @@
+"""
+Test the cache that loads the election data without parsing the csv files.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+
+import data_cache
+from data_cache import load_election_data, load_digit_index
+from data_analysis import (
+    count_leading_digits,
+    count_digit_positions,
+    find_all_leading_digits,
+    get_digit_positions,
+)
+
+CSV_TEXT = (
+    "candidate,votes,county,state\n"
+    "Donald J. Trump,19838,Autauga County,AL\n"
+    "Joseph R. Biden Jr.,7503,Autauga County,AL\n"
+    "Donald J. Trump,83544,Baldwin County,AL\n"
+    "Joseph R. Biden Jr.,24578,Baldwin County,AL\n"
+)
+
+
+def count_csv_reads(monkeypatch) -> list:
+    """
+    Records every csv file the cache parses.
+
+    Args:
+        monkeypatch: the pytest fixture used to replace pd.read_csv
+
+    Returns:
+        A list that the path of every parsed csv file is added to.
+    """
+    reads = []
+    read_csv = pd.read_csv
+
+    def recording_read_csv(path, *args, **kwargs):
+        reads.append(path)
+        return read_csv(path, *args, **kwargs)
+
+    monkeypatch.setattr(data_cache.pd, "read_csv", recording_read_csv)
+    return reads
+
+
+def is_memory_mapped(values: np.ndarray) -> bool:
+    """
+    Checks if an array is a view of a memory-mapped file.
+
+    Args:
+        values: a numpy array
+
+    Returns:
+        True if the array or an array it is a view of is an np.memmap.
+    """
+    while values is not None:
+        if isinstance(values, np.memmap):
+            return True
+        values = values.base
+    return False
+
+
+def test_load_election_data(tmp_path):
+    """
+    Test that the load_election_data function gives the same values as the
+    csv file, with categorical text columns and int32 votes, and the same
+    digit counts.
+
+    Args:
+        tmp_path: a temporary directory for the csv file and cache
+    """
+    path = tmp_path / "votes.csv"
+    path.write_text(CSV_TEXT, encoding="utf-8")
+    expected = pd.read_csv(path)
+    for _ in range(2):
+        data = load_election_data(str(path))
+        assert data["votes"].dtype == "int32"
+        assert data["state"].dtype == "category"
+        pd.testing.assert_frame_equal(
+            data.astype(expected.dtypes.to_dict()), expected
+        )
+        pd.testing.assert_frame_equal(
+            count_leading_digits(data, "county"),
+            count_leading_digits(expected, "county"),
+        )
+    assert os.path.exists(tmp_path / "votes.csv.cache" / "meta.json")
+
+
+def test_load_election_data_fixes_too_many_commas(tmp_path):
+    """
+    Test that the load_election_data function joins the extra columns of rows
+    with commas in their last value back into the last value.
+
+    Args:
+        tmp_path: a temporary directory for the csv file and cache
+    """
+    path = tmp_path / "votes.csv"
+    path.write_text(
+        "candidate,votes,region,oblast\n"
+        "A,1,Адыгея,Москва\n"
+        "B,2,Адыгея,Город, район\n"
+        'C,3,Адыгея,"Город, район"\n',
+        encoding="utf-8",
+    )
+    data = load_election_data(str(path))
+    assert data["oblast"].tolist() == [
+        "Москва",
+        "Город, район",
+        "Город, район",
+    ]
+    assert data["votes"].tolist() == [1, 2, 3]
+    assert data["oblast"].dtype == "category"
+
+
+def test_load_election_data_reuses_cache(tmp_path, monkeypatch):
+    """
+    Test that the csv file is only parsed again when its contents change, not
+    when it is only touched, and that changing the loaded data does not change
+    the cache.
+
+    Args:
+        tmp_path: a temporary directory for the csv file and cache
+        monkeypatch: the pytest fixture used to replace pd.read_csv
+    """
+    reads = count_csv_reads(monkeypatch)
+    path = tmp_path / "votes.csv"
+    path.write_text(CSV_TEXT, encoding="utf-8")
+    data = load_election_data(str(path))
+    data.loc[0, "votes"] = 0
+    assert load_election_data(str(path)).loc[0, "votes"] == 19838
+    assert len(reads) == 1
+
+    os.utime(path, ns=(0, 0))
+    load_election_data(str(path))
+    assert len(reads) == 1
+
+    path.write_text(CSV_TEXT.replace("19838", "19839"), encoding="utf-8")
+    assert load_election_data(str(path)).loc[0, "votes"] == 19839
+    assert len(reads) == 2
+
+    load_election_data(str(path), refresh=True)
+    assert len(reads) == 3
+
+
+def test_load_digit_index(tmp_path):
+    """
+    Test that the load_digit_index function gives the digits of every vote,
+    and that counting with them gives the same counts as finding the digits
+    again.
+
+    Args:
+        tmp_path: a temporary directory for the csv file and cache
+    """
+    path = tmp_path / "votes.csv"
+    path.write_text(CSV_TEXT + "Write-in,7,Baldwin County,AL\n", "utf-8")
+    data = load_election_data(str(path))
+    positions = load_digit_index(str(path))
+    pd.testing.assert_frame_equal(
+        positions, get_digit_positions(pd.read_csv(path)["votes"])
+    )
+    for column_name in [None, "candidate", "county"]:
+        pd.testing.assert_frame_equal(
+            count_leading_digits(data, column_name, positions=positions),
+            count_leading_digits(data, column_name),
+        )
+        pd.testing.assert_frame_equal(
+            find_all_leading_digits(data, column_name, positions=positions),
+            find_all_leading_digits(data, column_name),
+        )
+        expected = count_digit_positions(data, column_name)
+        for test, counts in count_digit_positions(
+            data, column_name, positions=positions
+        ).items():
+            pd.testing.assert_frame_equal(counts, expected[test])
+
+
+def test_loaded_columns_are_memory_mapped(tmp_path):
+    """
+    Test that the columns of the loaded data and digit index are views of the
+    cached files instead of copies in memory.
+
+    Args:
+        tmp_path: a temporary directory for the csv file and cache
+    """
+    path = tmp_path / "votes.csv"
+    path.write_text(CSV_TEXT, encoding="utf-8")
+    load_election_data(str(path))
+    data = load_election_data(str(path))
+    assert is_memory_mapped(data["votes"].to_numpy())
+    assert is_memory_mapped(data["state"].array.codes)
+    positions = load_digit_index(str(path))
+    for test in positions.columns:
+        assert is_memory_mapped(positions[test].to_numpy())
@@ -0,0 +1,103 @@
+"""
+Test the shared fetcher of the scrapers against a local server that can be
+slow or fail.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import time
+from urllib.error import HTTPError
+
+import pytest
+
+from fetcher import Fetcher, TokenBucket
+
+
+def test_fetch_reuses_connection(page_server):
+    """
+    Test that fetching several pages from a server sends every request over
+    the same connection.
+
+    Args:
+        page_server: a local server with saved pages
+    """
+    page_server.pages.update({"/a": "<p>a</p>", "/b": "<p>b</p>"})
+    with Fetcher() as fetcher:
+        pages = [
+            fetcher.fetch(page_server.url + path)
+            for path in ["/a", "/b", "/a"]
+        ]
+    assert pages == ["<p>a</p>", "<p>b</p>", "<p>a</p>"]
+    assert page_server.connections == 1
+
+
+@pytest.mark.parametrize(
+    "failures,retries,num_requests",
+    [(0, 3, 1), (2, 3, 3), (3, 3, 4)],
+)
+def test_fetch_retries_failures(page_server, failures, retries, num_requests):
+    """
+    Test that the fetcher retries a page until the server stops failing.
+
+    Args:
+        page_server: a local server with saved pages
+        failures: the number of times the server fails before serving the page
+        retries: the number of times the fetcher retries
+        num_requests: the number of requests the server should get
+    """
+    page_server.pages["/page"] = "<p>page</p>"
+    page_server.failures["/page"] = failures
+    with Fetcher(retries=retries, backoff=0.01) as fetcher:
+        assert fetcher.fetch(page_server.url + "/page") == "<p>page</p>"
+    assert page_server.requests == ["/page"] * num_requests
+
+
+def test_fetch_raises_after_retries(page_server):
+    """
+    Test that the fetcher raises an HTTPError when the server still fails
+    after every retry, and does not retry a missing page.
+
+    Args:
+        page_server: a local server with saved pages
+    """
+    page_server.pages["/page"] = "<p>page</p>"
+    page_server.failures["/page"] = 5
+    with Fetcher(retries=2, backoff=0.01) as fetcher:
+        with pytest.raises(HTTPError) as error:
+            fetcher.fetch(page_server.url + "/page")
+        assert error.value.code == 503
+        with pytest.raises(HTTPError) as error:
+            fetcher.fetch(page_server.url + "/missing")
+        assert error.value.code == 404
+    assert page_server.requests == ["/page"] * 3 + ["/missing"]
+
+
+def test_fetch_limits_requests_per_host(page_server):
+    """
+    Test that the fetcher sends at most max_per_host requests to a slow
+    server at once, and keeps at most that many connections.
+
+    Args:
+        page_server: a local server with saved pages
+    """
+    page_server.pages["/page"] = "<p>page</p>"
+    page_server.latency = 0.1
+    start = time.perf_counter()
+    with Fetcher(max_per_host=2) as fetcher, ThreadPoolExecutor(6) as executor:
+        list(executor.map(fetcher.fetch, [page_server.url + "/page"] * 6))
+    assert time.perf_counter() - start >= 0.3
+    assert page_server.connections == 2
+
+
+def test_token_bucket_limits_rate():
+    """
+    Test that the token bucket allows a burst of requests at once and spaces
+    out the rest at its rate.
+    """
+    bucket = TokenBucket(rate=50, capacity=3)
+    start = time.perf_counter()
+    for _ in range(3):
+        bucket.acquire()
+    assert time.perf_counter() - start < 0.05
+    for _ in range(5):
+        bucket.acquire()
+    assert time.perf_counter() - start >= 0.1
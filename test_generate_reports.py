@@ -0,0 +1,180 @@
+"""
+Test the command line report generator.
+"""
+
+import json
+import pandas as pd
+
+from generate_reports import (
+    generate_report,
+    generate_reports,
+    main,
+    update_report,
+)
+
+US_TEXT = (
+    "candidate,votes,county,state\n"
+    "A,19838,Autauga County,AL\n"
+    "B,7503,Autauga County,AL\n"
+    "A,83544,Baldwin County,AL\n"
+    "B,24578,Baldwin County,AL\n"
+    "A,1234,Anchorage,AK\n"
+    "B,2345,Anchorage,AK\n"
+)
+RUSSIA_TEXT = (
+    "candidate,votes,region,oblast\n"
+    "A,24,Адыгея,Майкоп\n"
+    "B,655,Адыгея,Майкоп\n"
+    "A,31,Москва,Москва\n"
+    "B,9,Москва,Москва\n"
+)
+
+
+def write_datasets(tmp_path) -> list:
+    """
+    Writes a small US and Russia dataset.
+
+    Args:
+        tmp_path: a temporary directory for the csv files
+
+    Returns:
+        A list of strings with the paths to the csv files.
+    """
+    us_path = tmp_path / "us.csv"
+    us_path.write_text(US_TEXT, encoding="utf-8")
+    russia_path = tmp_path / "russia.csv"
+    russia_path.write_text(RUSSIA_TEXT, encoding="utf-8")
+    return [str(us_path), str(russia_path)]
+
+
+def test_generate_reports(tmp_path):
+    """
+    Test that the generate_reports function saves the files of every column
+    each dataset has, in parallel, with a summary listing them.
+
+    Args:
+        tmp_path: a temporary directory for the csv files and reports
+    """
+    csv_paths = write_datasets(tmp_path)
+    output_dir = tmp_path / "reports"
+    summaries = generate_reports(
+        csv_paths, ["state", "region", "candidate"], str(output_dir), workers=2
+    )
+    assert [summary["dataset"] for summary in summaries] == csv_paths
+    assert list(summaries[0]["columns"]) == ["state", "candidate"]
+    assert list(summaries[1]["columns"]) == ["region", "candidate"]
+
+    state = summaries[0]["columns"]["state"]
+    for key in ["plot", "outliers", "goodness_of_fit"]:
+        assert open(state[key], "rb").read()
+    # Only digits that appear in the votes have percentages.
+    assert list(state["means"]) == ["1", "2", "7", "8"]
+    fit = pd.read_csv(state["goodness_of_fit"], index_col=0)
+    assert fit.index.tolist() == ["AK", "AL"]
+    assert fit["size"].tolist() == [2, 4]
+    with open(
+        output_dir / "russia" / "summary.json", encoding="utf-8"
+    ) as file:
+        assert json.load(file) == summaries[1]
+
+
+def test_update_report(tmp_path):
+    """
+    Test that updating a report with the categories whose votes changed gives
+    the same counts and statistics as making the report again.
+
+    Args:
+        tmp_path: a temporary directory for the csv files and reports
+    """
+    us_path, _ = write_datasets(tmp_path)
+    columns = ["state", "candidate"]
+    generate_report(us_path, columns, str(tmp_path / "updated"))
+    with open(us_path, "w", encoding="utf-8") as file:
+        file.write(US_TEXT.replace("1234,Anchorage", "512,Anchorage"))
+
+    summary = update_report(
+        us_path,
+        str(tmp_path / "updated"),
+        {"state": ["AK"], "candidate": ["A"]},
+    )
+    expected = generate_report(us_path, columns, str(tmp_path / "full"))
+    for column_name in columns:
+        for key in ["counts", "goodness_of_fit"]:
+            assert (
+                open(summary["columns"][column_name][key]).read()
+                == open(expected["columns"][column_name][key]).read()
+            )
+    assert json.dumps(summary).replace("updated", "full") == json.dumps(
+        expected
+    )
+
+
+def test_update_report_numeric_categories(tmp_path):
+    """
+    Test that updating a report grouped by a numeric column matches the
+    changed categories given as strings and keeps the categories in numeric
+    order, the same as making the report again.
+
+    Args:
+        tmp_path: a temporary directory for the csv file and reports
+    """
+    path = tmp_path / "districts.csv"
+    text = (
+        "candidate,votes,district\n"
+        "A,19838,10\n"
+        "B,7503,10\n"
+        "A,83544,2\n"
+        "B,24578,2\n"
+        "A,1234,1\n"
+        "B,2345,1\n"
+    )
+    path.write_text(text, encoding="utf-8")
+    generate_report(str(path), ["district"], str(tmp_path / "updated"))
+    path.write_text(text.replace("19838", "512"), encoding="utf-8")
+
+    summary = update_report(
+        str(path), str(tmp_path / "updated"), {"district": ["10"]}
+    )
+    expected = generate_report(str(path), ["district"], str(tmp_path / "full"))
+    counts = pd.read_csv(summary["columns"]["district"]["counts"], index_col=0)
+    assert counts.columns.tolist() == ["1", "2", "10"]
+    assert (
+        counts["10"].tolist()
+        == pd.read_csv(expected["columns"]["district"]["counts"], index_col=0)[
+            "10"
+        ].tolist()
+    )
+    assert json.dumps(summary).replace("updated", "full") == json.dumps(
+        expected
+    )
+
+
+def test_main(tmp_path, capsys):
+    """
+    Test that the command line arguments are passed on, skipping columns
+    with too few votes to plot and removing their plots from an earlier run.
+
+    Args:
+        tmp_path: a temporary directory for the csv files and reports
+        capsys: the pytest fixture used to read the printed output
+    """
+    csv_paths = write_datasets(tmp_path)
+    output_dir = tmp_path / "reports"
+    generate_report(csv_paths[0], ["state"], str(output_dir))
+    assert (output_dir / "us" / "state.png").exists()
+    main(
+        csv_paths
+        + ["--columns", "state", "--threshold", "5", "--workers", "1"]
+        + ["--output", str(output_dir)]
+    )
+    assert capsys.readouterr().out.splitlines() == [
+        f"{csv_paths[0]}: {output_dir / 'us'}",
+        f"{csv_paths[1]}: {output_dir / 'russia'}",
+    ]
+    with open(output_dir / "us" / "summary.json", encoding="utf-8") as file:
+        summary = json.load(file)
+    assert summary["threshold"] == 5
+    assert summary["columns"]["state"]["num_categories"] == 0
+    assert "plot" not in summary["columns"]["state"]
+    assert not (output_dir / "us" / "state.png").exists()
+    assert not (output_dir / "us" / "state_outliers.csv").exists()
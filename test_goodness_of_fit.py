@@ -0,0 +1,201 @@
+"""
+Test functions that measure how well digit counts follow Benford's law.
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+
+from goodness_of_fit import (
+    find_goodness_of_fit,
+    find_mad_conformity,
+    find_z_statistics,
+    sweep_thresholds,
+)
+from data_analysis import count_leading_digits, count_digit_positions
+
+BENFORD_COUNTS = pd.Series(
+    [301, 176, 125, 97, 79, 67, 58, 51, 46], index=range(1, 10)
+)
+
+# find_goodness_of_fit(counts: pd.DataFrame, test: str = "first")
+# -> pd.DataFrame
+find_goodness_of_fit_cases = [
+    # Check that counts close to Benford's law have small statistics and are
+    # not rejected, while counts of only ones are rejected by every statistic
+    (
+        pd.DataFrame(
+            data={
+                "benford": BENFORD_COUNTS,
+                "ones": [100, 0, 0, 0, 0, 0, 0, 0, 0],
+            },
+            index=range(1, 10),
+        ),
+        "first",
+        pd.DataFrame(
+            data={
+                "size": [1000, 100],
+                "chi_square": [0.0024, 232.193],
+                "chi_square_reject": [False, True],
+                "mad": [0.00019, 0.15533],
+                "mad_conformity": ["close conformity", "nonconformity"],
+                "ks": [0.00024, 0.69897],
+                "ks_reject": [False, True],
+            },
+            index=["benford", "ones"],
+        ),
+    ),
+    # Check that the last digit test compares against a uniform distribution
+    # and has no conformity ranges
+    (
+        pd.DataFrame(data={"uniform": 10 * [5]}, index=range(10)),
+        "last",
+        pd.DataFrame(
+            data={
+                "size": [50],
+                "chi_square": [0.0],
+                "chi_square_reject": [False],
+                "mad": [0.0],
+                "mad_conformity": [None],
+                "ks": [0.0],
+                "ks_reject": [False],
+            },
+            index=["uniform"],
+        ),
+    ),
+]
+
+# find_mad_conformity(mad, test: str = "first") -> np.ndarray
+find_mad_conformity_cases = [
+    # Check each range of the first digit test, including NaN
+    (
+        [0.001, 0.01, 0.013, 0.02, np.nan],
+        "first",
+        [
+            "close conformity",
+            "acceptable conformity",
+            "marginally acceptable conformity",
+            "nonconformity",
+            None,
+        ],
+    ),
+    # Check that the ranges depend on the test
+    (
+        [0.001, 0.0015],
+        "first_two",
+        ["close conformity", "acceptable conformity"],
+    ),
+]
+
+
+@pytest.mark.parametrize("counts,test,output", find_goodness_of_fit_cases)
+def test_find_goodness_of_fit(counts, test, output):
+    """
+    Test that the find_goodness_of_fit function finds the chi-square, mean
+    absolute deviation and Kolmogorov-Smirnov statistics of each category.
+
+    Args:
+        counts: a pandas DataFrame with the count of each digit in each
+        category
+        test: a string representing the name of the digit test
+        output: a pandas DataFrame with the statistics of each category
+    """
+    assert (
+        pd.testing.assert_frame_equal(
+            find_goodness_of_fit(counts, test),
+            output,
+            check_dtype=False,
+            rtol=0.01,
+            atol=0.0001,
+        )
+        is None
+    )
+
+
+def test_find_goodness_of_fit_invalid_input():
+    """
+    Test that the find_goodness_of_fit function returns an error if the digits
+    of the counts do not belong to the digit test.
+    """
+    with pytest.raises(ValueError):
+        find_goodness_of_fit(pd.DataFrame(data={"a": 10 * [1]}), "first")
+
+
+@pytest.mark.parametrize("mad,test,output", find_mad_conformity_cases)
+def test_find_mad_conformity(mad, test, output):
+    """
+    Test that the find_mad_conformity function labels each mean absolute
+    deviation with the right conformity range.
+
+    Args:
+        mad: a list of mean absolute deviations
+        test: a string representing the name of the digit test
+        output: a list of the conformity label of each deviation
+    """
+    assert find_mad_conformity(mad, test).tolist() == output
+
+
+def test_find_z_statistics():
+    """
+    Test that the find_z_statistics function finds the Z-statistic of each
+    digit, only applying the continuity correction where it is smaller than
+    the deviation.
+    """
+    counts = pd.DataFrame(
+        data={
+            "ones": [100, 0, 0, 0, 0, 0, 0, 0, 0],
+            "benford": BENFORD_COUNTS,
+        },
+        index=range(1, 10),
+    )
+    z_statistics = find_z_statistics(counts)
+    expected_one = 0.30103
+    assert z_statistics["ones"][1] == pytest.approx(
+        (1 - expected_one - 1 / 200)
+        / np.sqrt(expected_one * (1 - expected_one) / 100)
+    )
+    assert z_statistics["benford"][1] == pytest.approx(
+        (expected_one - 0.301)
+        / np.sqrt(expected_one * (1 - expected_one) / 1000),
+        rel=1e-3,
+    )
+    assert (z_statistics["benford"] < 1.96).all()
+
+
+@pytest.mark.parametrize("test", ["first", "last"])
+def test_sweep_thresholds(test):
+    """
+    Test that the sweep_thresholds function gives the same categories and
+    statistics for each threshold as counting the digits with that threshold.
+
+    Args:
+        test: a string representing the name of the digit test
+    """
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame(
+        {
+            "votes": np.floor(10 ** rng.uniform(0, 4, 300)).astype(np.int64),
+            "region": rng.choice(
+                ["a", "b", "c", "d"], 300, p=[0.5, 0.3, 0.15, 0.05]
+            ),
+        }
+    )
+    thresholds = [0, 20, 50, 100]
+    swept = sweep_thresholds(data, "region", thresholds, test)
+    assert swept.index.names == ["threshold", "region"]
+    for threshold in thresholds:
+        if test == "first":
+            counts = count_leading_digits(data, "region", threshold)
+        else:
+            counts = count_digit_positions(data, "region", threshold)[test]
+        expected = find_goodness_of_fit(counts, test)
+        output = swept.loc[threshold]
+        assert (
+            output["num_votes"] == data["region"].value_counts()[output.index]
+        ).all()
+        assert (
+            pd.testing.assert_frame_equal(
+                output.drop(columns="num_votes"), expected, check_names=False
+            )
+            is None
+        )
@@ -0,0 +1,219 @@
+"""
+Test the cache of raw pages that the scrapers save and reparse.
+"""
+
+import os
+
+import pytest
+
+from csv_writer import CsvWriter
+from page_cache import PageCache, refresh_pages, reparse_pages
+from scrape_journal import ScrapeJournal
+
+
+def parse_numbers(page_html: str) -> list:
+    """
+    Parses a page of comma separated numbers into one row for each number.
+
+    Args:
+        page_html: a string with comma separated numbers
+
+    Returns:
+        A list of rows with the number and the number times two.
+    """
+    return [[int(n), 2 * int(n)] for n in page_html.split(",")]
+
+
+def test_page_cache_saves_pages(tmp_path):
+    """
+    Test that the page cache keeps the latest html of each key in the order
+    the keys were first saved, shares files between pages with the same html
+    and keeps the pages after it is opened again.
+
+    Args:
+        tmp_path: a temporary directory to keep the cache in
+    """
+    with PageCache(tmp_path / "pages") as cache:
+        assert cache.put("b", "<p>one</p>")
+        assert cache.put("a", "<p>one</p>")
+        assert not cache.put("b", "<p>one</p>")
+        assert cache.put("b", "<p>two</p>")
+        assert cache.digest("a") != cache.digest("b")
+
+    with PageCache(tmp_path / "pages") as cache:
+        assert cache.keys() == ["b", "a"]
+        assert cache.get("a") == "<p>one</p>"
+        assert cache.get("b") == "<p>two</p>"
+        assert "c" not in cache
+    objects = [
+        name
+        for _, _, names in os.walk(tmp_path / "pages" / "objects")
+        for name in names
+    ]
+    assert len(objects) == 2
+
+
+def test_reparse_pages(tmp_path):
+    """
+    Test that reparse_pages makes the csv file and its journal again from the
+    cached pages in the order of the keys, replacing the old csv file.
+
+    Args:
+        tmp_path: a temporary directory to keep the cache and csv file in
+    """
+    path = tmp_path / "numbers.csv"
+    path.write_text("old,rows\n1,1\n")
+    with PageCache(tmp_path / "pages") as cache:
+        cache.put("second", "3,4")
+        cache.put("first", "1,2")
+        cache.put("second", "5")
+
+    num_pages = reparse_pages(
+        tmp_path / "pages", parse_numbers, path, ["n", "double"], workers=2
+    )
+    assert num_pages == 2
+    assert path.read_text().splitlines() == [
+        "n,double",
+        "5,10",
+        "1,2",
+        "2,4",
+    ]
+    assert os.path.exists(f"{path}.journal")
+    assert not os.path.exists(f"{path}.reparse")
+
+
+def test_reparse_pages_keeps_pages_not_in_cache(tmp_path):
+    """
+    Test that reparse_pages raises a KeyError and leaves the csv file, its
+    journal and an interrupted scrape as they are when a page in the journal
+    is not in the cache.
+
+    Args:
+        tmp_path: a temporary directory to keep the cache and csv file in
+    """
+    path = tmp_path / "numbers.csv"
+    with PageCache(tmp_path / "pages") as cache:
+        cache.put("first", "1,2")
+    writer = CsvWriter(str(path), ["n", "double"], resumable=True)
+    writer.write_rows(parse_numbers("1,2"), "first")
+    writer.write_rows(parse_numbers("3"), "uncached")
+    writer.flush()
+    writer._file.close()
+    writer.journal.close()
+    interrupted = (tmp_path / "numbers.csv.tmp").read_text()
+
+    with pytest.raises(KeyError, match="uncached"):
+        reparse_pages(tmp_path / "pages", parse_numbers, path, ["n", "double"])
+    assert (tmp_path / "numbers.csv.tmp").read_text() == interrupted
+    assert not path.exists()
+    with CsvWriter(str(path), ["n", "double"], resumable=True) as writer:
+        assert writer.journal.is_done("uncached")
+
+
+def test_refresh_pages(tmp_path):
+    """
+    Test that refresh_pages only parses the pages whose html changed, replaces
+    their rows in place, adds the rows of new pages at the end and does the
+    same thing if it is run again.
+
+    Args:
+        tmp_path: a temporary directory to keep the cache and csv file in
+    """
+    path = tmp_path / "numbers.csv"
+    with PageCache(tmp_path / "pages") as cache:
+        for key, page_html in [("a", "1,2"), ("b", "3"), ("c", "4")]:
+            cache.put(key, page_html)
+    reparse_pages(tmp_path / "pages", parse_numbers, path, ["n", "double"])
+
+    parsed = []
+
+    def parse(page_html):
+        parsed.append(page_html)
+        return parse_numbers(page_html)
+
+    with PageCache(tmp_path / "pages") as cache:
+        changes = refresh_pages(
+            path,
+            cache,
+            [("a", "1,2"), ("b", "5,6"), ("d", "7")],
+            parse,
+            ["n", "double"],
+        )
+        assert [change.key for change in changes] == ["b", "d"]
+        assert changes[0].old_rows == [[3, 6]]
+        assert parsed == ["3", "5,6", "7"]
+        assert cache.get("b") == "5,6"
+        assert (
+            refresh_pages(
+                path, cache, [("b", "5,6")], parse_numbers, ["n", "double"]
+            )
+            == []
+        )
+    assert path.read_text().splitlines() == [
+        "n,double",
+        "1,2",
+        "2,4",
+        "5,10",
+        "6,12",
+        "4,8",
+        "7,14",
+    ]
+
+
+def test_refresh_pages_interrupted(tmp_path, monkeypatch):
+    """
+    Test that a refresh interrupted after the csv file is replaced but before
+    its pages are marked as done keeps the new rows when the csv file is
+    opened again, and that refreshing again does not add them twice.
+
+    Args:
+        tmp_path: a temporary directory to keep the cache and csv file in
+        monkeypatch: the pytest fixture used to interrupt the refresh
+    """
+    path = tmp_path / "numbers.csv"
+    with PageCache(tmp_path / "pages") as cache:
+        for key, page_html in [("a", "1,2"), ("b", "3")]:
+            cache.put(key, page_html)
+    reparse_pages(tmp_path / "pages", parse_numbers, path, ["n", "double"])
+    pages = [("a", "1,2"), ("b", "5,6"), ("c", "7")]
+    expected = ["n,double", "1,2", "2,4", "5,10", "6,12", "7,14"]
+
+    def interrupt(*keys):
+        raise KeyboardInterrupt
+
+    with PageCache(tmp_path / "pages") as cache:
+        with monkeypatch.context() as patch:
+            patch.setattr(ScrapeJournal, "mark_done", interrupt)
+            with pytest.raises(KeyboardInterrupt):
+                refresh_pages(
+                    path, cache, pages, parse_numbers, ["n", "double"]
+                )
+        with CsvWriter(str(path), ["n", "double"], resumable=True):
+            pass
+        assert path.read_text().splitlines() == expected
+        refresh_pages(path, cache, pages, parse_numbers, ["n", "double"])
+    assert path.read_text().splitlines() == expected
+
+
+def test_refresh_pages_checks_pages_not_in_cache(tmp_path):
+    """
+    Test that refresh_pages raises a KeyError and leaves the csv file as it is
+    when a page in its journal is not in the cache, instead of adding the
+    new rows of the page after its old rows.
+
+    Args:
+        tmp_path: a temporary directory to keep the cache and csv file in
+    """
+    path = tmp_path / "numbers.csv"
+    with CsvWriter(str(path), ["n", "double"], resumable=True) as writer:
+        writer.write_rows(parse_numbers("1"), "a")
+        writer.write_rows(parse_numbers("3"), "b")
+    saved = path.read_text()
+
+    with PageCache(tmp_path / "pages") as cache:
+        with pytest.raises(KeyError, match="'a'"):
+            refresh_pages(
+                path, cache, [("b", "4")], parse_numbers, ["n", "double"]
+            )
+        assert "b" not in cache
+    assert path.read_text() == saved
@@ -0,0 +1,64 @@
+"""
+Test the functions that fix rows with too many commas in the Russian data.
+"""
+
+import pytest
+
+from quick_fix_too_many_commas import normalize_csv, normalize_rows
+
+NORMALIZE_ROWS_CASES = [
+    # A row with the right number of columns is not changed.
+    (["A", "1", "Москва", "Москва"], ["A", "1", "Москва", "Москва"], False),
+    # A row with fewer columns can't be fixed, so it is not changed.
+    (["A", "1"], ["A", "1"], False),
+    # The extra columns are joined back into the last value.
+    (
+        ["A", "1", "Адыгея", "Город", " район"],
+        ["A", "1", "Адыгея", "Город, район"],
+        True,
+    ),
+    (["A", "1", "R", "a", "b", "c"], ["A", "1", "R", "a,b,c"], True),
+]
+
+
+@pytest.mark.parametrize("row,expected,fixed", NORMALIZE_ROWS_CASES)
+def test_normalize_rows(row, expected, fixed):
+    """
+    Test that the normalize_rows function fixes rows with too many columns and
+    reports which rows it fixed.
+
+    Args:
+        row: a list of strings representing a row of the csv file
+        expected: a list of strings representing the fixed row
+        fixed: True if the row should be fixed
+    """
+    assert list(normalize_rows([row])) == [(expected, fixed)]
+
+
+def test_normalize_csv(tmp_path):
+    """
+    Test that the normalize_csv function quotes the fixed values in a new file,
+    leaves the input file as is, and counts the fixed rows.
+
+    Args:
+        tmp_path: a temporary directory for the csv files
+    """
+    input_path = tmp_path / "votes.csv"
+    text = (
+        "candidate,votes,region,oblast\n"
+        "A,1,Адыгея,Город, район\n"
+        "B,2,Москва,Москва\n"
+        'C,3,Адыгея,"Город, район"\n'
+    )
+    input_path.write_text(text, encoding="utf-8")
+    output_path = tmp_path / "fixed.csv"
+    assert normalize_csv(str(input_path), str(output_path)) == 1
+    assert input_path.read_text(encoding="utf-8") == text
+    assert output_path.read_text(encoding="utf-8") == (
+        "candidate,votes,region,oblast\n"
+        'A,1,Адыгея,"Город, район"\n'
+        "B,2,Москва,Москва\n"
+        'C,3,Адыгея,"Город, район"\n'
+    )
+    assert normalize_csv(str(output_path)) == 0
+    assert not (tmp_path / "fixed.csv.tmp").exists()
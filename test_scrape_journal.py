@@ -0,0 +1,79 @@
+"""
+Test the journal that lets scrapers resume without saving duplicate rows.
+"""
+
+from scrape_journal import ScrapeJournal
+
+
+def test_journal_remembers_pages(tmp_path):
+    """
+    Test that pages marked as done are still done when the journal is opened
+    again, and that other pages are not.
+
+    Args:
+        tmp_path: a temporary directory for the csv file and journal
+    """
+    csv_path = tmp_path / "votes.csv"
+    with ScrapeJournal(str(csv_path)) as journal:
+        assert not journal.is_done("1/1001")
+        csv_path.write_text("candidate,votes\nA,1\n")
+        journal.mark_done("1/1001")
+    with ScrapeJournal(str(csv_path)) as journal:
+        assert journal.is_done("1/1001")
+        assert not journal.is_done("1/1003")
+        assert len(journal) == 1
+
+
+def test_journal_removes_unfinished_rows(tmp_path):
+    """
+    Test that opening the journal removes rows saved after the last page was
+    marked as done, such as rows of a page that was interrupted.
+
+    Args:
+        tmp_path: a temporary directory for the csv file and journal
+    """
+    csv_path = tmp_path / "votes.csv"
+    with ScrapeJournal(str(csv_path)) as journal:
+        csv_path.write_text("candidate,votes\nA,1\n")
+        journal.mark_done("1/1001")
+        with open(csv_path, "a") as file:
+            file.write("B,2\n")
+    with ScrapeJournal(str(csv_path)) as journal:
+        assert csv_path.read_text() == "candidate,votes\nA,1\n"
+
+
+def test_journal_keeps_reserved_size(tmp_path):
+    """
+    Test that opening the journal keeps the rows up to a reserved size, and
+    that marking a page as done afterwards records the size of the csv file.
+
+    Args:
+        tmp_path: a temporary directory for the csv file and journal
+    """
+    csv_path = tmp_path / "votes.csv"
+    with ScrapeJournal(str(csv_path)) as journal:
+        csv_path.write_text("candidate,votes\nA,1\n")
+        journal.mark_done("1/1001")
+        journal.reserve(len("candidate,votes\nA,1\nB,2\n"))
+        with open(csv_path, "a") as file:
+            file.write("B,2\n")
+    with ScrapeJournal(str(csv_path)) as journal:
+        assert csv_path.read_text() == "candidate,votes\nA,1\nB,2\n"
+        journal.mark_done("1/1003")
+        with open(csv_path, "a") as file:
+            file.write("C,3\n")
+    with ScrapeJournal(str(csv_path)):
+        assert csv_path.read_text() == "candidate,votes\nA,1\nB,2\n"
+
+
+def test_journal_without_pages_keeps_file(tmp_path):
+    """
+    Test that opening a new journal does not change an existing csv file.
+
+    Args:
+        tmp_path: a temporary directory for the csv file and journal
+    """
+    csv_path = tmp_path / "votes.csv"
+    csv_path.write_text("candidate,votes\nA,1\n")
+    with ScrapeJournal(str(csv_path), str(tmp_path / "other.journal")):
+        assert csv_path.read_text() == "candidate,votes\nA,1\n"
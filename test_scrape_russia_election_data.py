@@ -0,0 +1,226 @@
+"""
+Test the functions that crawl the Russia 2018 election data without a browser,
+using a local server with saved pages.
+"""
+
+from fetcher import Fetcher
+from page_cache import PageCache
+from page_server import make_russia_dropdown_page, make_russia_oblast_page
+from scrape_russia_election_data import (
+    VoteRecord,
+    crawl_election_data,
+    get_dropdown_urls,
+    get_vote_rows,
+    refresh_election_data,
+    reparse_election_data,
+    _find_candidates_and_location,
+    _soup_candidates_and_location,
+)
+
+RESULTS = [
+    ("Бабурин Сергей Николаевич", 24),
+    ("Путин Владимир Владимирович", 9),
+]
+
+
+def add_election_pages(page_server):
+    """
+    Adds the pages of an election with one region that has two oblasts and
+    one region without oblasts to a local server.
+
+    Args:
+        page_server: a local server with saved pages
+    """
+    page_server.pages.update(
+        {
+            "/results": make_russia_dropdown_page(
+                ["/region?id=1", "/region?id=2"]
+            ),
+            "/region?id=1": make_russia_dropdown_page(
+                ["/oblast?id=1", "/oblast?id=2"]
+            ),
+            "/oblast?id=1": make_russia_oblast_page(
+                "Адыгея", "Майкоп", RESULTS
+            ),
+            "/oblast?id=2": make_russia_oblast_page(
+                "Адыгея", "Гиагинская", RESULTS
+            ),
+            "/region?id=2": make_russia_oblast_page("Москва", None, RESULTS),
+        }
+    )
+
+
+def test_get_dropdown_urls():
+    """
+    Test that the get_dropdown_urls function finds the absolute url of every
+    option after the first, and no urls on a page without a drop down.
+    """
+    page = make_russia_dropdown_page(["/region?id=1", "region?id=2"])
+    assert get_dropdown_urls(page, "http://site/results/page") == [
+        "http://site/region?id=1",
+        "http://site/results/region?id=2",
+    ]
+    assert get_dropdown_urls("<html></html>", "http://site/results") == []
+
+
+def test_get_vote_rows():
+    """
+    Test that the get_vote_rows function finds a row with the votes of each
+    candidate, using the region as the oblast of a region without oblasts.
+    """
+    page = make_russia_oblast_page("Адыгея", "Майкоп", RESULTS)
+    assert get_vote_rows(page) == [
+        VoteRecord(name, votes, "Адыгея", "Майкоп") for name, votes in RESULTS
+    ]
+    page = make_russia_oblast_page("Москва", None, RESULTS)
+    assert get_vote_rows(page) == [
+        VoteRecord(name, votes, "Москва", "Москва") for name, votes in RESULTS
+    ]
+
+
+def test_find_candidates_and_location_matches_soup():
+    """
+    Test that the table parser finds the same candidates, votes and location
+    as BeautifulSoup, including on a page with entities and a table inside
+    the results table.
+    """
+    pages = [
+        make_russia_oblast_page("Адыгея", "Майкоп", RESULTS),
+        make_russia_oblast_page("Москва", None, RESULTS),
+        make_russia_oblast_page(
+            "Республика Адыгея (Адыгея)", "Город&nbsp;Майкоп", RESULTS
+        ).replace(
+            "<td>1.</td>", "<td>1.</td><td><table><tr><td></td></tr></table>"
+        ),
+    ]
+    for page in pages:
+        assert _find_candidates_and_location(
+            page
+        ) == _soup_candidates_and_location(page)
+
+
+def test_crawl_election_data(page_server, tmp_path):
+    """
+    Test that the crawl_election_data function saves the votes of every oblast
+    in order while fetching each page only once.
+
+    Args:
+        page_server: a local server with saved pages
+        tmp_path: a temporary directory to save the csv file in
+    """
+    add_election_pages(page_server)
+    path = tmp_path / "votes.csv"
+    assert crawl_election_data(page_server.url + "/results", path, 3) == 3
+    rows = path.read_text(encoding="utf-8").splitlines()[1:]
+    assert [row.split(",")[0] for row in rows] == 3 * [
+        name for name, _ in RESULTS
+    ]
+    assert [row.split(",")[-1] for row in rows] == [
+        "Майкоп",
+        "Майкоп",
+        "Гиагинская",
+        "Гиагинская",
+        "Москва",
+        "Москва",
+    ]
+    assert sorted(page_server.requests) == sorted(page_server.pages)
+
+
+def test_crawl_election_data_resumes(page_server, tmp_path):
+    """
+    Test that the crawl_election_data function skips oblasts that were already
+    saved and removes rows of an oblast that was interrupted.
+
+    Args:
+        page_server: a local server with saved pages
+        tmp_path: a temporary directory to save the csv file in
+    """
+    add_election_pages(page_server)
+    path = tmp_path / "votes.csv"
+    assert crawl_election_data(page_server.url + "/results", path, 3) == 3
+    expected = path.read_text(encoding="utf-8")
+    with open(path, "a", encoding="utf-8") as file:
+        file.write("unfinished,1,row\n")
+    page_server.requests.clear()
+
+    assert crawl_election_data(page_server.url + "/results", path, 3) == 0
+    assert path.read_text(encoding="utf-8") == expected
+    assert "/oblast?id=1" not in page_server.requests
+
+
+def test_crawl_election_data_retries_failures(page_server, tmp_path):
+    """
+    Test that the crawl_election_data function saves every oblast when the
+    server fails some requests, by retrying them with its fetcher.
+
+    Args:
+        page_server: a local server with saved pages
+        tmp_path: a temporary directory to save the csv file in
+    """
+    add_election_pages(page_server)
+    page_server.failures.update({"/region?id=1": 1, "/oblast?id=2": 2})
+    path = tmp_path / "votes.csv"
+    with Fetcher(backoff=0.01) as fetcher:
+        assert (
+            crawl_election_data(
+                page_server.url + "/results", path, 3, fetcher=fetcher
+            )
+            == 3
+        )
+    assert len(path.read_text(encoding="utf-8").splitlines()) == 7
+    assert page_server.requests.count("/oblast?id=2") == 3
+
+
+def test_reparse_election_data(page_server, tmp_path):
+    """
+    Test that reparse_election_data makes the same csv file from the pages
+    that crawl_election_data saved in a page cache, without any requests.
+
+    Args:
+        page_server: a local server with saved pages
+        tmp_path: a temporary directory to save the csv file and pages in
+    """
+    add_election_pages(page_server)
+    path = tmp_path / "votes.csv"
+    with PageCache(f"{path}.pages") as page_cache:
+        crawl_election_data(
+            page_server.url + "/results", path, 3, page_cache=page_cache
+        )
+        assert len(page_cache) == 3
+    expected = path.read_text(encoding="utf-8")
+    path.unlink()
+    page_server.requests.clear()
+
+    assert reparse_election_data(path, workers=2) == 3
+    assert path.read_text(encoding="utf-8") == expected
+    assert page_server.requests == []
+
+
+def test_refresh_election_data(page_server, tmp_path):
+    """
+    Test that refresh_election_data only updates the rows of the oblast whose
+    page changed on the server.
+
+    Args:
+        page_server: a local server with saved pages
+        tmp_path: a temporary directory to save the csv file and pages in
+    """
+    add_election_pages(page_server)
+    path = tmp_path / "votes.csv"
+    with PageCache(f"{path}.pages") as page_cache:
+        crawl_election_data(
+            page_server.url + "/results", path, 3, page_cache=page_cache
+        )
+    rows = path.read_text(encoding="utf-8").splitlines()
+    page_server.pages["/region?id=2"] = make_russia_oblast_page(
+        "Москва", None, [(name, votes + 1) for name, votes in RESULTS]
+    )
+
+    changes = refresh_election_data(page_server.url + "/results", path)
+    assert [change.key for change in changes] == [
+        page_server.url + "/region?id=2"
+    ]
+    assert [record.votes for record in changes[0].new_rows] == [25, 10]
+    new_rows = path.read_text(encoding="utf-8").splitlines()
+    assert new_rows[:5] == rows[:5]
+    assert [row.split(",")[1] for row in new_rows[5:]] == ["25", "10"]
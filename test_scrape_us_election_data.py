@@ -0,0 +1,318 @@
+"""
+Test the functions that scrape the US 2020 election data without a browser,
+using a local server with saved pages.
+"""
+
+import asyncio
+from html.parser import HTMLParser
+
+import pytest
+
+from generate_reports import find_changed_categories
+from page_cache import PageCache
+from page_server import make_us_county_page
+from scrape_us_election_data import (
+    VoteRecord,
+    get_county_urls,
+    get_data_for_states_async,
+    get_vote_rows,
+    make_vote_rows,
+    parse_vote_counts,
+    refresh_election_data,
+    reparse_election_data,
+)
+
+STATE_PAGE = """
+<html><body>
+    <form action="statesub.php" method="get">
+        <input type="hidden" name="year" value="2020">
+        <select name="fips">
+            <option value="1001">Autauga</option>
+            <option value="1003">Baldwin</option>
+        </select>
+        <input type="submit" name="submit" value="Go">
+    </form>
+</body></html>
+"""
+
+AUTAUGA_PAGE = make_us_county_page(
+    "Autauga County, AL",
+    [("Donald J. Trump", 19838), ("Joseph R. Biden Jr.", 7503)],
+)
+BALDWIN_PAGE = make_us_county_page(
+    "Baldwin County, AL",
+    [("Donald J. Trump", 83544), ("Joseph R. Biden Jr.", 24578)],
+)
+
+
+def add_state_pages(page_server):
+    """
+    Adds the pages of a state with two counties to a local server.
+
+    Args:
+        page_server: a local server with saved pages
+    """
+    page_server.pages.update(
+        {
+            "/state.php?fips=1": STATE_PAGE,
+            "/statesub.php?year=2020&submit=Go&fips=1001": AUTAUGA_PAGE,
+            "/statesub.php?year=2020&submit=Go&fips=1003": BALDWIN_PAGE,
+        }
+    )
+
+
+def test_parse_vote_counts():
+    """
+    Test that the parse_vote_counts function turns the html of a county page
+    into the same csv rows as get_vote_counts.
+    """
+    assert parse_vote_counts(AUTAUGA_PAGE) == (
+        "Donald J. Trump,19838,Autauga County,AL\n"
+        "Joseph R. Biden Jr.,7503,Autauga County,AL\n"
+    )
+
+
+class FakeElement:
+    """
+    Stands in for a WebDriver element, counting reading its text as a round
+    trip to the browser.
+    """
+
+    def __init__(self, driver):
+        self._driver = driver
+        self._text = ""
+
+    @property
+    def text(self) -> str:
+        self._driver.round_trips += 1
+        return self._text
+
+
+class FakeDriver(HTMLParser):
+    """
+    Stands in for a WebDriver with a page open, counting the round trips to
+    the browser.
+    """
+
+    def __init__(self, page_html: str):
+        super().__init__()
+        self._page_html = page_html
+        self.round_trips = 0
+        self._elements = {}
+        self._open = []
+        self.feed(page_html)
+
+    def handle_starttag(self, tag, attrs):
+        class_name = dict(attrs).get("class")
+        element = FakeElement(self)
+        self._elements.setdefault(class_name, []).append(element)
+        self._open.append(element)
+
+    def handle_endtag(self, tag):
+        self._open.pop()
+
+    def handle_data(self, data):
+        if self._open:
+            self._open[-1]._text += data.strip()
+
+    @property
+    def page_source(self) -> str:
+        self.round_trips += 1
+        return self._page_html
+
+    def find_elements_by_class_name(self, class_name: str) -> list:
+        self.round_trips += 1
+        return self._elements[class_name]
+
+    def find_element_by_class_name(self, class_name: str):
+        self.round_trips += 1
+        return self._elements[class_name][0]
+
+
+def test_get_vote_rows():
+    """
+    Test that the get_vote_rows function finds the same records by reading
+    the page source once as by reading the elements.
+    """
+    page = make_us_county_page(
+        "Anchorage, Municipality of, AK",
+        [("Donald J. Trump", 19838), ("Joseph R. Biden Jr.", 7503)],
+    )
+    expected = [
+        VoteRecord(
+            "Donald J. Trump", 19838, "Anchorage, Municipality of", "AK"
+        ),
+        VoteRecord(
+            "Joseph R. Biden Jr.", 7503, "Anchorage, Municipality of", "AK"
+        ),
+    ]
+    driver = FakeDriver(page)
+    assert get_vote_rows(driver) == expected
+    assert driver.round_trips == 1
+    driver = FakeDriver(page)
+    assert get_vote_rows(driver, bulk=False) == expected
+    # Three lookups and the text of two names, two numbers and the header.
+    assert driver.round_trips == 8
+
+
+@pytest.mark.parametrize(
+    "header", ["Alabama", "Results - Alabama", "Autauga County AL"]
+)
+def test_make_vote_rows_without_county(header):
+    """
+    Test that the make_vote_rows function raises a ValueError for a header
+    without a county and state instead of saving rows with an empty county.
+
+    Args:
+        header: the text of the header of a page
+    """
+    with pytest.raises(ValueError):
+        make_vote_rows(["Donald J. Trump"], ["19,838"], header)
+
+
+def test_get_county_urls():
+    """
+    Test that the get_county_urls function finds the url of every county in
+    the drop down, submitted to the form's action.
+    """
+    assert get_county_urls(STATE_PAGE, "http://site/RESULTS/state.php") == {
+        "1001": "http://site/RESULTS/statesub.php?year=2020&submit=Go&fips=1001",
+        "1003": "http://site/RESULTS/statesub.php?year=2020&submit=Go&fips=1003",
+    }
+
+
+def test_get_data_for_states_async(page_server, tmp_path):
+    """
+    Test that the get_data_for_states_async function fetches every county of
+    every state from the server and saves their vote counts in order.
+
+    Args:
+        page_server: a local server with saved pages
+        tmp_path: a temporary directory to save the csv file in
+    """
+    add_state_pages(page_server)
+    file_path = tmp_path / "votes.csv"
+    asyncio.run(
+        get_data_for_states_async(
+            file_path,
+            state_url=page_server.url + "/state.php?fips={fips}",
+            state_fips=[1],
+            max_concurrency=2,
+        )
+    )
+    assert file_path.read_text().splitlines()[1:] == [
+        "Donald J. Trump,19838,Autauga County,AL",
+        "Joseph R. Biden Jr.,7503,Autauga County,AL",
+        "Donald J. Trump,83544,Baldwin County,AL",
+        "Joseph R. Biden Jr.,24578,Baldwin County,AL",
+    ]
+    assert len(page_server.requests) == 3
+
+
+def test_get_data_for_states_async_resumes(page_server, tmp_path):
+    """
+    Test that running get_data_for_states_async again after it finished does
+    not request the counties again or save duplicate rows.
+
+    Args:
+        page_server: a local server with saved pages
+        tmp_path: a temporary directory to save the csv file in
+    """
+    add_state_pages(page_server)
+    file_path = tmp_path / "votes.csv"
+    for _ in range(2):
+        asyncio.run(
+            get_data_for_states_async(
+                file_path,
+                state_url=page_server.url + "/state.php?fips={fips}",
+                state_fips=[1],
+            )
+        )
+    assert len(file_path.read_text().splitlines()) == 5
+    assert len(page_server.requests) == 4
+
+
+def test_reparse_election_data(page_server, tmp_path):
+    """
+    Test that reparse_election_data makes the same csv file from the county
+    pages that get_data_for_states_async saved in a page cache, along with a
+    journal that keeps a later scrape from requesting the counties again.
+
+    Args:
+        page_server: a local server with saved pages
+        tmp_path: a temporary directory to save the csv file and pages in
+    """
+    add_state_pages(page_server)
+    file_path = tmp_path / "votes.csv"
+    with PageCache(f"{file_path}.pages") as page_cache:
+        asyncio.run(
+            get_data_for_states_async(
+                file_path,
+                state_url=page_server.url + "/state.php?fips={fips}",
+                state_fips=[1],
+                page_cache=page_cache,
+            )
+        )
+    expected = file_path.read_text()
+    file_path.write_text("candidate,votes,county,state\n")
+
+    assert reparse_election_data(file_path, workers=2) == 2
+    assert file_path.read_text() == expected
+    page_server.requests.clear()
+    asyncio.run(
+        get_data_for_states_async(
+            file_path,
+            state_url=page_server.url + "/state.php?fips={fips}",
+            state_fips=[1],
+        )
+    )
+    assert file_path.read_text() == expected
+    assert page_server.requests == ["/state.php?fips=1"]
+
+
+def test_refresh_election_data(page_server, tmp_path):
+    """
+    Test that refresh_election_data only updates the rows of the county whose
+    page changed on the server, and finds the categories it changed.
+
+    Args:
+        page_server: a local server with saved pages
+        tmp_path: a temporary directory to save the csv file and pages in
+    """
+    add_state_pages(page_server)
+    file_path = tmp_path / "votes.csv"
+    state_url = page_server.url + "/state.php?fips={fips}"
+    with PageCache(f"{file_path}.pages") as page_cache:
+        asyncio.run(
+            get_data_for_states_async(
+                file_path,
+                state_url=state_url,
+                state_fips=[1],
+                page_cache=page_cache,
+            )
+        )
+    page_server.pages["/statesub.php?year=2020&submit=Go&fips=1001"] = (
+        make_us_county_page(
+            "Autauga County, AL",
+            [("Donald J. Trump", 19840), ("Joseph R. Biden Jr.", 7503)],
+        )
+    )
+
+    changes = refresh_election_data(
+        file_path, state_url=state_url, state_fips=[1]
+    )
+    assert [change.key for change in changes] == ["1/1001"]
+    assert file_path.read_text().splitlines()[1:] == [
+        "Donald J. Trump,19840,Autauga County,AL",
+        "Joseph R. Biden Jr.,7503,Autauga County,AL",
+        "Donald J. Trump,83544,Baldwin County,AL",
+        "Joseph R. Biden Jr.,24578,Baldwin County,AL",
+    ]
+    assert find_changed_categories(changes, ["state", "candidate"]) == {
+        "state": ["AL"],
+        "candidate": ["Donald J. Trump", "Joseph R. Biden Jr."],
+    }
+    assert (
+        refresh_election_data(file_path, state_url=state_url, state_fips=[1])
+        == []
+    )
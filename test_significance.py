@@ -0,0 +1,60 @@
+"""
+Test the functions that find empirical p-values for digit deviations.
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+
+from significance import find_empirical_p_values
+
+COUNTS = pd.DataFrame(
+    data={
+        "benford": [301, 176, 125, 97, 79, 67, 58, 51, 46],
+        "ones": [100, 0, 0, 0, 0, 0, 0, 0, 0],
+        "empty": 9 * [0],
+    },
+    index=range(1, 10),
+)
+
+
+def test_find_empirical_p_values():
+    """
+    Test that the find_empirical_p_values function gives high p-values to
+    counts that follow Benford's law, the lowest possible p-values to counts
+    of only ones and NaN to categories without digits.
+    """
+    chi_square_p_values, digit_p_values = find_empirical_p_values(
+        COUNTS, num_draws=200, seed=0
+    )
+    assert chi_square_p_values.index.tolist() == COUNTS.columns.tolist()
+    assert digit_p_values.shape == COUNTS.shape
+    assert chi_square_p_values["benford"] > 0.9
+    assert chi_square_p_values["ones"] == pytest.approx(1 / 201)
+    assert digit_p_values["ones"][1] == pytest.approx(1 / 201)
+    assert (digit_p_values["benford"] > 0.5).all()
+    assert np.isnan(chi_square_p_values["empty"])
+    assert digit_p_values["empty"].isna().all()
+
+
+@pytest.mark.parametrize("batch_size,workers", [(1, 1), (1, 2), (2, 2)])
+def test_find_empirical_p_values_reproducible(batch_size, workers):
+    """
+    Test that the find_empirical_p_values function gives the same p-values for
+    the same seed and batch size with any number of workers.
+
+    Args:
+        batch_size: an integer representing the number of categories to
+        simulate at once
+        workers: an integer representing the number of processes to use
+    """
+    expected = find_empirical_p_values(
+        COUNTS, num_draws=100, seed=1, batch_size=batch_size
+    )
+    output = find_empirical_p_values(
+        COUNTS, num_draws=100, seed=1, batch_size=batch_size, workers=workers
+    )
+    assert (
+        pd.testing.assert_series_equal(output[0], expected[0]) is None
+        and pd.testing.assert_frame_equal(output[1], expected[1]) is None
+    )